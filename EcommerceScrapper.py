@@ -1,12 +1,20 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 import requests
-from bs4 import BeautifulSoup
-import csv
 import os
+import queue
 import re
+import threading
 import time
 
+from scraper_engine import ScraperEngine
+from scraper_sinks import CsvSink
+
+POLL_INTERVAL_MS = 100
+MAX_EVENTS_PER_POLL = 5000
+LOG_MAX_LINES = 1000
+
+
 class ECommerceScraperApp:
     def __init__(self, master):
         self.master = master
@@ -81,9 +89,21 @@ class ECommerceScraperApp:
         self.url_var = tk.StringVar(value="")
         self.filename_var = tk.StringVar(value="scraped_data.csv")
         self.directory_var = tk.StringVar(value=os.getcwd())
+        self.max_pages_var = tk.StringVar(value="1")
         self.status_var = tk.StringVar(value="Enter URL, then click 'Extract Data'.")
 
+        self.events = queue.Queue()
+        # A malformed site profile is reported in the log and skipped rather than stopping the GUI.
+        self.engine = ScraperEngine(log=self._queue_log, skip_invalid_profiles=True)
+        self.worker = None
+        self.started_at = None
+
         self._create_widgets()
+        # Show messages logged while the engine loaded its site profiles.
+        startup_log = []
+        while not self.events.empty():
+            startup_log.append(self.events.get_nowait()[1:])
+        self._append_log(startup_log)
 
     def _create_widgets(self):
         """Creates and arranges the GUI widgets."""
@@ -94,9 +114,11 @@ class ECommerceScraperApp:
         input_frame.config(relief='solid', borderwidth=1)
         input_frame.pack(pady=15, padx=15, fill='x')
 
-        ttk.Label(input_frame, text="Target URL:").grid(row=0, column=0, sticky='w', pady=10, padx=10)
+        ttk.Label(input_frame, text="Target URL(s):").grid(row=0, column=0, sticky='w', pady=10, padx=10)
         self.url_entry = ttk.Entry(input_frame, textvariable=self.url_var, width=80)
-        self.url_entry.grid(row=0, column=1, columnspan=2, sticky='ew', pady=10, padx=10)
+        self.url_entry.grid(row=0, column=1, sticky='ew', pady=10, padx=10)
+        load_button = ttk.Button(input_frame, text="Load List", command=self._load_url_list)
+        load_button.grid(row=0, column=2, sticky='ew', pady=10, padx=10)
 
         ttk.Label(input_frame, text="CSV Filename:").grid(row=1, column=0, sticky='w', pady=10, padx=10)
         self.filename_entry = ttk.Entry(input_frame, textvariable=self.filename_var, width=40)
@@ -108,10 +130,22 @@ class ECommerceScraperApp:
         browse_button = ttk.Button(input_frame, text="Browse", command=self._browse_directory)
         browse_button.grid(row=2, column=2, sticky='ew', pady=10, padx=10)
 
+        ttk.Label(input_frame, text="Max Pages per URL:").grid(row=3, column=0, sticky='w', pady=10, padx=10)
+        self.max_pages_spinbox = ttk.Spinbox(input_frame, from_=1, to=10000, textvariable=self.max_pages_var, width=8)
+        self.max_pages_spinbox.grid(row=3, column=1, sticky='w', pady=10, padx=10)
+
         input_frame.grid_columnconfigure(1, weight=1)
 
-        extract_button = ttk.Button(main_frame, text="Extract Data", command=self.start_scraping)
-        extract_button.pack(pady=20, padx=15, fill='x')
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(pady=20, padx=15, fill='x')
+        self.extract_button = ttk.Button(button_frame, text="Extract Data", command=self.start_scraping)
+        self.extract_button.pack(side='left', expand=True, fill='x')
+        self.cancel_button = ttk.Button(button_frame, text="Cancel", command=self.cancel_scraping)
+        self.cancel_button.pack(side='left', padx=(10, 0))
+        self.cancel_button.state(['disabled'])
+
+        self.progress = ttk.Progressbar(main_frame, mode='determinate')
+        self.progress.pack(pady=(0, 5), padx=15, fill='x')
 
         self.status_label = ttk.Label(main_frame, textvariable=self.status_var, wraplength=700, justify='center',
                                     font=('Inter', 10, 'italic'), foreground=self.style.lookup('.', 'foreground'))
@@ -120,6 +154,7 @@ class ECommerceScraperApp:
         ttk.Label(main_frame, text="Scraping Log:").pack(pady=(15, 8), padx=15, anchor='w')
         self.log_text = tk.Text(main_frame, height=12, width=80, state='disabled', wrap='word')
         self.log_text.pack(pady=(0, 20), padx=15, expand=True, fill='both')
+        self.log_text.tag_config("error", foreground=self.style.lookup('TButton', 'focuscolor'))
 
     def _browse_directory(self):
         """Opens a directory chooser dialog and updates the directory_var."""
@@ -127,20 +162,53 @@ class ECommerceScraperApp:
         if chosen_directory:
             self.directory_var.set(chosen_directory)
 
+    def _load_url_list(self):
+        """Loads a text file with one URL per line into the URL field."""
+        chosen_file = filedialog.askopenfilename(filetypes=[("Text files", "*.txt"), ("All files", "*.*")])
+        if chosen_file:
+            with open(chosen_file, encoding='utf-8') as file:
+                urls = [line.strip() for line in file if line.strip() and not line.strip().startswith('#')]
+            self.url_var.set(' '.join(urls))
+
+    def _queue_log(self, message, is_error=False):
+        """Log callback for worker threads: hands the message to the Tk loop."""
+        self.events.put(('log', message, is_error))
+
     def _update_log(self, message, is_error=False):
         """Updates the log text area with a new message."""
+        self._append_log([(message, is_error)])
+
+    def _append_log(self, entries):
+        """Appends (message, is_error) lines in one widget update, keeping at most LOG_MAX_LINES."""
+        if not entries:
+            return
+        skipped = len(entries) - LOG_MAX_LINES
+        if skipped > 0:
+            entries = [(f"... {skipped} earlier log line(s) skipped ...", False)] + entries[skipped:]
         self.log_text.config(state='normal')
-        if is_error:
-            self.log_text.insert(tk.END, message + "\n", "error")
-        else:
-            self.log_text.insert(tk.END, message + "\n")
+        chunk, chunk_is_error = [], entries[0][1]
+        for message, is_error in entries:
+            if is_error != chunk_is_error:
+                self.log_text.insert(tk.END, "\n".join(chunk) + "\n", ("error",) if chunk_is_error else ())
+                chunk, chunk_is_error = [], is_error
+            chunk.append(message)
+        self.log_text.insert(tk.END, "\n".join(chunk) + "\n", ("error",) if chunk_is_error else ())
+        excess = int(self.log_text.index('end-1c').split('.')[0]) - 1 - LOG_MAX_LINES
+        if excess > 0:
+            self.log_text.delete('1.0', f'{excess + 1}.0')
         self.log_text.see(tk.END)
         self.log_text.config(state='disabled')
-        self.log_text.tag_config("error", foreground=self.style.lookup('TButton', 'focuscolor'))
+
+    def cancel_scraping(self):
+        """Asks the running scrape to stop; rows already extracted are still saved."""
+        if self.worker is not None and self.worker.is_alive():
+            self.engine.cancel()
+            self.cancel_button.state(['disabled'])
+            self.status_var.set("Cancelling: finishing pages already in progress...")
 
     def start_scraping(self):
         """Initiates the scraping process, validating inputs and handling errors."""
-        url = self.url_var.get().strip()
+        urls = [u for u in re.split(r'[\s,]+', self.url_var.get().strip()) if u]
         filename = self.filename_var.get().strip()
         directory = self.directory_var.get().strip()
 
@@ -151,12 +219,15 @@ class ECommerceScraperApp:
         self.status_var.set("Starting scraping...")
         self._update_log("Validation inputs...")
 
-        if not url:
+        if self.worker is not None and self.worker.is_alive():
+            self._update_log("A scrape is already running.", is_error=True)
+            return
+        if not urls:
             messagebox.showerror("Input Error", "Please enter a URL.")
             self.status_var.set("Error: URL is empty.")
             self._update_log("Error: URL is empty.", is_error=True)
             return
-        if not (url.startswith('http://') or url.startswith('https://')):
+        if not all(url.startswith('http://') or url.startswith('https://') for url in urls):
             messagebox.showerror("Input Error", "URL must start with http:// or https://")
             self.status_var.set("Error: Invalid URL format.")
             self._update_log("Error: Invalid URL format.", is_error=True)
@@ -166,370 +237,124 @@ class ECommerceScraperApp:
             self.status_var.set("Error: Filename is empty.")
             self._update_log("Error: Filename is empty.", is_error=True)
             return
+        if not self.max_pages_var.get().strip().isdigit() or int(self.max_pages_var.get()) < 1:
+            messagebox.showerror("Input Error", "Max pages must be a positive whole number.")
+            self.status_var.set("Error: Invalid max pages.")
+            self._update_log("Error: Invalid max pages.", is_error=True)
+            return
+        self.engine.max_pages = int(self.max_pages_var.get())
         if not filename.lower().endswith('.csv'):
             filename += '.csv'
             self.filename_var.set(filename)
 
         output_filepath = os.path.join(directory, filename)
 
-        self._update_log(f"Attempting to scrape: {url}")
+        self._update_log(f"Attempting to scrape {len(urls)} URL(s): {urls[0]}{' ...' if len(urls) > 1 else ''}")
         self._update_log(f"Saving to: {output_filepath}")
 
-        self.master.after(100, lambda: self._scrape_and_save(url, output_filepath))
-
-    def _scrape_and_save(self, url, output_filepath):
-        """Performs the web scraping and saves the data to a CSV file."""
-        try:
-            products_data = self._extract_product_info(url)
-            if products_data:
-                # Determine headers dynamically based on extracted data, prioritizing Name, Price, Rating
-                preferred_headers = ['Name', 'Price', 'Rating']
-                all_extracted_keys = set()
-                for row in products_data:
-                    all_extracted_keys.update(row.keys())
-                
-                headers = []
-                for header in preferred_headers:
-                    if header in all_extracted_keys:
-                        headers.append(header)
-                        all_extracted_keys.remove(header)
-                
-                remaining_headers = sorted(list(all_extracted_keys))
-                headers.extend(remaining_headers)
-
-                self._save_to_csv(products_data, output_filepath, headers)
-                self.status_var.set(f"Successfully extracted {len(products_data)} entries and saved to {output_filepath}")
-                self._update_log(f"SUCCESS: Data saved to {output_filepath}")
-            else:
-                self.status_var.set("No data found that matches common patterns. Check URL or manually inspect structure.")
-                self._update_log("WARNING: No structured data (products/quotes) found matching common patterns. This might be a highly custom site or non-extractable content.")
-        except requests.exceptions.RequestException as e:
-            messagebox.showerror("Network Error", f"Could not connect to the URL: {e}")
-            self.status_var.set(f"Error: Network issue - {e}")
-            self._update_log(f"ERROR: Network error - {e}", is_error=True)
-        except Exception as e:
-            messagebox.showerror("Scraping Error", f"An unexpected error occurred during scraping: {e}")
-            self.status_var.set(f"Error: An unexpected error occurred - {e}")
-            self._update_log(f"ERROR: Unexpected scraping error - {e}", is_error=True)
-
-    def _get_site_specific_selectors(self, url):
-        """Returns specific selectors for known test sites to ensure reliability."""
-        if url.startswith('http://books.toscrape.com'):
-            self._update_log("Applying site-specific selectors for books.toscrape.com")
-            return {
-                'container': ['article.product_pod'],
-                'name': ['h3 a'],
-                'price': ['p.price_color'],
-                'rating': ['p.star-rating'],
-                'quote_text': [],
-                'quote_author': []
-            }
-        elif url.startswith('http://quotes.toscrape.com'):
-            self._update_log("Applying site-specific selectors for quotes.toscrape.com")
-            return {
-                'container': ['div.quote'],
-                'name': [],
-                'price': [],
-                'rating': [],
-                'quote_text': ['span.text'],
-                'quote_author': ['small.author']
-            }
-        return None
-
-    def _extract_product_info(self, url):
-        """Extracts product-like information (name, price, rating) or general data."""
-        self._update_log(f"Fetching content from: {url}")
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/107.0.0.0 Safari/537.36',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive'
-        }
-        response = requests.get(url, headers=headers, timeout=20)
-        response.raise_for_status()
-
-        soup = BeautifulSoup(response.text, 'html.parser')
-        extracted_data = []
-
-        site_specific_selectors = self._get_site_specific_selectors(url)
-
-        PRODUCT_CONTAINER_SELECTORS = []
-        if site_specific_selectors and site_specific_selectors['container']:
-            PRODUCT_CONTAINER_SELECTORS.extend(site_specific_selectors['container'])
-        PRODUCT_CONTAINER_SELECTORS.extend([
-            'article.product_pod',
-            'div.product-grid-item',
-            'li.product-item',
-            'div.product-card',
-            'article.product',
-            'div[data-component-type="s-search-result"]',
-            '.s-result-item',
-            '.product-layout .product-thumb',
-            '.item-row',
-            '.result-item',
-            '[class*="product"]',
-            '[id*="product"]',
-            '[data-test*="product"]',
-            '.col-md-4.col-sm-6.col-xl-3'
-        ])
-
-        PRODUCT_NAME_SELECTORS = []
-        if site_specific_selectors and site_specific_selectors['name']:
-            PRODUCT_NAME_SELECTORS.extend(site_specific_selectors['name'])
-        PRODUCT_NAME_SELECTORS.extend([
-            'h3 a',
-            'h2.product-title a',
-            'a.product-name',
-            'span.a-size-medium.a-color-base.a-text-normal',
-            'a.s-link-style span.a-text-normal',
-            '.caption h4 a',
-            'h1[itemprop="name"]',
-            'h2', 'h3', 'h4',
-            'a[title]',
-            '.title', '.name', '.product-name', '.item-name'
-        ])
-
-        PRODUCT_PRICE_SELECTORS = []
-        if site_specific_selectors and site_specific_selectors['price']:
-            PRODUCT_PRICE_SELECTORS.extend(site_specific_selectors['price'])
-        PRODUCT_PRICE_SELECTORS.extend([
-            'p.price_color',
-            'span.product-price',
-            'span.a-price-whole',
-            'span.a-offscreen',
-            '.price .price-new',
-            '.price', '.amount', '.current-price', '.display-price', '.sale-price',
-            'strong.price',
-            'span[data-a-color="price"]'
-        ])
-
-        PRODUCT_RATING_SELECTORS = []
-        if site_specific_selectors and site_specific_selectors['rating']:
-            PRODUCT_RATING_SELECTORS.extend(site_specific_selectors['rating'])
-        PRODUCT_RATING_SELECTORS.extend([
-            'p.star-rating',
-            'div.star-rating span.rating-value',
-            'span.a-icon-alt',
-            'div.rating span.fa-star.active',
-            '.rating', '.stars', '[class*="rating"]', 'i[class*="star"]'
-        ])
-
-        QUOTE_CONTAINER_SELECTORS = []
-        if site_specific_selectors and site_specific_selectors['container'] and url.startswith('http://quotes.toscrape.com'):
-            QUOTE_CONTAINER_SELECTORS.extend(site_specific_selectors['container'])
+        self.progress.config(maximum=len(urls) * self.engine.max_pages, value=0)
+        self.extract_button.state(['disabled'])
+        self.cancel_button.state(['!disabled'])
+        self.started_at = time.monotonic()
+        self.worker = threading.Thread(target=self._scrape_and_save, args=(urls, output_filepath), daemon=True)
+        self.worker.start()
+        self.master.after(POLL_INTERVAL_MS, self._process_events)
+
+    def _process_events(self):
+        """Drains events posted by the worker thread and applies them to the widgets in one batch.
+
+        Log lines are rendered with a single widget update and only the latest progress
+        event is shown; at most MAX_EVENTS_PER_POLL events are handled per tick so the
+        Tk loop stays responsive.
+        """
+        finished = False
+        log_entries = []
+        progress = None
+        status = None
+        for _ in range(MAX_EVENTS_PER_POLL):
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                break
+            kind = event[0]
+            if kind == 'log':
+                log_entries.append((event[1], event[2]))
+            elif kind == 'progress':
+                progress = event[1:]
+                status = None
+            elif kind == 'status':
+                status = event[1]
+            elif kind == 'error':
+                _, title, message, status = event
+                self._append_log(log_entries)
+                log_entries = []
+                messagebox.showerror(title, message)
+            elif kind == 'done':
+                finished = True
+        self._append_log(log_entries)
+        if progress is not None:
+            done, row_count = progress
+            self.progress.config(value=done)
+            elapsed = max(time.monotonic() - self.started_at, 1e-6)
+            self.status_var.set(f"Scraped {done} page(s), {row_count} entries so far "
+                                f"({done / elapsed:.1f} pages/s)...")
+        if status is not None:
+            self.status_var.set(status)
+        if finished:
+            self.extract_button.state(['!disabled'])
+            self.cancel_button.state(['disabled'])
         else:
-            QUOTE_CONTAINER_SELECTORS.append('div.quote')
-
-        QUOTE_TEXT_SELECTORS = []
-        if site_specific_selectors and site_specific_selectors['quote_text']:
-            QUOTE_TEXT_SELECTORS.extend(site_specific_selectors['quote_text'])
-        else:
-            QUOTE_TEXT_SELECTORS.extend([
-                'span.text',
-                'div.quote-content'
-            ])
-
-        QUOTE_AUTHOR_SELECTORS = []
-        if site_specific_selectors and site_specific_selectors['quote_author']:
-            QUOTE_AUTHOR_SELECTORS.extend(site_specific_selectors['quote_author'])
-        else:
-            QUOTE_AUTHOR_SELECTORS.extend([
-                'small.author',
-                '.quote-author'
-            ])
-
-        containers = []
-        
-        if site_specific_selectors and site_specific_selectors['container'] and not url.startswith('http://quotes.toscrape.com'):
-            self._update_log(f"Attempting to find product containers using site-specific selector(s): {site_specific_selectors['container']}")
-            for selector in site_specific_selectors['container']:
-                try:
-                    found_specific = soup.select(selector, limit=100)
-                    if found_specific:
-                        self._update_log(f"Successfully found containers with specific selector: '{selector}'")
-                        containers.extend(found_specific)
-                        break
-                except Exception as e:
-                    pass
-
-        if not containers:
-            self._update_log("No site-specific product containers found or not applicable. Trying general product selectors.")
-            for selector in PRODUCT_CONTAINER_SELECTORS:
-                try:
-                    found = soup.select(selector, limit=100)
-                    if found:
-                        self._update_log(f"Found containers using general selector: '{selector}'")
-                        containers.extend(found)
-                        break
-                except Exception as e:
-                    pass
-
-        seen_containers = set()
-        unique_containers = []
-        for container in containers:
-            if hash(container) not in seen_containers:
-                unique_containers.append(container)
-                seen_containers.add(hash(container))
-        containers = unique_containers
-
-        if not containers:
-            self._update_log("No common product containers found. Attempting to find quote containers.", is_error=False)
-            for selector in QUOTE_CONTAINER_SELECTORS:
-                try:
-                    found = soup.select(selector, limit=100)
-                    if found:
-                        self._update_log(f"Found quote containers using selector: '{selector}'")
-                        containers.extend(found)
-                        break
-                except Exception as e:
-                    pass
-            
-            seen_containers = set()
-            unique_containers = []
-            for container in containers:
-                if hash(container) not in seen_containers:
-                    unique_containers.append(container)
-                    seen_containers.add(hash(container))
-            containers = unique_containers
-
-        if not containers:
-            self._update_log("No specific item containers found. Attempting to extract general page content.", is_error=False)
-            body_text = soup.body.get_text(separator=' ', strip=True) if soup.body else ''
-            if body_text:
-                extracted_data.append({'Content': body_text[:500] + '...' if len(body_text) > 500 else body_text})
-            return extracted_data
-
-        self._update_log(f"Processing {len(containers)} detected items.")
-
-        for i, container in enumerate(containers):
-            item_data = {}
-            name = "N/A"
-            price = "N/A"
-            rating = "N/A"
-            
-            is_quote_site = url.startswith('http://quotes.toscrape.com')
-            is_quote_container = 'quote' in container.get('class', []) if container else False
-
-            if is_quote_site or is_quote_container:
-                quote_text_el = None
-                for sel in QUOTE_TEXT_SELECTORS:
-                    q_el = container.select_one(sel)
-                    if q_el:
-                        quote_text_el = q_el
-                        break
-                if quote_text_el:
-                    item_data['Quote'] = quote_text_el.get_text(strip=True)
-
-                quote_author_el = None
-                for sel in QUOTE_AUTHOR_SELECTORS:
-                    a_el = container.select_one(sel)
-                    if a_el:
-                        quote_author_el = a_el
-                        break
-                if quote_author_el:
-                    item_data['Author'] = quote_author_el.get_text(strip=True)
-                
-                if 'Quote' in item_data:
-                    extracted_data.append(item_data)
-                    continue
-
-            for selector in PRODUCT_NAME_SELECTORS:
-                try:
-                    name_element = container.select_one(selector)
-                    if name_element:
-                        name = name_element.get_text(strip=True)
-                        if name:
-                            break
-                except Exception as e:
-                    pass
-            item_data['Name'] = name
-
-            found_price_text = None
-            for selector in PRODUCT_PRICE_SELECTORS:
-                try:
-                    price_element = container.select_one(selector)
-                    if price_element:
-                        if 'a-offscreen' in price_element.get('class', []):
-                            found_price_text = price_element.get_text(strip=True)
-                        elif price_element.name == 'span' and ('a-price-whole' in price_element.get('class', []) or 'price' in price_element.get('class', [])):
-                            whole_part = price_element.get_text(strip=True)
-                            fraction_element = container.select_one('span.a-price-fraction')
-                            fraction_part = fraction_element.get_text(strip=True) if fraction_element else ''
-                            found_price_text = f"{whole_part}{fraction_part}" if fraction_part else whole_part
-                        else:
-                            found_price_text = price_element.get_text(strip=True)
-                        if found_price_text:
-                            break
-                except Exception as e:
-                    pass
-
-            if found_price_text and found_price_text != "N/A":
-                price = re.sub(r'[^\d.,]+', '', found_price_text).strip()
-                if price.count(',') > 1 and '.' in price:
-                    price = price.replace(',', '')
-                elif price.count('.') > 1 and ',' in price:
-                    price = price.replace('.', '').replace(',', '.')
-                elif price.startswith('.'):
-                    price = '0' + price
-
-            item_data['Price'] = price
-
-            found_rating_text = None
-            for selector in PRODUCT_RATING_SELECTORS:
-                try:
-                    rating_element = container.select_one(selector)
-                    if rating_element:
-                        if 'star-rating' in rating_element.get('class', []):
-                            rating_classes = rating_element.get('class')
-                            if len(rating_classes) > 1:
-                                rating_word = rating_classes[1].lower()
-                                rating_map = {'one': '1', 'two': '2', 'three': '3', 'four': '4', 'five': '5'}
-                                found_rating_text = rating_map.get(rating_word, "N/A")
-                        elif 'a-icon-alt' in rating_element.get('class', []):
-                            found_rating_text = rating_element.get_text(strip=True)
-                        elif 'rating' in rating_element.get('class', []) and rating_element.name == 'div':
-                            active_stars = rating_element.find_all(class_=re.compile(r'fa-star|active|filled', re.IGNORECASE))
-                            if active_stars:
-                                found_rating_text = f"{len(active_stars)} stars"
-                            else:
-                                found_rating_text = rating_element.get_text(strip=True)
-                        else:
-                            found_rating_text = rating_element.get_text(strip=True)
-                        if found_rating_text:
-                            break
-                except Exception as e:
-                    pass
-
-            if found_rating_text and found_rating_text != "N/A":
-                match = re.search(r'(\d+\.?\d*)', found_rating_text)
-                if match:
-                    rating = match.group(1)
-                else:
-                    rating = found_rating_text
-            item_data['Rating'] = rating
-
-            if any(val != "N/A" for key, val in item_data.items() if key in ['Name', 'Price', 'Rating', 'Quote', 'Author']):
-                extracted_data.append(item_data)
-                self._update_log(f"Extracted: {item_data}")
-
-        return extracted_data
-
-    def _save_to_csv(self, data, filepath, headers):
-        """Saves the extracted data to a CSV file."""
-        if not data:
-            self._update_log("No data to save.")
-            return
+            self.master.after(POLL_INTERVAL_MS, self._process_events)
 
+    def _scrape_and_save(self, urls, output_filepath):
+        """Worker thread: scrapes all URLs concurrently and streams rows to a CSV file."""
+        sink = CsvSink(output_filepath)
         try:
-            with open(filepath, mode='w', newline='', encoding='utf-8') as file:
-                writer = csv.DictWriter(file, fieldnames=headers)
-                writer.writeheader()
-                writer.writerows(data)
-            self._update_log(f"Data successfully written to {filepath}")
+            failures = []
+            done = 0
+            row_count = 0
+            for done, (url, rows, error) in enumerate(self.engine.scrape(urls), start=1):
+                if error is not None:
+                    failures.append((url, error))
+                sink.write(rows)
+                row_count += len(rows)
+                self.events.put(('progress', done, row_count))
+            sink.close()
+
+            if self.engine.cancelled:
+                self.events.put(('status', f"Cancelled after {done} page(s); {row_count} entries saved to {output_filepath}"))
+                self._queue_log(f"CANCELLED: {row_count} entries saved to {output_filepath}", is_error=True)
+            elif row_count:
+                self.events.put(('status', f"Successfully extracted {row_count} entries and saved to {output_filepath}"))
+                self._queue_log(f"SUCCESS: Data saved to {output_filepath}")
+            elif failures and len(failures) == done and isinstance(failures[0][1], requests.exceptions.RequestException):
+                e = failures[0][1]
+                self.events.put(('error', "Network Error", f"Could not connect to the URL: {e}", f"Error: Network issue - {e}"))
+                self._queue_log(f"ERROR: Network error - {e}", is_error=True)
+            else:
+                self.events.put(('status', "No data found that matches common patterns. Check URL or manually inspect structure."))
+                self._queue_log("WARNING: No structured data (products/quotes) found matching common patterns. This might be a highly custom site or non-extractable content.")
+            if failures and row_count:
+                self._queue_log(f"WARNING: {len(failures)} of {done} page(s) failed.", is_error=True)
+            stored = sink.late_columns - sink.dropped_columns
+            if stored:
+                self._queue_log(f"Late columns stored in '{sink.extra_column}': {', '.join(sorted(stored))}")
+            if sink.dropped_columns:
+                self._queue_log(f"WARNING: Columns not in the CSV header were dropped: "
+                                f"{', '.join(sorted(sink.dropped_columns))}", is_error=True)
         except IOError as e:
-            messagebox.showerror("File Error", f"Could not write to CSV file: {e}")
-            self.status_var.set(f"Error: File write failed - {e}")
-            self._update_log(f"ERROR: File write error - {e}", is_error=True)
+            self.events.put(('error', "File Error", f"Could not write to CSV file: {e}", f"Error: File write failed - {e}"))
+            self._queue_log(f"ERROR: File write error - {e}", is_error=True)
+        except Exception as e:
+            self.events.put(('error', "Scraping Error", f"An unexpected error occurred during scraping: {e}",
+                             f"Error: An unexpected error occurred - {e}"))
+            self._queue_log(f"ERROR: Unexpected scraping error - {e}", is_error=True)
+        finally:
+            try:
+                sink.close()
+            except IOError:
+                pass
+            self.events.put(('done',))
 
 
 if __name__ == "__main__":
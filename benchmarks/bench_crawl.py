@@ -0,0 +1,282 @@
+"""End-to-end crawl and output writer benchmarks against the local mock shop server.
+
+Run from the repository root:
+
+    python benchmarks/bench_crawl.py [--kinds books quotes shop] [--lists 4] [--pages 10]
+                                     [--latency 0.02] [--rate 200] [--memory] [--json]
+                                     [--save results.json] [--compare baseline.json]
+
+The crawl benchmark starts benchmarks/mock_server.py in-process, crawls paginated
+listings of each page kind through ScraperEngine (fetch, parse, extract) into a
+sink, and reports pages/s, rows/s, per-stage latency from the run report and peak
+memory. The writer benchmark streams the same rows through every output format.
+With --compare, throughput more than --tolerance below the saved baseline fails
+the run, so regressions show up before they ship.
+"""
+import argparse
+import itertools
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from mock_server import MockShop
+from synthetic import PAGE_KINDS
+from scraper_engine import ScraperEngine
+from scraper_normalize import Normalizer
+from scraper_parsers import DEFAULT_PARSER, PARSER_BACKENDS
+from scraper_sinks import SINK_FORMATS, open_sink
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+STAGES = ('robots', 'politeness_wait', 'download', 'parse', 'extract', 'write')
+
+THROUGHPUT_KEYS = ('pages_per_sec', 'rows_per_sec')
+
+FORMAT_EXTENSIONS = {'csv': '.csv', 'jsonl': '.jsonl', 'parquet': '.parquet', 'sqlite': '.db'}
+
+
+def peak_rss_mb():
+    """Returns the process's peak resident set size in MB, or None where unavailable."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class MemoryPeak:
+    """Context manager measuring the peak Python heap (tracemalloc) of a block when enabled."""
+
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.peak_mb = None
+
+    def __enter__(self):
+        if self.enabled:
+            tracemalloc.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.enabled:
+            self.peak_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            tracemalloc.stop()
+
+
+def _stage_latencies(report):
+    """Returns {stage: {avg_ms, max_ms, count}} for the pipeline stages in a run report."""
+    stages = {}
+    for stage in STAGES:
+        entry = report['stages'].get(stage)
+        if entry:
+            stages[stage] = {'avg_ms': entry['avg'] * 1000, 'max_ms': entry['max'] * 1000, 'count': entry['count']}
+    return stages
+
+
+def bench_crawl(kind, args, workdir):
+    """Crawls ``args.lists`` paginated listings of one page kind; returns the result dict and the rows."""
+    shop = MockShop(latency=args.latency, jitter=args.jitter, rate=args.rate, items=args.items,
+                    pages=args.pages, padding=args.padding).start()
+    rows_seen = []
+    try:
+        engine = ScraperEngine(max_workers=args.workers, per_host_limit=args.per_host, max_pages=args.pages,
+                               parser=args.parser, parse_processes=args.processes)
+        output = os.path.join(workdir, f"crawl_{kind}.csv")
+        sink = open_sink(output, 'csv', batch_size=500)
+        metrics = engine.metrics
+        pages = failed = 0
+        with MemoryPeak(args.memory) as memory:
+            start = time.perf_counter()
+            for url, rows, error in engine.scrape(shop.start_urls(kind, args.lists)):
+                pages += 1
+                failed += error is not None
+                with metrics.stage('write'):
+                    sink.write(rows)
+                if len(rows_seen) < args.writer_rows:
+                    rows_seen.extend(rows)
+            with metrics.stage('write'):
+                sink.close()
+            elapsed = time.perf_counter() - start
+        report = engine.run_report()
+        engine.close()
+    finally:
+        shop.stop()
+    return {
+        'benchmark': 'crawl',
+        'name': kind,
+        'pages': pages,
+        'failed_pages': failed,
+        'rows': sink.rows_written,
+        'seconds': elapsed,
+        'pages_per_sec': pages / elapsed if elapsed else 0.0,
+        'rows_per_sec': sink.rows_written / elapsed if elapsed else 0.0,
+        'stages': _stage_latencies(report),
+        'server': dict(shop.counts),
+        'peak_heap_mb': memory.peak_mb,
+    }, rows_seen
+
+
+def writer_formats():
+    """Returns the output formats that can be benchmarked here."""
+    return [name for name in SINK_FORMATS if name != 'parquet' or pyarrow is not None]
+
+
+def bench_writers(rows, count, args, workdir):
+    """Streams ``count`` rows (cycling through ``rows``) through every output format.
+
+    Each copy gets its own URL, so keyed sinks (SQLite) insert every row rather than
+    upserting the same few.
+    """
+    results = []
+    batch = max(1, args.batch_size)
+    stream = [dict(row, URL=f"{row.get('URL') or 'row'}?copy={index}")
+              for index, row in enumerate(itertools.islice(itertools.cycle(rows), count))]
+    for format in writer_formats():
+        for normalize in (False, True):
+            name = format + ('+normalize' if normalize else '')
+            path = os.path.join(workdir, f"writer_{format}{FORMAT_EXTENSIONS[format]}")
+            if os.path.exists(path):
+                os.remove(path)
+            with MemoryPeak(args.memory) as memory:
+                start = time.perf_counter()
+                sink = open_sink(path, format, batch_size=batch, normalizer=Normalizer() if normalize else None)
+                written = 0
+                while written < count:
+                    chunk = stream[written:written + len(rows)]
+                    sink.write(chunk)
+                    written += len(chunk)
+                sink.close()
+                elapsed = time.perf_counter() - start
+            results.append({
+                'benchmark': 'writer',
+                'name': name,
+                'rows': sink.rows_written,
+                'bytes': os.path.getsize(path),
+                'seconds': elapsed,
+                'rows_per_sec': sink.rows_written / elapsed if elapsed else 0.0,
+                'peak_heap_mb': memory.peak_mb,
+            })
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Returns messages for every throughput figure more than ``tolerance`` below the baseline."""
+    previous = {(entry['benchmark'], entry['name']): entry for entry in baseline.get('results', [])}
+    regressions = []
+    for entry in results:
+        old = previous.get((entry['benchmark'], entry['name']))
+        if old is None:
+            continue
+        for key in THROUGHPUT_KEYS:
+            if key in entry and old.get(key) and entry[key] < old[key] * (1 - tolerance):
+                regressions.append(f"{entry['benchmark']} {entry['name']}: {key} {entry[key]:.1f} "
+                                   f"< baseline {old[key]:.1f} (-{(1 - entry[key] / old[key]) * 100:.0f}%)")
+    return regressions
+
+
+def _print_table(results, rss):
+    print(f"{'crawl':<10} {'pages':>6} {'rows':>7} {'pages/s':>9} {'rows/s':>10} "
+          + ' '.join(f"{stage[:10] + ' ms':>13}" for stage in STAGES) + f" {'heap MB':>8}")
+    for r in results:
+        if r['benchmark'] != 'crawl':
+            continue
+        stages = ' '.join(f"{r['stages'][stage]['avg_ms']:>13.2f}" if stage in r['stages'] else f"{'-':>13}"
+                          for stage in STAGES)
+        heap = f"{r['peak_heap_mb']:.1f}" if r['peak_heap_mb'] is not None else '-'
+        print(f"{r['name']:<10} {r['pages']:>6} {r['rows']:>7} {r['pages_per_sec']:>9.1f} "
+              f"{r['rows_per_sec']:>10.0f} {stages} {heap:>8}")
+    print()
+    print(f"{'writer':<18} {'rows':>8} {'MB':>8} {'rows/s':>10} {'heap MB':>8}")
+    for r in results:
+        if r['benchmark'] != 'writer':
+            continue
+        heap = f"{r['peak_heap_mb']:.1f}" if r['peak_heap_mb'] is not None else '-'
+        print(f"{r['name']:<18} {r['rows']:>8} {r['bytes'] / (1024 * 1024):>8.2f} {r['rows_per_sec']:>10.0f} "
+              f"{heap:>8}")
+    if rss is not None:
+        print(f"\nPeak RSS: {rss:.1f} MB")
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark end-to-end crawls and output writers on a mock shop.")
+    parser.add_argument('--kinds', nargs='*', default=list(PAGE_KINDS), choices=PAGE_KINDS,
+                        help="page kinds to crawl")
+    parser.add_argument('--lists', type=int, default=4, help="paginated listings crawled per page kind")
+    parser.add_argument('--pages', type=int, default=10, help="pages per listing")
+    parser.add_argument('--items', type=int, default=None, help="items per page (default: per page kind)")
+    parser.add_argument('--padding', type=int, default=0, help="bytes of extra markup per page")
+    parser.add_argument('--latency', type=float, default=0.02, help="server latency per page in seconds")
+    parser.add_argument('--jitter', type=float, default=0.01, help="extra random server latency in seconds")
+    parser.add_argument('--rate', type=float, default=None, help="server throttle in requests per second (429 above)")
+    parser.add_argument('--workers', type=int, default=8, help="fetch threads")
+    parser.add_argument('--per-host', type=int, default=8, help="concurrent requests to the mock server")
+    parser.add_argument('--processes', type=int, default=0, help="parse and extract on worker processes")
+    parser.add_argument('--parser', default=DEFAULT_PARSER, choices=list(PARSER_BACKENDS), help="HTML parser backend")
+    parser.add_argument('--writer-rows', type=int, default=50000, help="rows written per output format")
+    parser.add_argument('--batch-size', type=int, default=1000, help="sink batch size in the writer benchmark")
+    parser.add_argument('--skip-writers', action='store_true', help="only run the crawl benchmark")
+    parser.add_argument('--memory', action='store_true',
+                        help="measure the peak Python heap per benchmark with tracemalloc (slows them down)")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    parser.add_argument('--save', metavar='PATH', help="write the results as a JSON baseline")
+    parser.add_argument('--compare', metavar='PATH', help="fail if throughput regressed against this baseline")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed throughput drop against --compare")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='scraper-bench-')
+    results = []
+    rows = []
+    try:
+        for kind in args.kinds:
+            result, kind_rows = bench_crawl(kind, args, workdir)
+            results.append(result)
+            rows.extend(kind_rows)
+        if not args.skip_writers and rows:
+            results.extend(bench_writers(rows, args.writer_rows, args, workdir))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    summary = {'started_at': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': sys.version.split()[0],
+               'peak_rss_mb': peak_rss_mb(), 'options': vars(args), 'results': results}
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as file:
+            json.dump(summary, file, indent=2)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        _print_table(results, summary['peak_rss_mb'])
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            baseline = json.load(file)
+        ignored = ('json', 'save', 'compare', 'tolerance')
+        changed = sorted(name for name, value in vars(args).items()
+                         if name not in ignored and baseline.get('options', {}).get(name, value) != value)
+        if changed:
+            print(f"Note: options differ from the baseline: {', '.join(changed)}", file=sys.stderr)
+        regressions = compare(results, baseline, args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION: {message}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0 if all(r.get('failed_pages', 0) == 0 for r in results) else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
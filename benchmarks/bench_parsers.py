@@ -0,0 +1,114 @@
+"""Compares parse and extract throughput of each parser backend on saved fixture pages.
+
+Run from the repository root:
+
+    python benchmarks/bench_parsers.py [--repeat 20] [--json] [--scoped] [--synthetic]
+
+Every backend's rows are checked against html.parser; mismatches are reported
+so the fastest *correct* backend can be picked per site. --synthetic adds generated
+pages of 10 to 1000 items, with and without 200 KB of extra markup (see synthetic.py).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from scraper_engine import ScraperEngine
+from scraper_parsers import DEFAULT_PARSER, available_parsers
+from synthetic import synthetic_fixtures
+
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+FIXTURE_URLS = {
+    'books_listing.html': 'http://books.toscrape.com/index.html',
+    'quotes_listing.html': 'http://quotes.toscrape.com/',
+    'marketplace_grid.html': 'https://shop.example/search?page=2',
+    'search_results.html': 'https://marketplace.example/s?k=x',
+}
+
+
+def load_fixtures(names=None):
+    """Returns [(name, url, html)] for the fixture pages."""
+    fixtures = []
+    for name in sorted(os.listdir(FIXTURE_DIR)):
+        if not name.endswith('.html') or (names and name not in names):
+            continue
+        with open(os.path.join(FIXTURE_DIR, name), encoding='utf-8') as file:
+            fixtures.append((name, FIXTURE_URLS.get(name, f'https://fixture.example/{name}'), file.read()))
+    return fixtures
+
+
+def _best_of(func, repeat):
+    """Returns the fastest of ``repeat`` timed calls and the last result."""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench(parsers, fixtures, repeat, scoped=False):
+    """Times parse and extract per backend and fixture; returns a list of result dicts.
+
+    With ``scoped``, pages with a site profile are parsed scoped to their containers.
+    """
+    results = []
+    for name, url, html in fixtures:
+        expected = ScraperEngine(parser=DEFAULT_PARSER).extract_from_html(url, html)
+        for parser in parsers:
+            engine = ScraperEngine(parser=parser, scoped_parse=scoped)
+            parse_time, soup = _best_of(lambda: engine.parse_html(html, url), repeat)
+            rows = engine.extract_from_soup(url, soup)
+            extract_time, _ = _best_of(lambda: engine.extract_from_soup(url, soup), repeat)
+            total_time = parse_time + extract_time
+            results.append({
+                'fixture': name,
+                'parser': parser,
+                'bytes': len(html.encode('utf-8')),
+                'rows': len(rows),
+                'parse_ms': parse_time * 1000,
+                'extract_ms': extract_time * 1000,
+                'pages_per_sec': 1.0 / total_time if total_time else float('inf'),
+                'matches_baseline': rows == expected,
+            })
+    return results
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark HTML parser backends on fixture pages.")
+    parser.add_argument('--parsers', nargs='*', default=None, help="backends to compare (default: all installed)")
+    parser.add_argument('--fixtures', nargs='*', default=None, help="fixture file names (default: all)")
+    parser.add_argument('--repeat', type=int, default=10, help="timed runs per measurement (best is kept)")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    parser.add_argument('--scoped', action='store_true', help="parse profiled pages scoped to their containers")
+    parser.add_argument('--synthetic', action='store_true', help="also benchmark generated pages of varying size")
+    args = parser.parse_args(argv)
+
+    parsers = args.parsers or available_parsers()
+    fixtures = load_fixtures(args.fixtures)
+    if args.synthetic:
+        fixtures.extend((name, f'https://fixture.example/{name}.html', html) for name, html in synthetic_fixtures())
+    results = bench(parsers, fixtures, max(1, args.repeat), args.scoped)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    width = max([24] + [len(r['fixture']) for r in results])
+    print(f"{'fixture':<{width}} {'parser':<12} {'rows':>5} {'parse ms':>9} {'extract ms':>11} {'pages/s':>8}  same")
+    for r in results:
+        print(f"{r['fixture']:<{width}} {r['parser']:<12} {r['rows']:>5} {r['parse_ms']:>9.2f} "
+              f"{r['extract_ms']:>11.2f} {r['pages_per_sec']:>8.1f}  {'yes' if r['matches_baseline'] else 'NO'}")
+    return 0 if all(r['matches_baseline'] for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""Local mock shop server for end-to-end benchmarks: synthetic pages with latency and throttling.
+
+Routes:
+
+    /robots.txt                    allows everything (optional Crawl-delay)
+    /books/[LIST/]page-N.html      books.toscrape.com-like catalogue pages
+    /quotes/[LIST/]page/N/         quotes.toscrape.com-like pages
+    /shop/[LIST/]page-N.html       generic product grid pages
+    /books/book-N-I/index.html     book detail pages linked from the catalogue pages
+    /shop/[LIST/]item-N-I.html     shop product detail pages linked from the grid pages
+    /fixtures/NAME                 captured pages from benchmarks/fixtures
+
+Each LIST name is a separate paginated listing with its own content.
+
+Every response waits ``latency`` seconds (plus up to ``jitter``). With ``rate``,
+requests beyond that many per second (after a burst of ``burst``) get 429 with a
+Retry-After header, and ``error_rate`` answers that fraction with 503. With
+``etags``, pages carry an ETag and a matching If-None-Match is answered with 304.
+
+Run standalone:
+
+    python benchmarks/mock_server.py --port 8800 --latency 0.05 --rate 50
+"""
+import argparse
+import hashlib
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import DETAIL_BUILDERS, PAGE_BUILDERS
+
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+ROUTES = (
+    (re.compile(r'^/(books)/(?:([\w-]+)/)?page-(\d+)\.html$'), 'books'),
+    (re.compile(r'^/(quotes)/(?:([\w-]+)/)?page/(\d+)/$'), 'quotes'),
+    (re.compile(r'^/(shop)/(?:([\w-]+)/)?page-(\d+)\.html$'), 'shop'),
+)
+
+DETAIL_ROUTES = (
+    (re.compile(r'^(?:/books)?/book-(\d+)-(\d+)/index\.html$'), 'books'),
+    (re.compile(r'^/shop/(?:[\w-]+/)?item-(\d+)-(\d+)\.html$'), 'shop'),
+)
+
+START_PATHS = {'books': '/books/{}page-1.html', 'quotes': '/quotes/{}page/1/', 'shop': '/shop/{}page-1.html'}
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` tokens per second, at most ``burst`` saved up."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self):
+        """Takes one token; returns 0 on success or the seconds until one is available."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+
+class MockShop:
+    """Serves synthetic shop pages on a background thread (see the module docstring)."""
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, jitter=0.0, rate=None, burst=None,
+                 error_rate=0.0, items=None, pages=None, padding=0, crawl_delay=None, seed=0, etags=False):
+        self.latency = latency
+        self.jitter = jitter
+        self.bucket = TokenBucket(rate, burst or rate) if rate else None
+        self.error_rate = error_rate
+        self.items = items
+        self.pages = pages
+        self.padding = padding
+        self.crawl_delay = crawl_delay
+        self.seed = seed
+        self.etags = etags
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counts = {'requests': 0, 'pages': 0, 'throttled': 0, 'errors': 0, 'not_found': 0,
+                       'not_modified': 0}
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start_urls(self, kind, count=1):
+        """Returns the first-page URLs of ``count`` distinct listings of a page kind."""
+        return [self.base_url + START_PATHS[kind].format(f"list-{index}/") for index in range(count)]
+
+    def start(self):
+        """Starts serving in a daemon thread; returns self."""
+        self._thread = threading.Thread(target=self.server.serve_forever, name='mock-shop', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops the server and closes its socket."""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _count(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+    def _chance(self, probability):
+        with self._lock:
+            return self._random.random() < probability
+
+    def respond(self, path):
+        """Returns (status, headers, body bytes) for a request path."""
+        self._count('requests')
+        if path == '/robots.txt':
+            rules = "User-agent: *\nDisallow:\n"
+            if self.crawl_delay:
+                rules += f"Crawl-delay: {self.crawl_delay}\n"
+            return 200, {'Content-Type': 'text/plain'}, rules.encode('utf-8')
+        if self.bucket is not None:
+            wait = self.bucket.take()
+            if wait:
+                self._count('throttled')
+                return 429, {'Retry-After': str(max(1, round(wait)))}, b''
+        if self.error_rate and self._chance(self.error_rate):
+            self._count('errors')
+            return 503, {}, b''
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            time.sleep(delay)
+        body = self._page(path)
+        if body is None:
+            self._count('not_found')
+            return 404, {'Content-Type': 'text/plain'}, b'not found'
+        self._count('pages')
+        return 200, {'Content-Type': 'text/html; charset=utf-8'}, body.encode('utf-8')
+
+    def revalidate(self, status, headers, body, if_none_match):
+        """With ``etags``, tags a page response and turns it into 304 if the client's copy is current."""
+        if not self.etags or status != 200:
+            return status, headers, body
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        if if_none_match == etag:
+            self._count('not_modified')
+            return 304, {'ETag': etag}, b''
+        return status, dict(headers, ETag=etag), body
+
+    def _page(self, path):
+        path = path.partition('?')[0]
+        if path.startswith('/fixtures/'):
+            name = os.path.basename(path)
+            fixture = os.path.join(FIXTURE_DIR, name)
+            if not name.endswith('.html') or not os.path.isfile(fixture):
+                return None
+            with open(fixture, encoding='utf-8') as file:
+                return file.read()
+        for pattern, kind in ROUTES:
+            match = pattern.match(path)
+            if match:
+                root, listing, page = match.groups()
+                prefix = f"/{root}/{listing}" if listing else f"/{root}"
+                options = {'page': int(page), 'padding': self.padding, 'seed': f"{self.seed}-{listing}",
+                           'prefix': prefix}
+                if self.items:
+                    options['items'] = self.items
+                if self.pages:
+                    options['pages'] = self.pages
+                    if options['page'] > self.pages:
+                        return None
+                return PAGE_BUILDERS[kind](**options)
+        for pattern, kind in DETAIL_ROUTES:
+            match = pattern.match(path)
+            if match:
+                page, index = match.groups()
+                return DETAIL_BUILDERS[kind](page=int(page), index=int(index), seed=self.seed)
+        return None
+
+    def _handler_class(self):
+        shop = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body go out in separate writes; with Nagle's algorithm on, every
+            # response on a kept-alive connection would wait ~40 ms for the delayed ACK.
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                status, headers, body = shop.revalidate(*shop.respond(self.path), self.headers.get('If-None-Match'))
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main(argv=None):
+    """Command-line entry point: serves until interrupted."""
+    parser = argparse.ArgumentParser(description="Serve synthetic shop pages with simulated latency and throttling.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8800)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every page response")
+    parser.add_argument('--jitter', type=float, default=0.0, help="up to this many extra random seconds")
+    parser.add_argument('--rate', type=float, default=None, help="requests per second before answering 429")
+    parser.add_argument('--burst', type=float, default=None, help="requests allowed at once (default: rate)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument('--items', type=int, default=None, help="items per page (default: per page kind)")
+    parser.add_argument('--pages', type=int, default=None, help="pages per listing (default: per page kind)")
+    parser.add_argument('--padding', type=int, default=0, help="bytes of extra markup per page")
+    parser.add_argument('--crawl-delay', type=float, default=None, help="Crawl-delay announced in robots.txt")
+    parser.add_argument('--etags', action='store_true', help="send ETags and answer If-None-Match with 304")
+    args = parser.parse_args(argv)
+
+    shop = MockShop(args.host, args.port, args.latency, args.jitter, args.rate, args.burst, args.error_rate,
+                    args.items, args.pages, args.padding, args.crawl_delay, etags=args.etags)
+    print(f"Serving on {shop.base_url} (start pages: {', '.join(path.format('') for path in START_PATHS.values())})",
+          file=sys.stderr)
+    try:
+        shop.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shop.server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
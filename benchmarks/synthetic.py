@@ -0,0 +1,139 @@
+"""Deterministic synthetic listing pages for the benchmarks.
+
+Pages are shaped like books.toscrape.com, quotes.toscrape.com and a generic shop
+grid, and every book and shop item has a product detail page. ``items`` sets the number of products or quotes and ``padding`` adds that
+many bytes of unrelated markup, so page size and item count vary independently.
+The same arguments always produce the same page.
+"""
+import random
+
+WORDS = ('Velvet', 'Attic', 'Requiem', 'Light', 'Black', 'Soumission', 'Tipping', 'Dirty', 'Maria',
+         'Boys', 'Red', 'Sharp', 'Objects', 'Sapiens', 'Olio', 'Mesaerion', 'Rip', 'Tide', 'Secret')
+
+RATINGS = ('One', 'Two', 'Three', 'Four', 'Five')
+
+PAGE_KINDS = ('books', 'quotes', 'shop')
+
+
+def _title(rng, words=4):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def _padding(size):
+    """Returns about ``size`` bytes of navigation-like markup with no items in it."""
+    links = []
+    total = 0
+    index = 0
+    while total < size:
+        link = f'<li><a href="/category/{index}/index.html">Category {index}</a></li>'
+        links.append(link)
+        total += len(link)
+        index += 1
+    return f'<aside class="sidebar"><ul class="nav">{"".join(links)}</ul></aside>' if links else ''
+
+
+def books_page(page=1, items=20, pages=50, padding=0, seed=0, prefix=None):
+    """Returns a books.toscrape.com-like catalogue page with a "next" link until ``pages``.
+
+    Its links are relative, like the real site's, so ``prefix`` is not needed.
+    """
+    rng = random.Random(f'books-{seed}-{page}')
+    products = []
+    for index in range(items):
+        title = _title(rng)
+        products.append(
+            f'<li class="col-xs-6 col-sm-4 col-md-3 col-lg-3"><article class="product_pod">'
+            f'<div class="image_container"><a href="../book-{page}-{index}/index.html">'
+            f'<img src="media/thumb.jpg" alt="{title}" class="thumbnail"></a></div>'
+            f'<p class="star-rating {rng.choice(RATINGS)}"><i class="icon-star"></i></p>'
+            f'<h3><a href="../book-{page}-{index}/index.html" title="{title}">{title[:20]}...</a></h3>'
+            f'<div class="product_price"><p class="price_color">&pound;{rng.uniform(5, 60):.2f}</p>'
+            f'<p class="instock availability">In stock</p></div></article></li>')
+    pager = f'<li class="current">Page {page} of {pages}</li>'
+    if page < pages:
+        pager += f'<li class="next"><a href="page-{page + 1}.html">next</a></li>'
+    return (f'<!DOCTYPE html><html lang="en-us"><head><meta charset="utf-8"><title>Books page {page}</title></head>'
+            f'<body id="default"><div class="container-fluid page">{_padding(padding)}<section>'
+            f'<ol class="row">{"".join(products)}</ol><ul class="pager">{pager}</ul></section></div></body></html>')
+
+
+def quotes_page(page=1, items=10, pages=10, padding=0, seed=0, prefix=''):
+    """Returns a quotes.toscrape.com-like page with a "next" link (under ``prefix``) until ``pages``."""
+    rng = random.Random(f'quotes-{seed}-{page}')
+    quotes = []
+    for index in range(items):
+        author = f'Author {rng.randrange(50)}'
+        quotes.append(
+            f'<div class="quote" itemscope itemtype="http://schema.org/CreativeWork">'
+            f'<span class="text" itemprop="text">&ldquo;{_title(rng, 12)}.&rdquo;</span>'
+            f'<span>by <small class="author" itemprop="author">{author}</small>'
+            f'<a href="/author/{author.replace(" ", "-")}">(about)</a></span>'
+            f'<div class="tags">Tags: <a class="tag" href="/tag/t{index}/page/1/">t{index}</a></div></div>')
+    pager = f'<li class="next"><a href="{prefix}/page/{page + 1}/">Next</a></li>' if page < pages else ''
+    return (f'<!DOCTYPE html><html lang="en"><head><meta charset="UTF-8"><title>Quotes to Scrape</title></head>'
+            f'<body><div class="container">{_padding(padding)}<div class="col-md-8">{"".join(quotes)}'
+            f'<nav><ul class="pager">{pager}</ul></nav></div></div></body></html>')
+
+
+def shop_page(page=1, items=40, pages=20, padding=0, seed=0, prefix='/shop'):
+    """Returns a generic shop grid page (product-card containers, mixed price formats).
+
+    Each card links to its product page under ``prefix``; the "next" link points to
+    ``prefix``/page-N.html.
+    """
+    rng = random.Random(f'shop-{seed}-{page}')
+    cards = []
+    for index in range(items):
+        price = rng.uniform(1, 2500)
+        price_text = f'${price:,.2f}' if index % 3 else f'{price:,.2f} €'.replace(',', ' ').replace('.', ',')
+        cards.append(
+            f'<div class="product-card" data-sku="S{page}-{index}"><h2 class="product-title">'
+            f'<a href="{prefix}/item-{page}-{index}.html">{_title(rng, 3)}</a></h2>'
+            f'<span class="product-price">{price_text}</span>'
+            f'<div class="rating"><span class="rating-value">{rng.uniform(1, 5):.1f}</span></div></div>')
+    next_link = f'<a rel="next" href="{prefix}/page-{page + 1}.html">Next</a>' if page < pages else ''
+    return (f'<!DOCTYPE html><html><head><title>Shop page {page}</title></head><body>{_padding(padding)}'
+            f'<main class="grid">{"".join(cards)}</main><nav class="pagination">{next_link}</nav></body></html>')
+
+
+def book_detail_page(page=1, index=0, seed=0):
+    """Returns a books.toscrape.com-like product page (UPC table, availability, description)."""
+    rng = random.Random(f'book-{seed}-{page}-{index}')
+    title = _title(rng)
+    return (f'<!DOCTYPE html><html lang="en-us"><head><meta charset="utf-8"><title>{title}</title></head>'
+            f'<body id="default"><article class="product_page"><div class="product_main"><h1>{title}</h1>'
+            f'<p class="price_color">&pound;{rng.uniform(5, 60):.2f}</p>'
+            f'<p class="instock availability">In stock ({rng.randrange(1, 30)} available)</p></div>'
+            f'<div id="product_description" class="sub-header"><h2>Product Description</h2></div>'
+            f'<p>{_title(rng, 30)}.</p><table class="table table-striped">'
+            f'<tr><th>UPC</th><td>{page:04d}{index:04d}{rng.randrange(16 ** 8):08x}</td></tr>'
+            f'<tr><th>Product Type</th><td>Books</td></tr></table></article></body></html>')
+
+
+def shop_detail_page(page=1, index=0, seed=0):
+    """Returns a generic shop product page with schema.org sku, availability and description."""
+    rng = random.Random(f'shop-item-{seed}-{page}-{index}')
+    title = _title(rng, 3)
+    stock = 'In stock' if rng.random() < 0.8 else 'Out of stock'
+    return (f'<!DOCTYPE html><html><head><title>{title}</title>'
+            f'<meta name="description" content="{title} from the mock shop"></head><body>'
+            f'<main itemscope itemtype="http://schema.org/Product"><h1 itemprop="name">{title}</h1>'
+            f'<span itemprop="sku">S{page}-{index}</span><link itemprop="availability" '
+            f'href="http://schema.org/InStock"><p class="stock">{stock}</p>'
+            f'<div itemprop="description">{_title(rng, 25)}.</div></main></body></html>')
+
+
+PAGE_BUILDERS = {'books': books_page, 'quotes': quotes_page, 'shop': shop_page}
+
+DETAIL_BUILDERS = {'books': book_detail_page, 'shop': shop_detail_page}
+
+
+def synthetic_fixtures(items=(10, 100, 1000), padding=(0, 200000)):
+    """Returns [(name, html)] for every page kind at each item count and padding size."""
+    fixtures = []
+    for kind, builder in PAGE_BUILDERS.items():
+        for count in items:
+            for size in padding:
+                name = f'synthetic_{kind}_{count}items' + (f'_{size // 1000}kb_padding' if size else '')
+                fixtures.append((name, builder(items=count, padding=size)))
+    return fixtures
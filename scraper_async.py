@@ -0,0 +1,304 @@
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from requests.utils import get_encoding_from_headers
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from scraper_cache import CacheMissError
+from scraper_engine import CANCEL_POLL_INTERVAL, PageTracker
+from scraper_http import DEFAULT_HEADERS, RETRY_STATUSES, HostStats, host_of, parse_retry_after
+
+
+class _HostGate:
+    __slots__ = ('in_flight', 'last_time', 'condition')
+
+    def __init__(self):
+        self.in_flight = 0
+        self.last_time = None
+        self.condition = asyncio.Condition()
+
+
+class AsyncScraper:
+    """asyncio fetch backend: many requests in flight on one thread, parsing on a worker pool.
+
+    Rows come from ScraperEngine.extract_from_html, so output matches the synchronous path;
+    with the engine's ``enrich_details`` each row's detail page is fetched too (one request
+    per detail URL in flight, then served from the engine's detail_cache) and its fields
+    are merged in before the page is yielded. Each request attempt waits for its host's slot under the engine's host_policy, so
+    --rate, profile limits, robots.txt Crawl-delay and adaptive backoff apply as in the
+    synchronous crawl. Requires aiohttp.
+    """
+
+    def __init__(self, engine, concurrency=200, per_host_limit=None, timeout=20, max_retries=3,
+                 backoff_factor=0.5, max_backoff=60.0, parse_workers=4):
+        if aiohttp is None:
+            raise RuntimeError("The asyncio backend requires aiohttp (pip install aiohttp).")
+        self.engine = engine
+        self.concurrency = max(1, int(concurrency))
+        self.per_host_limit = per_host_limit or self.concurrency
+        self.timeout = timeout
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.parse_workers = max(1, int(parse_workers))
+        http = getattr(engine, 'http', None)
+        self.stats = http.stats if http is not None else HostStats()
+
+    def _backoff(self, attempt, retry_after=None):
+        """Returns how long to sleep before the next attempt."""
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        delay = self.backoff_factor * (2 ** attempt)
+        return min(delay + random.uniform(0, delay / 2), self.max_backoff)
+
+    def _host_policy(self, url):
+        if hasattr(self.engine, 'host_policy'):
+            return self.engine.host_policy(url, self.per_host_limit)
+        return self.per_host_limit, 0.0
+
+    async def _acquire(self, url, gates):
+        """Waits until the URL's host has a free slot and its interval since the last request has passed."""
+        host = host_of(url)
+        gate = gates.get(host)
+        if gate is None:
+            gate = gates[host] = _HostGate()
+        start = time.perf_counter()
+        async with gate.condition:
+            while True:
+                concurrency, interval = self._host_policy(url)
+                now = time.monotonic()
+                due = 0.0 if gate.last_time is None else gate.last_time + interval - now
+                if gate.in_flight < concurrency and due <= 0:
+                    break
+                try:
+                    # Woken by _release for a free slot; the timeout covers the interval.
+                    await asyncio.wait_for(gate.condition.wait(), due if gate.in_flight < concurrency else None)
+                except asyncio.TimeoutError:
+                    pass
+            gate.in_flight += 1
+            gate.last_time = now
+        metrics = getattr(self.engine, 'metrics', None)
+        if metrics is not None:
+            metrics.add('politeness_wait', time.perf_counter() - start, host)
+        return gate
+
+    async def _release(self, gate):
+        async with gate.condition:
+            gate.in_flight -= 1
+            gate.condition.notify_all()
+
+    def _record_attempt(self, url, elapsed, status, retry_after=None):
+        """Feeds one attempt to the engine's adaptive backoff, as HttpClient.on_attempt does."""
+        if getattr(self.engine, 'backoff', None) is not None:
+            self.engine.record_attempt(url, elapsed, status, retry_after)
+
+    async def _fetch(self, session, url, gates):
+        """GETs the URL with retry/backoff and returns the body text. Raises on failure.
+
+        Uses the engine's response cache the same way ScraperEngine.fetch does.
+        """
+        cache = getattr(self.engine, 'cache', None)
+        cached = cache.get(url) if cache is not None else None
+        if getattr(self.engine, 'offline', False):
+            if cached is None:
+                raise CacheMissError(f"Not in cache (offline mode): {url}")
+            self.engine.log(f"Replaying cached content for: {url}")
+            return cached.text
+        request_headers = cached.conditional_headers() if cached is not None else None
+
+        attempt = 0
+        while True:
+            gate = await self._acquire(url, gates)
+            start = time.perf_counter()
+            try:
+                self.engine.log(f"Fetching content from: {url}")
+                async with session.get(url, headers=request_headers) as response:
+                    body = await response.read()
+                    status = response.status
+                    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                    validators = (response.headers.get('ETag'), response.headers.get('Last-Modified'))
+                    # 3xx here is a redirect aiohttp did not follow or a 304 without a cached copy;
+                    # like the synchronous path, its (usually empty) body is returned as the page.
+                    text = (body.decode(get_encoding_from_headers(response.headers) or response.get_encoding(),
+                                        errors='replace')
+                            if status < 400 else None)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                elapsed = time.perf_counter() - start
+                self.stats.record(url, elapsed, error=True, retried=attempt < self.max_retries)
+                self._record_attempt(url, elapsed, None)
+                if attempt >= self.max_retries:
+                    raise
+                status = None
+            finally:
+                # Backoff sleeps happen outside the host slot, so other URLs of the host can go.
+                await self._release(gate)
+            if status is None:
+                await asyncio.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+
+            elapsed = time.perf_counter() - start
+            retry = status in RETRY_STATUSES and attempt < self.max_retries
+            self.stats.record(url, elapsed, status=status, size=len(body), error=status >= 400, retried=retry)
+            self._record_attempt(url, elapsed, status, retry_after)
+            if retry:
+                await asyncio.sleep(self._backoff(attempt, retry_after))
+                attempt += 1
+                continue
+            if cached is not None and status == 304:
+                self.engine.log(f"Not modified, using cached content: {url}")
+                cache.mark_revalidated(url)
+                return cached.text
+            if status >= 400:
+                raise aiohttp.ClientResponseError(response.request_info, (), status=status,
+                                                  message=response.reason or '')
+            if cache is not None:
+                cache.put(url, text, *validators)
+            return text
+
+    def _extract_on_workers(self, url, html):
+        """Extracts a page on the engine's process pool; returns (rows, next_url).
+
+        Unchanged pages (with a change tracker) are answered here and never reach a worker.
+        """
+        engine = self.engine
+        state = None
+        if engine.change_tracker is not None:
+            state = engine.change_tracker.check_page(url, html)
+            if state.unchanged:
+                engine.log(f"Page unchanged since last run, skipping extraction: {url}")
+                return engine.change_tracker.record_page(state, None), state.next_url
+        with engine.metrics.stage('extract_process', host_of(url)):
+            rows, next_url = engine.extractor.extract(url, html)
+        engine.log(f"Extracted {len(rows)} entries from {url} in a worker process.")
+        if state is not None:
+            rows = engine.change_tracker.record_page(state, rows, next_url)
+        return rows, next_url
+
+    async def _detail_fields(self, session, pool, url, gates):
+        """Fetches and extracts one detail page; returns its fields, or None if it failed."""
+        loop = asyncio.get_running_loop()
+        try:
+            if getattr(self.engine, 'robots', None) is not None:
+                await loop.run_in_executor(pool, self.engine.check_robots, url)
+            html = await self._fetch(session, url, gates)
+            fields = await loop.run_in_executor(pool, self.engine.extract_details_from_html, url, html)
+        except Exception as e:
+            self.engine.log(f"ERROR: detail page {url} - {e}", is_error=True)
+            self.engine.metrics.count('detail_errors')
+            return None
+        self.engine.metrics.count('detail_pages')
+        self.engine.detail_cache.put(url, fields)
+        return fields
+
+    async def _add_details(self, session, pool, rows, detail_tasks, gates):
+        """Merges the rows' detail page fields in, fetching the pages not cached yet.
+
+        ``detail_tasks`` maps detail URLs to their fetch task, so a URL linked from many
+        rows is fetched once while it is in flight; failed URLs keep their task and are
+        not retried during the crawl.
+        """
+        tasks = {}
+        for detail_url in self.engine.merge_cached_details(rows):
+            task = detail_tasks.get(detail_url)
+            if task is None:
+                task = detail_tasks[detail_url] = asyncio.ensure_future(
+                    self._detail_fields(session, pool, detail_url, gates))
+            tasks[detail_url] = task
+        for detail_url, task in tasks.items():
+            fields = await task
+            if fields is None:
+                continue
+            if detail_tasks.get(detail_url) is task:
+                # Cached now; later rows find it there.
+                del detail_tasks[detail_url]
+            for row in rows:
+                if row.get('URL') == detail_url:
+                    row.update(fields)
+
+    async def scrape(self, urls):
+        """Async generator yielding (url, rows, error) as each URL is fetched and parsed."""
+        loop = asyncio.get_running_loop()
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host_limit)
+        gates = {}
+        url_iter = iter(urls)
+        visited = PageTracker()
+        max_pages = getattr(self.engine, 'max_pages', 1)
+        if hasattr(self.engine, 'reset_cancel'):
+            self.engine.reset_cancel()
+
+        metrics = getattr(self.engine, 'metrics', None)
+        enrich_details = getattr(self.engine, 'enrich_details', False)
+        detail_tasks = {}
+
+        async def run_one(session, pool, url, page_number=1):
+            if getattr(self.engine, 'robots', None) is not None:
+                await loop.run_in_executor(pool, self.engine.check_robots, url)
+            start = time.perf_counter()
+            html = await self._fetch(session, url, gates)
+            if metrics is not None:
+                metrics.add('download', time.perf_counter() - start, host_of(url))
+            if getattr(self.engine, 'extractor', None) is not None:
+                rows, next_url = await loop.run_in_executor(pool, self._extract_on_workers, url, html)
+            else:
+                soup, next_url, state = await loop.run_in_executor(pool, self.engine.begin_page, url, html)
+            if next_url and page_number < max_pages and visited.claim(next_url):
+                self.engine.log(f"Following pagination to page {page_number + 1}: {next_url}")
+                pending[asyncio.ensure_future(run_one(session, pool, next_url, page_number + 1))] = next_url
+            if getattr(self.engine, 'extractor', None) is None:
+                rows = await loop.run_in_executor(pool, self.engine.finish_page, url, soup, state, next_url)
+            if enrich_details:
+                await self._add_details(session, pool, rows, detail_tasks, gates)
+            return rows
+
+        with ThreadPoolExecutor(max_workers=self.parse_workers) as pool:
+            async with aiohttp.ClientSession(headers=DEFAULT_HEADERS, timeout=timeout, connector=connector) as session:
+                pending = {}
+
+                def submit_more():
+                    while len(pending) < self.concurrency:
+                        url = next(url_iter, None)
+                        if url is None:
+                            return
+                        if visited.claim(url):
+                            pending[asyncio.ensure_future(run_one(session, pool, url))] = url
+
+                submit_more()
+                try:
+                    while pending:
+                        done, _ = await asyncio.wait(pending, timeout=CANCEL_POLL_INTERVAL,
+                                                     return_when=asyncio.FIRST_COMPLETED)
+                        if getattr(self.engine, 'cancelled', False):
+                            self.engine.log("Scrape cancelled; dropping queued pages.", is_error=True)
+                            return
+                        for task in done:
+                            url = pending.pop(task)
+                            try:
+                                yield url, task.result(), None
+                            except Exception as e:
+                                self.engine.log(f"ERROR: {url} - {e}", is_error=True)
+                                yield url, [], e
+                        submit_more()
+                finally:
+                    for task in pending:
+                        task.cancel()
+
+    def run(self, urls, on_result=None):
+        """Runs the crawl to completion on a fresh event loop.
+
+        Calls ``on_result(url, rows, error)`` per page as results arrive, or, without a
+        callback, returns a list of (url, rows, error).
+        """
+        async def collect():
+            if on_result is None:
+                return [result async for result in self.scrape(urls)]
+            async for result in self.scrape(urls):
+                on_result(*result)
+        return asyncio.run(collect())
@@ -0,0 +1,123 @@
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import urldefrag
+
+
+DEFAULT_CACHE_BYTES = 512 * 1024 * 1024
+
+
+class CacheMissError(LookupError):
+    """Raised in offline mode when a URL has no cached body."""
+
+
+class CachedPage:
+    """A cached response body with its revalidation validators."""
+
+    __slots__ = ('url', 'text', 'etag', 'last_modified', 'stored_at')
+
+    def __init__(self, url, text, etag, last_modified, stored_at):
+        self.url = url
+        self.text = text
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at
+
+    def conditional_headers(self):
+        """Returns If-None-Match / If-Modified-Since headers for revalidating this page."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """Persistent, size-bounded LRU cache of decoded page bodies in a single SQLite file.
+
+    Bodies are stored zlib-compressed; once the compressed total exceeds ``max_bytes``
+    the least recently used entries are evicted. Safe to share between threads.
+    """
+
+    def __init__(self, path, max_bytes=DEFAULT_CACHE_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses (url TEXT PRIMARY KEY, body BLOB, size INTEGER, "
+                "etag TEXT, last_modified TEXT, stored_at REAL, accessed_at REAL)")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (accessed_at)")
+        self._total = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def _key(url):
+        return urldefrag(url)[0]
+
+    def get(self, url):
+        """Returns the CachedPage for the URL, or None, and marks it recently used."""
+        key = self._key(url)
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT body, etag, last_modified, stored_at FROM responses WHERE url = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            with self._connection:
+                self._connection.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (time.time(), key))
+        body, etag, last_modified, stored_at = row
+        return CachedPage(key, zlib.decompress(body).decode('utf-8'), etag, last_modified, stored_at)
+
+    def put(self, url, text, etag=None, last_modified=None):
+        """Stores a page body and evicts least recently used entries beyond ``max_bytes``."""
+        key = self._key(url)
+        body = zlib.compress(text.encode('utf-8'))
+        now = time.time()
+        with self._lock, self._connection:
+            old = self._connection.execute("SELECT size FROM responses WHERE url = ?", (key,)).fetchone()
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (url, body, size, etag, last_modified, stored_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", (key, body, len(body), etag, last_modified, now, now))
+            self._total += len(body) - (old[0] if old else 0)
+            self._evict()
+
+    def mark_revalidated(self, url):
+        """Records that the server answered 304 Not Modified for a cached page."""
+        now = time.time()
+        with self._lock, self._connection:
+            self.revalidated += 1
+            self._connection.execute("UPDATE responses SET stored_at = ?, accessed_at = ? WHERE url = ?",
+                                     (now, now, self._key(url)))
+
+    def _evict(self):
+        """Drops least recently used entries until the cache fits. Caller holds the lock."""
+        while self._total > self.max_bytes:
+            rows = self._connection.execute(
+                "SELECT url, size FROM responses ORDER BY accessed_at LIMIT 64").fetchall()
+            if not rows:
+                self._total = 0
+                return
+            for url, size in rows:
+                self._connection.execute("DELETE FROM responses WHERE url = ?", (url,))
+                self._total -= size
+                if self._total <= self.max_bytes:
+                    return
+
+    def stats(self):
+        """Returns hit/miss/revalidation counters and the stored size."""
+        with self._lock:
+            count = self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            return {'entries': count, 'bytes': self._total, 'hits': self.hits,
+                    'misses': self.misses, 'revalidated': self.revalidated}
+
+    def close(self):
+        """Closes the SQLite connection."""
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,126 @@
+import sqlite3
+import threading
+import time
+
+
+DEFAULT_CHECKPOINT_INTERVAL = 30.0
+
+
+class CrawlCheckpoint:
+    """Periodic on-disk checkpoint of a crawl's frontier, visited set and sink offset (SQLite).
+
+    Every URL taken from the input or found by pagination is recorded as queued and,
+    once its rows have been handed to the sink, as done. Every ``interval`` seconds
+    save() flushes the bound sink and stores, in one transaction, the new URLs, the
+    finished pages, how many input URLs were consumed and the sink's byte offset and
+    row count. A restarted crawl skips consumed input, re-queues unfinished pages and
+    truncates the output back to the saved offset, so pages finished after the last
+    checkpoint are fetched and written once more but nothing is duplicated. Failed
+    pages stay queued and are retried on resume. After finish() the next run with
+    the same file starts from scratch.
+    """
+
+    def __init__(self, path, interval=DEFAULT_CHECKPOINT_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.sink = None
+        self._lock = threading.Lock()
+        self._queued = []
+        self._done = []
+        self._consumed = 0
+        self._last_save = time.monotonic()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS frontier (url TEXT PRIMARY KEY, page_number INTEGER, done INTEGER)")
+            if self._meta('finished') == '1':
+                self._connection.execute("DELETE FROM frontier")
+                self._connection.execute("DELETE FROM meta")
+        self.input_offset = int(self._meta('input_offset') or 0)
+        self.resuming = self._meta('output') is not None
+
+    def _meta(self, name):
+        row = self._connection.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    @property
+    def output(self):
+        """(path, format) of the sink the checkpointed crawl was writing, or (None, None)."""
+        return self._meta('output'), self._meta('format')
+
+    @property
+    def sink_offset(self):
+        """Byte offset the output file is truncated back to on resume (None for non-file sinks)."""
+        value = self._meta('sink_offset')
+        return int(value) if value is not None else None
+
+    @property
+    def rows_written(self):
+        return int(self._meta('rows_written') or 0)
+
+    def visited(self):
+        """Returns every URL already queued or done."""
+        with self._lock:
+            return [url for url, in self._connection.execute("SELECT url FROM frontier")]
+
+    def frontier(self):
+        """Returns (url, page_number) of pages queued but not finished, in the order they were found."""
+        with self._lock:
+            return self._connection.execute(
+                "SELECT url, page_number FROM frontier WHERE done = 0 ORDER BY rowid").fetchall()
+
+    def bind(self, sink, output, format):
+        """Attaches the sink whose progress is checkpointed, writing to ``output`` in ``format``."""
+        self.sink = sink
+        with self._lock, self._connection:
+            self._set('output', output)
+            self._set('format', format)
+
+    def _set(self, name, value):
+        self._connection.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)",
+                                 (name, None if value is None else str(value)))
+
+    def consumed(self):
+        """Counts one URL taken from the crawl's input."""
+        with self._lock:
+            self._consumed += 1
+
+    def queued(self, url, page_number=1):
+        """Records a URL that was added to the crawl frontier."""
+        with self._lock:
+            self._queued.append((url, page_number))
+
+    def done(self, url):
+        """Records that a page's rows went to the sink; saves if the interval has passed."""
+        with self._lock:
+            self._done.append(url)
+        if time.monotonic() - self._last_save >= self.interval:
+            self.save()
+
+    def save(self):
+        """Flushes the sink and stores the progress since the last save in one transaction."""
+        if self.sink is not None:
+            self.sink.flush()
+        offset = self.sink.offset() if self.sink is not None else None
+        with self._lock, self._connection:
+            self._connection.executemany("INSERT OR IGNORE INTO frontier (url, page_number, done) VALUES (?, ?, 0)",
+                                         self._queued)
+            self._connection.executemany("UPDATE frontier SET done = 1 WHERE url = ?", [(url,) for url in self._done])
+            self.input_offset += self._consumed
+            self._set('input_offset', self.input_offset)
+            self._set('sink_offset', offset)
+            self._set('rows_written', self.sink.rows_written if self.sink is not None else 0)
+            self._queued, self._done, self._consumed = [], [], 0
+        self._last_save = time.monotonic()
+
+    def finish(self):
+        """Marks the crawl complete; the next run with this checkpoint file starts fresh."""
+        self.save()
+        with self._lock, self._connection:
+            self._set('finished', 1)
+
+    def close(self):
+        """Closes the SQLite connection."""
+        with self._lock:
+            self._connection.close()
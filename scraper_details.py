@@ -0,0 +1,117 @@
+import threading
+from collections import OrderedDict
+
+from scraper_selectors import _element_text, compile_selectors, select_one
+
+
+DETAIL_FIELDS = ('sku', 'stock', 'description')
+
+DETAIL_COLUMNS = {'sku': 'SKU', 'stock': 'Stock', 'description': 'Description'}
+
+# (selector, attribute read instead of the text) per field, tried in order.
+GENERIC_DETAIL_SELECTORS = {
+    'sku': (
+        ('[itemprop="sku"]', None),
+        ('table tr:has(> th:-soup-contains("UPC")) > td', None),
+        ('table tr:has(> th:-soup-contains("SKU")) > td', None),
+        ('.sku', None),
+        ('[data-sku]', 'data-sku'),
+    ),
+    'stock': (
+        ('[itemprop="availability"]', None),
+        ('.availability', None),
+        ('.stock', None),
+        ('.in-stock', None),
+        ('.out-of-stock', None),
+    ),
+    'description': (
+        ('[itemprop="description"]', None),
+        ('#product_description ~ p', None),
+        ('.product-description', None),
+        ('#description', None),
+        ('meta[name="description"]', 'content'),
+    ),
+}
+
+DESCRIPTION_LIMIT = 1000
+
+DETAIL_CACHE_SIZE = 10000
+
+
+class DetailPlan:
+    """Precompiled selectors for the SKU, stock and description of a product detail page.
+
+    ``site_selectors`` maps detail fields to CSS selectors tried before the generic
+    ones; with ``generic_fallback=False`` the generic ones are only used when no site
+    selectors are given. ``attributes`` maps fields to the attribute read instead of
+    the element text.
+    """
+
+    __slots__ = ('fields',)
+
+    def __init__(self, site_selectors=None, attributes=None, generic_fallback=True, log=None):
+        site = site_selectors or {}
+        attributes = attributes or {}
+        fields = {}
+        for field in DETAIL_FIELDS:
+            entries = [(text, compiled, attributes.get(field))
+                       for text, compiled in compile_selectors(site.get(field) or [], log)]
+            if generic_fallback or not site:
+                generic = dict(GENERIC_DETAIL_SELECTORS[field])
+                entries.extend((text, compiled, generic[text])
+                               for text, compiled in compile_selectors(list(generic), log))
+            fields[field] = tuple(entries)
+        self.fields = fields
+
+
+def extract_details(plan, soup):
+    """Returns {column: value} for the detail fields found on a detail page."""
+    details = {}
+    for field, entries in plan.fields.items():
+        for text, compiled, attribute in entries:
+            try:
+                element = select_one(soup, (text, compiled))
+            except Exception:
+                # Non-bs4 backends may not support every soupsieve pseudo-class.
+                continue
+            if element is None:
+                continue
+            value = ' '.join(_element_text(element, attribute).split())
+            if value:
+                details[DETAIL_COLUMNS[field]] = value[:DESCRIPTION_LIMIT] if field == 'description' else value
+                break
+    return details
+
+
+class DetailCache:
+    """Thread-safe LRU map of detail page URL to its extracted fields, bounded to ``max_entries``."""
+
+    def __init__(self, max_entries=DETAIL_CACHE_SIZE):
+        self.max_entries = max(1, int(max_entries))
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, url):
+        """Returns the cached fields for the URL, or None."""
+        with self._lock:
+            fields = self._entries.get(url)
+            if fields is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(url)
+            self.hits += 1
+            return fields
+
+    def put(self, url, fields):
+        """Stores a detail page's fields, evicting the least recently used beyond the bound."""
+        with self._lock:
+            self._entries[url] = fields
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
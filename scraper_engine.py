@@ -0,0 +1,771 @@
+import argparse
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urldefrag
+
+from scraper_cache import DEFAULT_CACHE_BYTES, CacheMissError, ResponseCache
+from scraper_checkpoint import DEFAULT_CHECKPOINT_INTERVAL, CrawlCheckpoint
+from scraper_details import DETAIL_CACHE_SIZE, DetailCache, DetailPlan, extract_details
+from scraper_extract import PageExtractor
+from scraper_http import HttpClient, host_of
+from scraper_metrics import RunMetrics, StackSampler, write_report
+from scraper_normalize import Normalizer
+from scraper_parsers import DEFAULT_PARSER, PARSER_BACKENDS
+from scraper_profiles import DEFAULT_PROFILE_DIR, ProfileRegistry
+from scraper_scheduler import CrawlScheduler, HostBackoff, RobotsCache, RobotsDisallowedError
+from scraper_selectors import CONTAINER_LIMIT
+from scraper_sinks import PREFERRED_HEADERS, SINK_FORMATS, CsvSink, guess_format, open_sink, order_headers
+from scraper_state import CHANGE_COLUMN, ChangeTracker
+from scraper_workers import ProcessExtractor
+
+CANCEL_POLL_INTERVAL = 0.25
+
+# URLs read ahead from the input into the per-host queues, so hosts can be interleaved.
+SCHEDULE_AHEAD = 1000
+
+# Scheduler page number (and priority) of detail pages: below every listing page, so they go first.
+DETAIL_PAGE = 0
+
+# Listing pages held back waiting for their detail pages, per fetch worker.
+HELD_PAGES_PER_WORKER = 4
+
+
+def _null_log(message, is_error=False):
+    """Default log callback that discards messages."""
+
+
+def _merge_details(rows, detail_url, fields):
+    """Adds a detail page's fields to every row linking to it."""
+    for row in rows:
+        if row.get('URL') == detail_url:
+            row.update(fields)
+
+
+class FetchedPage:
+    """A downloaded page waiting for parse and extraction on the process pool."""
+
+    __slots__ = ('html', 'state')
+
+    def __init__(self, html, state):
+        self.html = html
+        self.state = state
+
+
+class PageTracker:
+    """Thread-safe set of page URLs already scheduled, ignoring #fragments."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seen = set()
+
+    def claim(self, url):
+        """Marks the URL as visited; returns False if it already was."""
+        key = urldefrag(url)[0]
+        with self._lock:
+            if key in self._seen:
+                return False
+            self._seen.add(key)
+            return True
+
+
+class ScraperEngine:
+    """GUI-free scraping engine: fetches pages, extracts rows and writes CSV files."""
+
+    def __init__(self, log=None, timeout=20, max_workers=8, per_host_limit=2, per_host_rate=None,
+                 max_retries=3, pool_connections=10, pool_maxsize=None, http=None, max_pages=1,
+                 parser=DEFAULT_PARSER, cache=None, offline=False, change_tracker=None,
+                 parse_processes=0, parse_chunksize=4, profiles=None, scoped_parse=False,
+                 container_limit=CONTAINER_LIMIT, metrics=None, trace_selectors=False, raw_values=False,
+                 respect_robots=True, adaptive_backoff=True, checkpoint=None, enrich_details=False,
+                 detail_cache=None, product_links=False, skip_invalid_profiles=False):
+        self.log = log or _null_log
+        self.metrics = metrics or RunMetrics()
+        self.profile_paths = list(profiles) if profiles is not None else [DEFAULT_PROFILE_DIR]
+        self.profiles = ProfileRegistry.from_paths(self.profile_paths, self.log, skip_invalid_profiles)
+        self.enrich_details = enrich_details
+        self.detail_cache = detail_cache if detail_cache is not None else DetailCache()
+        # Product rows carry their detail page link as 'URL' only when something needs it:
+        # detail enrichment, change tracking identity, or an explicit request (SQLite keys).
+        self.product_links = bool(product_links or enrich_details or change_tracker is not None)
+        self.pages = PageExtractor(self.profiles, parser, scoped_parse, container_limit, raw_values,
+                                   self.product_links, trace_selectors, self.metrics, self.log)
+        self.extractor = (ProcessExtractor(parse_processes, parser, parse_chunksize, self.log,
+                                           profiles=self.profile_paths,
+                                           skip_invalid_profiles=skip_invalid_profiles, scoped_parse=scoped_parse,
+                                           container_limit=container_limit, raw_values=raw_values,
+                                           product_links=self.product_links)
+                          if parse_processes else None)
+        self.change_tracker = change_tracker
+        self.checkpoint = checkpoint
+        self.cache = cache
+        self.offline = offline
+        if offline and cache is None:
+            raise ValueError("Offline replay needs a response cache.")
+        if change_tracker is not None and enrich_details:
+            # Records are fingerprinted before detail fields are merged, and unchanged listing
+            # pages are never re-extracted, so detail-only changes could not be seen.
+            raise ValueError("Change tracking cannot be combined with detail page enrichment.")
+        self.max_pages = max(1, int(max_pages))
+        self.timeout = timeout
+        self.max_workers = max(1, int(max_workers))
+        self.per_host_limit = max(1, int(per_host_limit))
+        self.per_host_interval = 1.0 / per_host_rate if per_host_rate else 0.0
+        if http is None:
+            http = HttpClient(timeout=timeout, max_retries=max_retries, pool_connections=pool_connections,
+                              pool_maxsize=pool_maxsize or max(self.per_host_limit, 10))
+        self.http = http
+        self.robots = RobotsCache(http, log=self.log) if respect_robots and not offline else None
+        self.backoff = HostBackoff() if adaptive_backoff else None
+        if self.backoff is not None:
+            http.on_attempt = self.record_attempt
+        self.generic_detail_plan = DetailPlan(log=self.log)
+        self._cancelled = threading.Event()
+
+    def fetch(self, url):
+        """Downloads the page over the shared session and returns its HTML text.
+
+        With a cache, known pages are revalidated with If-None-Match/If-Modified-Since
+        and a 304 reuses the cached body; offline mode serves cached bodies only.
+        """
+        cached = self.cache.get(url) if self.cache is not None else None
+        if self.offline:
+            if cached is None:
+                raise CacheMissError(f"Not in cache (offline mode): {url}")
+            self.log(f"Replaying cached content for: {url}")
+            self.metrics.count('cache_replays')
+            return cached.text
+
+        self.check_robots(url)
+        self.log(f"Fetching content from: {url}")
+        with self.metrics.stage('download', host_of(url)):
+            response = self.http.get(url, headers=cached.conditional_headers() if cached else None)
+        if cached is not None and response.status_code == 304:
+            self.log(f"Not modified, using cached content: {url}")
+            self.metrics.count('not_modified')
+            self.cache.mark_revalidated(url)
+            return cached.text
+        response.raise_for_status()
+        if self.cache is not None:
+            self.cache.put(url, response.text, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        return response.text
+
+    def record_attempt(self, url, elapsed, status, retry_after=None):
+        """HttpClient.on_attempt hook: feeds every attempt, retries included, to the adaptive backoff."""
+        self.backoff.record(host_of(url), elapsed, error=status is None or status == 429 or status >= 500,
+                            retry_after=retry_after)
+
+    def check_robots(self, url):
+        """Raises RobotsDisallowedError if robots.txt forbids the URL (reading robots.txt on first use)."""
+        if self.robots is None:
+            return
+        if not self.robots.known(url):
+            with self.metrics.stage('robots', host_of(url)):
+                self.robots.rules(url)
+        if not self.robots.allowed(url):
+            self.metrics.count('robots_disallowed')
+            raise RobotsDisallowedError(f"Disallowed by robots.txt: {url}")
+
+    def host_policy(self, url, default_concurrency=None):
+        """Returns (max_concurrency, min_interval) for the scheduler to dispatch the URL's host.
+
+        Combines the per-host defaults and site profile limits with robots.txt Crawl-delay
+        (which also means one request at a time) and the adaptive backoff delay. Until the
+        host's robots.txt has been read, only one request to it is in flight.
+        ``default_concurrency`` replaces per_host_limit for hosts without a profile limit.
+        """
+        concurrency, rate = self.host_limits(url)
+        concurrency = concurrency or default_concurrency or self.per_host_limit
+        interval = 1.0 / rate if rate else self.per_host_interval
+        if self.robots is not None:
+            if not self.robots.known(url):
+                concurrency = 1
+            else:
+                delay = self.robots.crawl_delay(url)
+                if delay:
+                    concurrency = 1
+                    interval = max(interval, delay)
+        if self.backoff is not None:
+            interval += self.backoff.delay(host_of(url))
+        return concurrency, interval
+
+    def host_stats(self):
+        """Returns per-host request counts and timings collected so far."""
+        return self.http.stats.snapshot()
+
+    def cancel(self):
+        """Asks a running scrape to stop: queued pages are dropped and pagination is not followed."""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def reset_cancel(self):
+        """Clears a previous cancel(); called when a new scrape starts."""
+        self._cancelled.clear()
+
+    def close(self):
+        """Releases pooled connections, worker processes and the response cache."""
+        self.http.close()
+        if self.extractor is not None:
+            self.extractor.close()
+        if self.cache is not None:
+            self.cache.close()
+
+    def scrape(self, urls):
+        """Scrapes the URLs on a bounded thread pool and yields (url, rows, error) per page as each finishes.
+
+        Errors are returned instead of raised. URLs are read ahead (up to SCHEDULE_AHEAD) into
+        per-host priority queues of a CrawlScheduler, which hands them to the pool round-robin
+        across hosts within each host's concurrency, robots.txt Crawl-delay and adaptive backoff
+        (see host_policy), so arbitrarily long URL iterables are consumed lazily. With
+        ``max_pages`` > 1, pagination links are queued as soon as they are found, so the next
+        page can download while the current one is still being extracted. After cancel(), pages
+        already downloading are finished but not yielded, and the generator stops.
+
+        With a CrawlCheckpoint, a page counts as done once the consumer resumes the generator
+        after its rows; a checkpoint being resumed skips the consumed input and re-queues
+        its unfinished pages first.
+
+        With ``parse_processes``, the fetch threads only download: fetched pages are sent to
+        the process pool in chunks of ``parse_chunksize`` (sooner while a worker process is
+        idle), so parsing is not capped by the number of fetch threads. Fetching pauses while
+        two chunks per process are waiting.
+
+        With ``enrich_details``, each row's detail page (its 'URL') is fetched through the same
+        scheduler, ahead of further listing pages, and its fields are merged into the row. Rows
+        linking to a detail URL that is already being fetched wait for that one request, and
+        later rows are served from ``detail_cache``; that is an LRU bounded to its max_entries,
+        so a URL evicted from it is fetched again when linked later. A listing page is held back until all its detail pages are in;
+        once HELD_PAGES_PER_WORKER pages per worker are held, only detail pages are dispatched.
+        A detail page that fails is logged, counted as ``detail_errors``, not retried during the
+        crawl, and its rows are yielded without its fields; with a checkpoint their listing page
+        is not marked done, so an interrupted crawl fetches it (and writes its rows) again.
+        """
+        self.reset_cancel()
+        url_iter = iter(urls)
+        visited = PageTracker()
+        scheduler = CrawlScheduler(self.host_policy)
+        checkpoint = self.checkpoint
+        if checkpoint is not None and checkpoint.resuming:
+            url_iter = itertools.islice(url_iter, checkpoint.input_offset, None)
+            for url in checkpoint.visited():
+                visited.claim(url)
+            frontier = checkpoint.frontier()
+            for url, page_number in frontier:
+                scheduler.push(url, page_number)
+            self.log(f"Resuming from checkpoint: {len(frontier)} queued page(s), "
+                     f"{checkpoint.input_offset} input URL(s) already taken.")
+        wakeup = threading.Event()
+        read_ahead = max(self.max_workers * 2, SCHEDULE_AHEAD)
+        held = {}
+        waiting = {}
+        failed_details = set()
+        max_held = self.max_workers * HELD_PAGES_PER_WORKER
+        if self.extractor is not None:
+            max_backlog = self.extractor.processes * self.extractor.chunksize * 2
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            pending = {}
+            extracting = {}
+            fetched = []
+            exhausted = False
+
+            def backlog():
+                return len(fetched) + sum(len(chunk) for chunk in extracting.values())
+
+            def dispatch_limit():
+                if len(held) >= max_held or (self.extractor is not None and backlog() >= max_backlog):
+                    return DETAIL_PAGE
+                return None
+
+            def scrape_detail(url, page_number):
+                with self.metrics.profiled():
+                    try:
+                        html = self.fetch(url)
+                    finally:
+                        scheduler.release(url)
+                        wakeup.set()
+                    return self.extract_details_from_html(url, html)
+
+            def scrape_page(url, page_number):
+                with self.metrics.profiled():
+                    return fetch_and_extract(url, page_number)
+
+            def follow(page_number, next_url):
+                if (next_url and page_number < self.max_pages and not self._cancelled.is_set()
+                        and visited.claim(next_url)):
+                    self.log(f"Following pagination to page {page_number + 1}: {next_url}")
+                    if checkpoint is not None:
+                        checkpoint.queued(next_url, page_number + 1)
+                    scheduler.push(next_url, page_number + 1)
+                    wakeup.set()
+
+            def fetch_and_extract(url, page_number):
+                try:
+                    html = self.fetch(url)
+                finally:
+                    scheduler.release(url)
+                    wakeup.set()
+                if self.extractor is not None:
+                    state = self.change_tracker.check_page(url, html) if self.change_tracker is not None else None
+                    if state is None or not state.unchanged:
+                        return FetchedPage(html, state)
+                    self.log(f"Page unchanged since last run, skipping extraction: {url}")
+                    follow(page_number, state.next_url)
+                    return self.change_tracker.record_page(state, None)
+                soup, next_url, state = self.begin_page(url, html)
+                follow(page_number, next_url)
+                return self.finish_page(url, soup, state, next_url)
+
+            def submit_more():
+                nonlocal exhausted
+                while not exhausted and len(scheduler) < read_ahead:
+                    url = next(url_iter, None)
+                    if url is None:
+                        exhausted = True
+                        continue
+                    if checkpoint is not None:
+                        checkpoint.consumed()
+                    if visited.claim(url):
+                        if checkpoint is not None:
+                            checkpoint.queued(url)
+                        scheduler.push(url)
+                while len(pending) < self.max_workers:
+                    item = scheduler.pop(dispatch_limit())
+                    if item is None:
+                        break
+                    future = pool.submit(scrape_detail if item[1] == DETAIL_PAGE else scrape_page, *item)
+                    future.add_done_callback(lambda _: wakeup.set())
+                    pending[future] = item
+                # Fetched pages go to the process pool in chunks, but never wait for a chunk to fill
+                # while a worker process is idle.
+                while fetched and (len(fetched) >= self.extractor.chunksize
+                                   or len(extracting) < self.extractor.processes):
+                    chunk = fetched[:self.extractor.chunksize]
+                    del fetched[:len(chunk)]
+                    future = self.extractor.submit_chunk([(url, page.html) for url, _, page in chunk])
+                    future.add_done_callback(lambda _: wakeup.set())
+                    extracting[future] = (chunk, time.perf_counter())
+
+            def complete(url, rows):
+                yield url, rows, None
+                if checkpoint is not None and not any(row.get('URL') in failed_details for row in rows):
+                    checkpoint.done(url)
+
+            def deliver(url, rows):
+                if self.enrich_details:
+                    missing = self.merge_cached_details(rows) - failed_details
+                    if missing:
+                        held[url] = [rows, len(missing)]
+                        for detail_url in missing:
+                            if detail_url not in waiting:
+                                waiting[detail_url] = []
+                                scheduler.push(detail_url, DETAIL_PAGE)
+                            waiting[detail_url].append(url)
+                        return
+                yield from complete(url, rows)
+
+            submit_more()
+            while pending or len(scheduler) or extracting or fetched:
+                due = scheduler.wait_time(dispatch_limit())
+                idle_since = time.perf_counter()
+                wakeup.wait(CANCEL_POLL_INTERVAL if due is None else min(due, CANCEL_POLL_INTERVAL))
+                wakeup.clear()
+                if due and len(pending) < self.max_workers:
+                    # A worker sat idle only because every ready host was inside its interval.
+                    self.metrics.add('politeness_wait', time.perf_counter() - idle_since)
+                if self._cancelled.is_set():
+                    self.log("Scrape cancelled; dropping queued pages.", is_error=True)
+                    scheduler.clear()
+                    for future in itertools.chain(pending, extracting):
+                        future.cancel()
+                    return
+                for future in [future for future in extracting if future.done()]:
+                    chunk, started = extracting.pop(future)
+                    self.metrics.add('extract_process', time.perf_counter() - started)
+                    try:
+                        results = self.extractor.chunk_results(future)
+                    except Exception as e:
+                        results = [(None, None, e)] * len(chunk)
+                    for (url, page_number, page), (rows, next_url, error) in zip(chunk, results):
+                        if error is not None:
+                            self.log(f"ERROR: {url} - {error}", is_error=True)
+                            yield url, [], error
+                            continue
+                        self.log(f"Extracted {len(rows)} entries from {url} in a worker process.")
+                        follow(page_number, next_url)
+                        if page.state is not None:
+                            rows = self.change_tracker.record_page(page.state, rows, next_url)
+                        yield from deliver(url, rows)
+                for future in [future for future in pending if future.done()]:
+                    url, page_number = pending.pop(future)
+                    if page_number == DETAIL_PAGE:
+                        try:
+                            fields = future.result()
+                        except Exception as e:
+                            self.log(f"ERROR: detail page {url} - {e}", is_error=True)
+                            self.metrics.count('detail_errors')
+                            failed_details.add(url)
+                            fields = {}
+                        else:
+                            self.metrics.count('detail_pages')
+                            self.detail_cache.put(url, fields)
+                        for page_url in waiting.pop(url):
+                            entry = held[page_url]
+                            _merge_details(entry[0], url, fields)
+                            entry[1] -= 1
+                            if not entry[1]:
+                                del held[page_url]
+                                yield from complete(page_url, entry[0])
+                        continue
+                    try:
+                        rows = future.result()
+                    except Exception as e:
+                        self.log(f"ERROR: {url} - {e}", is_error=True)
+                        yield url, [], e
+                        continue
+                    if isinstance(rows, FetchedPage):
+                        fetched.append((url, page_number, rows))
+                        continue
+                    yield from deliver(url, rows)
+                submit_more()
+
+    def merge_cached_details(self, rows):
+        """Merges cached detail page fields into the rows; returns the detail URLs not cached yet."""
+        missing = set()
+        for row in rows:
+            detail_url = row.get('URL')
+            if not detail_url:
+                continue
+            fields = self.detail_cache.get(detail_url)
+            if fields is None:
+                missing.add(detail_url)
+            else:
+                row.update(fields)
+        return missing
+
+    def extract_details_from_html(self, url, html):
+        """Parses a product detail page and returns its detail fields (see scraper_details)."""
+        host = host_of(url)
+        with self.metrics.stage('parse', host):
+            soup = self.pages.parse(html)
+        with self.metrics.stage('extract_details', host):
+            return extract_details(self.get_detail_plan(url), soup)
+
+    def get_detail_plan(self, url):
+        """Returns the detail page selectors of the URL's site profile, or the generic ones."""
+        profile = self.profiles.lookup(url)
+        return profile.detail_plan if profile is not None else self.generic_detail_plan
+
+    def begin_page(self, url, html):
+        """Parses a fetched page and finds its next-page link, before any extraction.
+
+        Returns (soup, next_url, state). With a change tracker, a page whose body is
+        unchanged since the last run is not parsed at all: soup is None and the stored
+        pagination link is returned.
+        """
+        state = None
+        if self.change_tracker is not None:
+            state = self.change_tracker.check_page(url, html)
+            if state.unchanged:
+                self.log(f"Page unchanged since last run, skipping extraction: {url}")
+                return None, state.next_url, state
+        soup = self.parse_html(html, url)
+        return soup, self.find_next_page(url, soup), state
+
+    def finish_page(self, url, soup, state, next_url):
+        """Extracts rows from a page started with begin_page.
+
+        With a change tracker only inserted/updated rows are returned.
+        """
+        if soup is None:
+            return self.change_tracker.record_page(state, None)
+        rows = self.extract_from_soup(url, soup)
+        if state is not None:
+            rows = self.change_tracker.record_page(state, rows, next_url)
+        return rows
+
+    def find_next_page(self, url, soup):
+        """Returns the absolute URL of the page's "next" pagination link, or None."""
+        return self.pages.find_next_page(url, soup)
+
+    def host_limits(self, url):
+        """Returns the (max_concurrency, rate) overrides of the URL's site profile."""
+        profile = self.profiles.lookup(url)
+        if profile is None:
+            return None, None
+        return profile.concurrency, profile.rate_limit
+
+    def extract_product_info(self, url):
+        """Fetches the URL and extracts product-like information or general data."""
+        return self.extract_from_html(url, self.fetch(url))
+
+    def parse_html(self, html, url=None):
+        """Parses an HTML document with the configured parser backend (see PageExtractor.parse_html)."""
+        return self.pages.parse_html(html, url)
+
+    def extract_from_html(self, url, html):
+        """Parses the HTML and extracts product-like information or general data."""
+        return self.pages.extract_from_html(url, html)
+
+    def extract_from_soup(self, url, soup):
+        """Extracts product-like information (name, price, rating) or general data."""
+        return self.pages.extract_from_soup(url, soup)
+
+    def run_report(self):
+        """Returns the machine-readable run report: stage timings, counters, selector and HTTP stats."""
+        report = self.metrics.report()
+        report['http'] = self.host_stats()
+        if self.cache is not None:
+            report['cache'] = self.cache.stats()
+        if self.backoff is not None:
+            report['backoff'] = self.backoff.snapshot()
+        if self.enrich_details:
+            report['details'] = self.detail_cache.stats()
+        if self.change_tracker is not None:
+            report['changes'] = dict(self.change_tracker.counts)
+        return report
+
+    def save_to_csv(self, data, filepath, headers=None):
+        """Saves the extracted data to a CSV file. Raises IOError on write failure."""
+        if not data:
+            self.log("No data to save.")
+            return
+        with CsvSink(filepath, fieldnames=headers) as sink:
+            sink.write(data)
+        self.log(f"Data successfully written to {filepath}")
+
+
+def _read_url_file(path):
+    """Reads one URL per line, skipping blanks and # comments. '-' reads stdin."""
+    handle = sys.stdin if path == '-' else open(path, encoding='utf-8')
+    try:
+        return [line.strip() for line in handle if line.strip() and not line.strip().startswith('#')]
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+def _stderr_log(message, is_error=False):
+    """Log callback for the command line: writes messages to stderr."""
+    print(message, file=sys.stderr)
+
+
+def main(argv=None):
+    """Command-line entry point for headless batch runs."""
+    parser = argparse.ArgumentParser(description="Headless universal web scraper.")
+    parser.add_argument('urls', nargs='*', help="URLs to scrape")
+    parser.add_argument('-i', '--input', help="file with one URL per line ('-' for stdin)")
+    parser.add_argument('-o', '--output', default='scraped_data.csv', help="output path ('-' for stdout)")
+    parser.add_argument('-f', '--format', choices=list(SINK_FORMATS), default=None,
+                        help="output format (default: from the output file extension, else csv)")
+    parser.add_argument('--max-pages', type=int, default=1, help="follow pagination up to this many pages per URL")
+    parser.add_argument('--parser', default=DEFAULT_PARSER, choices=list(PARSER_BACKENDS),
+                        help="HTML parser backend")
+    parser.add_argument('--scoped', action='store_true',
+                        help="parse only the container and pagination subtrees of pages with a site profile")
+    parser.add_argument('--container-limit', type=int, default=CONTAINER_LIMIT,
+                        help="max items taken per page (0: no limit)")
+    parser.add_argument('--batch-size', type=int, default=500, help="rows buffered before each write to disk")
+    parser.add_argument('--normalize', action='store_true',
+                        help="write Price and Rating as numbers with detected Currency and Locale columns")
+    parser.add_argument('--details', action='store_true',
+                        help="fetch each product's detail page and add its SKU, Stock and Description")
+    parser.add_argument('--detail-cache-size', type=int, default=DETAIL_CACHE_SIZE,
+                        help="detail pages whose fields are kept in memory for reuse")
+    parser.add_argument('--links', action='store_true',
+                        help="add each product's detail page link as a URL column (always on for sqlite, "
+                             "--state and --details)")
+    parser.add_argument('-p', '--processes', type=int, default=0,
+                        help="parse and extract on this many worker processes (0: in the fetch threads)")
+    parser.add_argument('--chunksize', type=int, default=4, help="pages per task sent to a worker process")
+    parser.add_argument('--timeout', type=float, default=20, help="request timeout in seconds")
+    parser.add_argument('-w', '--workers', type=int, default=8, help="number of concurrent fetch workers")
+    parser.add_argument('--per-host', type=int, default=2, help="max concurrent requests per host")
+    parser.add_argument('--rate', type=float, default=None, help="max requests per second per host")
+    parser.add_argument('--ignore-robots', action='store_true', help="do not read or honor robots.txt")
+    parser.add_argument('--no-backoff', action='store_true',
+                        help="do not slow down hosts whose latency or error rate rises")
+    parser.add_argument('--retries', type=int, default=3, help="retries on connection errors, 429 and 5xx")
+    parser.add_argument('--pool-size', type=int, default=None, help="pooled keep-alive connections per host")
+    parser.add_argument('--async', dest='use_async', action='store_true', help="use the asyncio fetch backend (needs aiohttp)")
+    parser.add_argument('--concurrency', type=int, default=200, help="max requests in flight with --async")
+    parser.add_argument('--cache', metavar='PATH', help="persistent response cache file (SQLite)")
+    parser.add_argument('--cache-size', type=float, default=DEFAULT_CACHE_BYTES / (1024 * 1024),
+                        help="max cache size in MB before LRU eviction")
+    parser.add_argument('--offline', action='store_true', help="replay from --cache only, never hit the network")
+    parser.add_argument('--state', metavar='PATH',
+                        help="incremental mode: keep record fingerprints here and emit only changes")
+    parser.add_argument('--checkpoint', metavar='PATH',
+                        help="checkpoint the crawl here (SQLite) and resume from it if it was interrupted")
+    parser.add_argument('--checkpoint-interval', type=float, default=DEFAULT_CHECKPOINT_INTERVAL, metavar='SECONDS',
+                        help="seconds between checkpoints")
+    parser.add_argument('--profiles', nargs='+', metavar='PATH',
+                        help="site profile files or directories (JSON/YAML; default: the bundled profiles/)")
+    parser.add_argument('--stats', action='store_true', help="print per-host timing stats as JSON to stderr")
+    parser.add_argument('--report', metavar='PATH',
+                        help="write a JSON run report with per-stage, per-host and per-selector timings ('-' for stdout)")
+    parser.add_argument('--profile', metavar='PATH', help="cProfile the crawl and write merged .pstats data here")
+    parser.add_argument('--sample', type=float, metavar='MS',
+                        help="sample all thread stacks every MS milliseconds and add the hottest functions to the report")
+    parser.add_argument('-v', '--verbose', action='store_true', help="log progress to stderr")
+    args = parser.parse_args(argv)
+
+    urls = list(args.urls)
+    if args.input:
+        urls.extend(_read_url_file(args.input))
+    if not urls:
+        parser.error("no URLs given")
+    for url in urls:
+        if not (url.startswith('http://') or url.startswith('https://')):
+            parser.error(f"URL must start with http:// or https://: {url}")
+
+    if args.offline and not args.cache:
+        parser.error("--offline requires --cache")
+    if args.sample and not args.report:
+        parser.error("--sample requires --report")
+    if args.report == '-' and args.output == '-':
+        parser.error("--report - cannot be combined with -o -: both would be written to stdout")
+    if args.state and args.details:
+        parser.error("--state cannot be combined with --details: changes in detail fields (SKU, Stock, "
+                     "Description) would not be detected")
+    output = args.output if args.output == '-' else os.path.abspath(args.output)
+    output_format = args.format or guess_format(output)
+    if args.checkpoint:
+        if args.use_async or args.state:
+            parser.error("--checkpoint cannot be combined with --async or --state")
+        if output == '-' or output_format == 'parquet':
+            parser.error("--checkpoint needs a csv, jsonl or sqlite output file")
+    checkpoint = CrawlCheckpoint(args.checkpoint, args.checkpoint_interval) if args.checkpoint else None
+    if checkpoint is not None and checkpoint.resuming and checkpoint.output != (output, output_format):
+        parser.error(f"checkpoint {args.checkpoint} belongs to a crawl writing {checkpoint.output[0]}")
+    cache = ResponseCache(args.cache, int(args.cache_size * 1024 * 1024)) if args.cache else None
+    tracker = ChangeTracker(args.state) if args.state else None
+    try:
+        engine = ScraperEngine(log=_stderr_log if args.verbose else None, timeout=args.timeout,
+                               max_workers=args.workers, per_host_limit=args.per_host, per_host_rate=args.rate,
+                               max_retries=args.retries, pool_maxsize=args.pool_size, max_pages=args.max_pages,
+                               parser=args.parser, cache=cache, offline=args.offline,
+                               change_tracker=tracker, parse_processes=args.processes,
+                               parse_chunksize=args.chunksize, profiles=args.profiles,
+                               scoped_parse=args.scoped, container_limit=args.container_limit,
+                               trace_selectors=bool(args.report), raw_values=args.normalize,
+                               respect_robots=not args.ignore_robots, adaptive_backoff=not args.no_backoff,
+                               checkpoint=checkpoint, enrich_details=args.details,
+                               detail_cache=DetailCache(args.detail_cache_size),
+                               product_links=args.links or output_format == 'sqlite')
+    except (ValueError, RuntimeError, OSError) as e:
+        parser.error(str(e))
+    normalizer = Normalizer() if args.normalize else None
+    sink_options = {}
+    if checkpoint is not None and checkpoint.resuming and output_format != 'sqlite':
+        sink_options['resume_offset'] = checkpoint.sink_offset
+    if tracker is not None and output_format != 'sqlite':
+        # A run without changes must still replace the previous run's change file, with the
+        # header a run with product changes gets.
+        sink_options['create_empty'] = True
+        if output_format == 'csv':
+            columns = PREFERRED_HEADERS + ['URL', CHANGE_COLUMN] + (['Currency', 'Locale'] if args.normalize else [])
+            sink_options['empty_header'] = order_headers([dict.fromkeys(columns)])
+    try:
+        sink = open_sink(output, format=output_format, batch_size=args.batch_size, normalizer=normalizer,
+                         **sink_options)
+    except (ValueError, RuntimeError) as e:
+        parser.error(str(e))
+    if checkpoint is not None:
+        if checkpoint.resuming:
+            sink.rows_written = checkpoint.rows_written
+        checkpoint.bind(sink, output, output_format)
+    failures = []
+    metrics = engine.metrics
+    if args.profile:
+        metrics.enable_profiling()
+    sampler = StackSampler(args.sample / 1000.0).start() if args.sample else None
+
+    def handle(url, url_rows, error):
+        metrics.count('pages')
+        if error is not None:
+            failures.append(url)
+            metrics.count('failed_pages')
+            print(f"ERROR: {url} - {error}", file=sys.stderr)
+        with metrics.stage('write'), metrics.profiled():
+            sink.write(url_rows)
+
+    try:
+        if args.use_async:
+            from scraper_async import AsyncScraper
+            AsyncScraper(engine, concurrency=args.concurrency, per_host_limit=args.per_host,
+                         timeout=args.timeout, max_retries=args.retries,
+                         parse_workers=args.workers).run(urls, on_result=handle)
+        else:
+            for url, url_rows, error in engine.scrape(urls):
+                handle(url, url_rows, error)
+        if tracker is not None:
+            sink.write(tracker.finish_run())
+            print(f"Changes: {json.dumps(tracker.counts, sort_keys=True)}", file=sys.stderr)
+        if checkpoint is not None and not engine.cancelled:
+            checkpoint.finish()
+    finally:
+        if checkpoint is not None:
+            checkpoint.save()
+            checkpoint.close()
+        with metrics.stage('write'):
+            sink.close()
+        metrics.count('rows_written', sink.rows_written)
+        if getattr(sink, 'duplicate_keys', 0):
+            metrics.count('duplicate_keys', sink.duplicate_keys)
+        if sampler is not None:
+            sampler.stop()
+        if args.report:
+            report = engine.run_report()
+            if sampler is not None:
+                report['samples'] = sampler.report()
+            if normalizer is not None:
+                report['normalization'] = normalizer.report()
+            write_report(report, args.report)
+        if args.profile and not metrics.dump_profile(args.profile):
+            print("No profile data was collected.", file=sys.stderr)
+        if args.stats:
+            print(json.dumps(engine.host_stats(), indent=2, sort_keys=True), file=sys.stderr)
+            if cache is not None:
+                print(f"Cache: {json.dumps(cache.stats(), sort_keys=True)}", file=sys.stderr)
+        engine.close()
+        if tracker is not None:
+            tracker.close()
+
+    detail_failures = metrics.counters.get('detail_errors', 0)
+    if detail_failures:
+        print(f"WARNING: {detail_failures} detail page(s) failed; their rows lack the detail fields.",
+              file=sys.stderr)
+    if tracker is not None and not failures and not detail_failures:
+        return 0
+    if not sink.rows_written:
+        print("No data found that matches common patterns.", file=sys.stderr)
+        return 1
+    if sink.late_columns:
+        print(f"Columns first seen after the header was written: {', '.join(sorted(sink.late_columns))}",
+              file=sys.stderr)
+    if getattr(sink, 'dropped_columns', None):
+        print(f"Columns dropped because the CSV header has no extra column: "
+              f"{', '.join(sorted(sink.dropped_columns))}", file=sys.stderr)
+    if getattr(sink, 'duplicate_keys', 0):
+        print(f"{sink.duplicate_keys} row(s) had the product key of an earlier row and replaced it "
+              f"(key fields: {', '.join(sink.key_fields)})", file=sys.stderr)
+    if normalizer is not None and any(normalizer.unparseable.values()):
+        summary = normalizer.report()
+        print(f"Unparseable values: {json.dumps(summary['unparseable'], sort_keys=True)}; "
+              f"samples: {json.dumps(summary['samples'], ensure_ascii=False)}", file=sys.stderr)
+    if args.output != '-':
+        detail_summary = f", {detail_failures} failed detail page(s)" if args.details else ''
+        print(f"Extracted {sink.rows_written} entries ({len(failures)} failed page(s){detail_summary}) "
+              f"to {args.output}", file=sys.stderr)
+    return 0 if not failures and not detail_failures else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
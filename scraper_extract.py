@@ -0,0 +1,137 @@
+from urllib.parse import urldefrag, urljoin
+
+from scraper_http import host_of
+from scraper_metrics import RunMetrics
+from scraper_parsers import DEFAULT_PARSER, get_parser, scope_filter
+from scraper_selectors import CONTAINER_LIMIT, SelectorMemory, SelectorPlan, SelectorStats, extract_rows, select_one
+
+
+NEXT_PAGE_SELECTORS = [
+    'li.next a',
+    'a[rel~="next"]',
+    'link[rel~="next"]',
+    '.pagination a.next',
+    '.pagination .next a',
+    'a.next',
+    'a.pagination-next',
+    'a[aria-label="Next"]',
+    'a[aria-label="Next page"]'
+]
+
+
+def _null_log(message, is_error=False):
+    """Default log callback that discards messages."""
+
+
+def _resolve_detail_links(page_url, rows):
+    """Makes the rows' detail page links absolute, dropping any that are not http(s) or point back at the page."""
+    page = urldefrag(page_url)[0]
+    for row in rows:
+        href = row.get('URL')
+        if href is None:
+            continue
+        link = urldefrag(urljoin(page_url, href))[0]
+        if link != page and link.startswith(('http://', 'https://')):
+            row['URL'] = link
+        else:
+            del row['URL']
+
+
+class PageExtractor:
+    """Network-free page parsing and row extraction: parser backend, selector plans and memory.
+
+    ScraperEngine uses one in-process; each ProcessExtractor worker builds its own,
+    so worker processes never open an HTTP session.
+    """
+
+    def __init__(self, profiles, parser=DEFAULT_PARSER, scoped_parse=False, container_limit=CONTAINER_LIMIT,
+                 raw_values=False, product_links=False, trace_selectors=False, metrics=None, log=None):
+        self.log = log or _null_log
+        self.metrics = metrics or RunMetrics()
+        self.profiles = profiles
+        self.parser = parser
+        self.parse = get_parser(parser)
+        self.scoped_parse = scoped_parse and self.parse.scoped
+        if scoped_parse and not self.scoped_parse:
+            self.log(f"Parser backend '{parser}' cannot parse scoped; whole pages will be parsed.")
+        self.container_limit = container_limit
+        self.raw_values = raw_values
+        self.product_links = product_links
+        self.trace_selectors = trace_selectors
+        self.selector_memory = SelectorMemory()
+        self.generic_plan = SelectorPlan(log=self.log)
+        self._scopes = {}
+
+    def scope_for(self, url):
+        """Returns (profile, parse filter) for scoped parsing of the URL, or (profile, None)."""
+        profile = self.profiles.lookup(url)
+        if profile is None or profile.generic_fallback:
+            return profile, None
+        scope = self._scopes.get(profile)
+        if scope is None and profile not in self._scopes:
+            scope = self._scopes[profile] = scope_filter(profile.selectors['container'] +
+                                                         (profile.pagination or NEXT_PAGE_SELECTORS))
+        return profile, scope
+
+    def parse_html(self, html, url=None):
+        """Parses an HTML document with the configured parser backend.
+
+        With ``scoped_parse`` and a URL whose site profile has simple container selectors,
+        only the container and pagination subtrees are built; if that finds no
+        containers the whole page is parsed after all.
+        """
+        with self.metrics.stage('parse', host_of(url) if url else None):
+            return self._parse_page(html, url)
+
+    def _parse_page(self, html, url):
+        """parse_html without the timing."""
+        if self.scoped_parse and url is not None:
+            profile, scope = self.scope_for(url)
+            if scope is not None:
+                soup = self.parse(html, parse_only=scope)
+                containers = profile.plan.site_container + profile.plan.quote_container
+                if any(select_one(soup, selector) for selector in containers):
+                    return soup
+                self.log(f"No containers in the scoped parse of {url}; parsing the whole page.")
+        return self.parse(html)
+
+    def find_next_page(self, url, soup):
+        """Returns the absolute URL of the page's "next" pagination link, or None."""
+        profile = self.profiles.lookup(url)
+        if profile is not None and profile.next_page:
+            links = (select_one(soup, selector) for selector in profile.next_page)
+        else:
+            links = (soup.select_one(selector) for selector in NEXT_PAGE_SELECTORS)
+        for link in links:
+            if link is not None and link.get('href'):
+                next_url = urldefrag(urljoin(url, link['href']))[0]
+                if next_url != urldefrag(url)[0] and next_url.startswith(('http://', 'https://')):
+                    return next_url
+        return None
+
+    def get_selector_plan(self, url):
+        """Returns the precompiled selector plan of the URL's site profile, or the generic plan."""
+        profile = self.profiles.lookup(url)
+        if profile is None:
+            return self.generic_plan
+        self.log(f"Applying site profile '{profile.name}'")
+        return profile.plan
+
+    def extract_from_soup(self, url, soup):
+        """Extracts product-like information (name, price, rating) or general data."""
+        plan = self.get_selector_plan(url)
+        host = host_of(url)
+        memory_key = (id(plan), host)
+        stats = SelectorStats() if self.trace_selectors else None
+        with self.metrics.stage('extract', host):
+            rows, winners = extract_rows(plan, soup, self.log, self.selector_memory.preferred(memory_key),
+                                         self.container_limit, stats, self.raw_values, self.product_links)
+        if stats is not None:
+            self.metrics.merge_selectors(host, stats)
+        self.selector_memory.remember(memory_key, winners)
+        _resolve_detail_links(url, rows)
+        return rows
+
+    def extract_from_html(self, url, html):
+        """Parses the HTML and extracts product-like information or general data."""
+        return self.extract_from_soup(url, self.parse_html(html, url))
@@ -0,0 +1,220 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/107.0.0.0 Safari/537.36',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Connection': 'keep-alive'
+}
+
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+
+def host_of(url):
+    """Returns the lower-cased host[:port] of a URL, used as the politeness and stats key."""
+    return urlsplit(url).netloc.lower()
+
+
+def parse_retry_after(value):
+    """Returns the delay in seconds requested by a Retry-After header, or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+_connect_times = threading.local()
+
+
+def take_connect_times():
+    """Returns (seconds, count) of connections this thread opened since the last call, and resets them."""
+    times = getattr(_connect_times, 'values', None)
+    _connect_times.values = []
+    return (sum(times), len(times)) if times else (0.0, 0)
+
+
+class _ConnectTimingMixin:
+    """Times connect() (DNS lookup, TCP connect and TLS handshake) into a per-thread list."""
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            times = getattr(_connect_times, 'values', None)
+            if times is None:
+                times = _connect_times.values = []
+            times.append(time.perf_counter() - start)
+
+
+class TimedHTTPConnection(_ConnectTimingMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_ConnectTimingMixin, HTTPSConnection):
+    pass
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose pooled connections record how long each new connection took to open."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': TimedHTTPConnectionPool,
+                                                   'https': TimedHTTPSConnectionPool}
+
+
+class HostStats:
+    """Thread-safe per-host request counters and timings."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def record(self, url, elapsed, wait=0.0, status=None, size=0, error=False, retried=False,
+               connect=0.0, connections=0):
+        """Records one request attempt against the URL's host.
+
+        ``wait`` is the time to the response headers, which includes the ``connect``
+        time spent opening ``connections`` new connections; the rest of ``elapsed`` is
+        download time.
+        """
+        with self._lock:
+            entry = self._hosts.get(host_of(url))
+            if entry is None:
+                entry = self._hosts[host_of(url)] = {
+                    'requests': 0, 'errors': 0, 'retries': 0, 'bytes': 0,
+                    'total_time': 0.0, 'max_time': 0.0, 'time_to_headers': 0.0,
+                    'connect_time': 0.0, 'connections': 0, 'download_time': 0.0,
+                    'statuses': {}
+                }
+            entry['requests'] += 1
+            entry['bytes'] += size
+            entry['total_time'] += elapsed
+            entry['max_time'] = max(entry['max_time'], elapsed)
+            entry['time_to_headers'] += wait
+            entry['connect_time'] += connect
+            entry['connections'] += connections
+            entry['download_time'] += max(0.0, elapsed - wait) if status is not None else 0.0
+            if error:
+                entry['errors'] += 1
+            if retried:
+                entry['retries'] += 1
+            if status is not None:
+                entry['statuses'][status] = entry['statuses'].get(status, 0) + 1
+
+    def snapshot(self):
+        """Returns a copy of the stats with average timings filled in."""
+        with self._lock:
+            result = {}
+            for host, entry in self._hosts.items():
+                entry = dict(entry, statuses=dict(entry['statuses']))
+                count = entry['requests'] or 1
+                entry['avg_time'] = entry['total_time'] / count
+                entry['avg_time_to_headers'] = entry['time_to_headers'] / count
+                entry['avg_connect_time'] = entry['connect_time'] / (entry['connections'] or 1)
+                result[host] = entry
+            return result
+
+
+class HttpClient:
+    """Shared pooled requests.Session with retry/backoff and per-host timing stats.
+
+    ``on_attempt(url, elapsed, status, retry_after)`` is called after every attempt,
+    retried or not; ``status`` is None for connection errors and timeouts.
+    """
+
+    def __init__(self, timeout=20, pool_connections=10, pool_maxsize=10, max_retries=3,
+                 backoff_factor=0.5, max_backoff=60.0, headers=None, on_attempt=None):
+        self.timeout = timeout
+        self.on_attempt = on_attempt
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.stats = HostStats()
+
+        self.session = requests.Session()
+        self.session.headers.update(headers or DEFAULT_HEADERS)
+        adapter = TimedHTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _backoff(self, attempt, response=None):
+        """Returns how long to sleep before the next attempt."""
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if retry_after is not None:
+                return min(retry_after, self.max_backoff)
+        delay = self.backoff_factor * (2 ** attempt)
+        return min(delay + random.uniform(0, delay / 2), self.max_backoff)
+
+    def get(self, url, **kwargs):
+        """GETs the URL, retrying connection errors, 429 and 5xx with exponential backoff.
+
+        Returns the final response; raise_for_status is left to the caller.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        attempt = 0
+        while True:
+            take_connect_times()
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                elapsed = time.perf_counter() - start
+                connect, connections = take_connect_times()
+                self.stats.record(url, elapsed, error=True, retried=attempt < self.max_retries,
+                                  connect=connect, connections=connections)
+                if self.on_attempt is not None:
+                    self.on_attempt(url, elapsed, None, None)
+                if attempt >= self.max_retries:
+                    raise
+                time.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+
+            elapsed = time.perf_counter() - start
+            connect, connections = take_connect_times()
+            retry = response.status_code in RETRY_STATUSES and attempt < self.max_retries
+            self.stats.record(url, elapsed, wait=response.elapsed.total_seconds(), status=response.status_code,
+                              size=len(response.content), error=response.status_code >= 400, retried=retry,
+                              connect=connect, connections=connections)
+            if self.on_attempt is not None:
+                self.on_attempt(url, elapsed, response.status_code,
+                                parse_retry_after(response.headers.get('Retry-After')))
+            if not retry:
+                return response
+            delay = self._backoff(attempt, response)
+            response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def close(self):
+        """Closes all pooled connections."""
+        self.session.close()
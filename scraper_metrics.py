@@ -0,0 +1,214 @@
+import cProfile
+import json
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+
+SLOWEST_SELECTORS = 10
+
+
+def _accumulate(table, name, seconds):
+    entry = table.get(name)
+    if entry is None:
+        entry = table[name] = {'count': 0, 'total': 0.0, 'max': 0.0}
+    entry['count'] += 1
+    entry['total'] += seconds
+    if seconds > entry['max']:
+        entry['max'] = seconds
+
+
+def _with_averages(table):
+    return {name: dict(entry, avg=entry['total'] / (entry['count'] or 1)) for name, entry in table.items()}
+
+
+class RunMetrics:
+    """Thread-safe per-stage timings, counters and selector statistics for one run.
+
+    Stage timings (count, total, max, avg seconds) are kept overall and per host.
+    Selector statistics come from SelectorStats merged in after each page.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = datetime.now(timezone.utc)
+        self._start = time.perf_counter()
+        self.stages = {}
+        self.host_stages = {}
+        self.counters = {}
+        self.selectors = {}
+        self._profiles = None
+        self._local = threading.local()
+
+    def add(self, stage, seconds, host=None):
+        """Adds one timed occurrence of a stage."""
+        with self._lock:
+            _accumulate(self.stages, stage, seconds)
+            if host is not None:
+                _accumulate(self.host_stages.setdefault(host, {}), stage, seconds)
+
+    @contextmanager
+    def stage(self, name, host=None):
+        """Times the enclosed block as one occurrence of the stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start, host)
+
+    def count(self, name, amount=1):
+        """Increments a run counter."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def merge_selectors(self, host, stats):
+        """Folds one page's SelectorStats into the per-host selector table."""
+        with self._lock:
+            for stage, seconds in stats.stages.items():
+                _accumulate(self.stages, stage, seconds)
+                _accumulate(self.host_stages.setdefault(host, {}), stage, seconds)
+            fields = self.selectors.setdefault(host, {})
+            for (field, selector), (attempts, matches, errors, seconds) in stats.entries.items():
+                entry = fields.setdefault(field, {}).get(selector)
+                if entry is None:
+                    entry = fields[field][selector] = {'attempts': 0, 'matches': 0, 'errors': 0, 'time': 0.0}
+                entry['attempts'] += attempts
+                entry['matches'] += matches
+                entry['errors'] += errors
+                entry['time'] += seconds
+
+    def enable_profiling(self):
+        """Turns on cProfile for blocks run under profiled(), one profiler per thread."""
+        self._profiles = []
+
+    @contextmanager
+    def profiled(self):
+        """Runs the block under this thread's cProfile profiler when profiling is on."""
+        profile = self._thread_profile() if self._profiles is not None and not getattr(self._local, 'active', False) else None
+        if profile is not None:
+            try:
+                profile.enable()
+            except ValueError:
+                # Another profiler already owns this interpreter (e.g. Python 3.12+ with
+                # a profiler active in a different thread); run unprofiled.
+                profile = None
+        if profile is None:
+            yield
+            return
+        self._local.active = True
+        try:
+            yield
+        finally:
+            profile.disable()
+            self._local.active = False
+
+    def _thread_profile(self):
+        profile = getattr(self._local, 'profile', None)
+        if profile is None:
+            profile = self._local.profile = cProfile.Profile()
+            with self._lock:
+                self._profiles.append(profile)
+        return profile
+
+    def dump_profile(self, path):
+        """Writes the merged cProfile data of all threads to a .pstats file; False if nothing ran."""
+        profiles = [profile for profile in self._profiles or () if profile.getstats()]
+        if not profiles:
+            return False
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(path)
+        return True
+
+    def report(self):
+        """Returns the run report as a JSON-serializable dict."""
+        with self._lock:
+            selectors = {host: {field: {selector: dict(entry) for selector, entry in entries.items()}
+                                for field, entries in fields.items()}
+                         for host, fields in self.selectors.items()}
+            slowest = sorted(((entry['time'], host, field, selector)
+                              for host, fields in selectors.items()
+                              for field, entries in fields.items()
+                              for selector, entry in entries.items()), reverse=True)[:SLOWEST_SELECTORS]
+            return {
+                'started_at': self.started_at.isoformat(),
+                'elapsed': time.perf_counter() - self._start,
+                'counters': dict(self.counters),
+                'stages': _with_averages(self.stages),
+                'hosts': {host: _with_averages(stages) for host, stages in self.host_stages.items()},
+                'selectors': selectors,
+                'slowest_selectors': [dict(selectors[host][field][selector], host=host, field=field,
+                                           selector=selector) for _, host, field, selector in slowest],
+            }
+
+
+class StackSampler:
+    """Low-overhead statistical profiler: samples every thread's stack at a fixed interval.
+
+    Reports, per function, how often it was on top of a stack (own) and anywhere in
+    it (cumulative). Works with any number of threads and alongside cProfile.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.samples = 0
+        self.own = Counter()
+        self.cumulative = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Starts sampling in a daemon thread."""
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops sampling and waits for the sampler thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        own_thread = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own_thread:
+                    continue
+                self.samples += 1
+                seen = set()
+                leaf = True
+                while frame is not None:
+                    code = frame.f_code
+                    key = f"{code.co_filename}:{code.co_firstlineno}({code.co_name})"
+                    if leaf:
+                        self.own[key] += 1
+                        leaf = False
+                    if key not in seen:
+                        seen.add(key)
+                        self.cumulative[key] += 1
+                    frame = frame.f_back
+
+    def report(self, top=25):
+        """Returns the most frequently sampled functions."""
+        return {
+            'interval': self.interval,
+            'samples': self.samples,
+            'own': [{'function': key, 'samples': count} for key, count in self.own.most_common(top)],
+            'cumulative': [{'function': key, 'samples': count} for key, count in self.cumulative.most_common(top)],
+        }
+
+
+def write_report(report, path):
+    """Writes a run report as JSON ('-' for stdout)."""
+    text = json.dumps(report, indent=2, sort_keys=True, default=str)
+    if path == '-':
+        print(text)
+        return
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write(text + '\n')
@@ -0,0 +1,220 @@
+import re
+import threading
+import time
+
+try:
+    import pyarrow
+    import pyarrow.compute
+except ImportError:
+    pyarrow = None
+
+
+# One pattern string per rule, valid in both Python re and Arrow's RE2, so the two
+# backends below classify values identically.
+NUMBER_PATTERN = '[.,]?[0-9](?:[0-9.,\' \u00a0\u202f]*[0-9])?'
+GROUPING_PATTERN = '[\' \u00a0\u202f]'
+LEADING_SEPARATOR_PATTERN = r'^([.,])'
+CURRENCY_PATTERN = (r'US\$|C\$|A\$|R\$|[$€£¥₹₩₽₺₪]|'
+                    r'\b(?:USD|EUR|GBP|JPY|CNY|INR|CAD|AUD|CHF|SEK|NOK|DKK|PLN|BRL|TRY|RUB|KRW|ILS)\b')
+
+PLAIN_PATTERN = r'^[0-9]+$'
+EN_PATTERN = r'^[0-9]{1,3}(,[0-9]{3})*\.[0-9]+$|^[0-9]+\.[0-9]+$|^[0-9]{1,3}(,[0-9]{3})+$'
+EU_PATTERN = r'^[0-9]{1,3}(\.[0-9]{3})*,[0-9]+$|^[0-9]+,[0-9]+$|^[0-9]{1,3}(\.[0-9]{3})+$'
+RATING_PATTERN = r'[0-9]+(?:[.,][0-9]+)?'
+
+CURRENCY_CODES = {
+    '$': 'USD', 'US$': 'USD', 'C$': 'CAD', 'A$': 'AUD', 'R$': 'BRL', '€': 'EUR', '£': 'GBP',
+    '¥': 'JPY', '₹': 'INR', '₩': 'KRW', '₽': 'RUB', '₺': 'TRY', '₪': 'ILS',
+}
+
+# Currencies whose sites usually write 1.234,56; decides "1.234" and "1,234".
+COMMA_DECIMAL_CURRENCIES = frozenset(['EUR', 'BRL', 'TRY', 'RUB', 'PLN', 'DKK', 'NOK', 'SEK'])
+
+MISSING_VALUES = frozenset(['', 'N/A'])
+
+UNPARSEABLE_SAMPLES = 20
+
+NUMBER_RE = re.compile(NUMBER_PATTERN)
+GROUPING_RE = re.compile(GROUPING_PATTERN)
+LEADING_SEPARATOR_RE = re.compile(LEADING_SEPARATOR_PATTERN)
+CURRENCY_RE = re.compile(CURRENCY_PATTERN)
+PLAIN_RE = re.compile(PLAIN_PATTERN)
+EN_RE = re.compile(EN_PATTERN)
+EU_RE = re.compile(EU_PATTERN)
+RATING_RE = re.compile(RATING_PATTERN)
+
+
+def _currency_code(symbol):
+    return CURRENCY_CODES.get(symbol, symbol) if symbol else None
+
+
+def _classify(number, currency):
+    """Returns (value text, locale) for a grouped number string, or (None, None) if malformed.
+
+    Locale is 'en' for 1,234.56, 'eu' for 1.234,56 and None for plain integers.
+    """
+    if PLAIN_RE.match(number):
+        return number, None
+    en = EN_RE.match(number) is not None
+    eu = EU_RE.match(number) is not None
+    if en and eu:
+        eu = currency in COMMA_DECIMAL_CURRENCIES
+        en = not eu
+    if eu:
+        return number.replace('.', '').replace(',', '.'), 'eu'
+    if en:
+        return number.replace(',', ''), 'en'
+    return None, None
+
+
+def normalize_prices_python(values):
+    """Pure-Python columnar price normalization; see normalize_prices."""
+    prices, currencies, locales = [], [], []
+    cache = {}
+    for value in values:
+        result = cache.get(value)
+        if result is None:
+            if value is None or value in MISSING_VALUES:
+                result = (None, None, None)
+            else:
+                symbol = CURRENCY_RE.search(value)
+                currency = _currency_code(symbol.group(0)) if symbol else None
+                number = NUMBER_RE.search(value)
+                if number:
+                    number = LEADING_SEPARATOR_RE.sub(r'0\1', GROUPING_RE.sub('', number.group(0)))
+                text, locale = _classify(number, currency) if number else (None, None)
+                result = (float(text) if text is not None else None, currency, locale)
+            cache[value] = result
+        prices.append(result[0])
+        currencies.append(result[1])
+        locales.append(result[2])
+    return prices, currencies, locales
+
+
+def normalize_prices_arrow(values):
+    """Vectorized price normalization with pyarrow.compute; see normalize_prices.
+
+    The column is dictionary-encoded first, so each distinct price string is parsed once.
+    """
+    compute = pyarrow.compute
+    encoded_values = pyarrow.array(values, pyarrow.string()).dictionary_encode()
+    raw = encoded_values.dictionary
+    null_text = pyarrow.scalar(None, pyarrow.string())
+    raw = compute.if_else(compute.is_in(raw, pyarrow.array(sorted(MISSING_VALUES))), null_text, raw)
+
+    found = compute.extract_regex(raw, f'(?P<c>{CURRENCY_PATTERN})')
+    symbols = compute.if_else(compute.is_valid(found), compute.struct_field(found, [0]), null_text)
+    encoded = symbols.dictionary_encode()
+    codes = pyarrow.array([_currency_code(symbol) for symbol in encoded.dictionary.to_pylist()], pyarrow.string())
+    currencies = compute.take(codes, encoded.indices)
+
+    found = compute.extract_regex(raw, f'(?P<n>{NUMBER_PATTERN})')
+    number = compute.if_else(compute.is_valid(found), compute.struct_field(found, [0]), null_text)
+    number = compute.replace_substring_regex(number, GROUPING_PATTERN, '')
+    number = compute.replace_substring_regex(number, LEADING_SEPARATOR_PATTERN, r'0\1')
+
+    plain = compute.match_substring_regex(number, PLAIN_PATTERN)
+    en = compute.match_substring_regex(number, EN_PATTERN)
+    eu = compute.match_substring_regex(number, EU_PATTERN)
+    ambiguous = compute.and_(en, eu)
+    eu_hint = compute.fill_null(compute.is_in(currencies, pyarrow.array(sorted(COMMA_DECIMAL_CURRENCIES))), False)
+    eu = compute.if_else(ambiguous, eu_hint, eu)
+    en = compute.and_(en, compute.invert(eu))
+
+    en_text = compute.replace_substring(number, ',', '')
+    eu_text = compute.replace_substring(compute.replace_substring(number, '.', ''), ',', '.')
+    text = compute.if_else(plain, number, compute.if_else(eu, eu_text, compute.if_else(en, en_text, null_text)))
+    prices = compute.cast(text, pyarrow.float64())
+
+    locales = compute.if_else(plain, null_text, compute.if_else(eu, pyarrow.scalar('eu'),
+                                                                compute.if_else(en, pyarrow.scalar('en'), null_text)))
+    indices = encoded_values.indices
+    return (compute.take(prices, indices).to_pylist(), compute.take(currencies, indices).to_pylist(),
+            compute.take(locales, indices).to_pylist())
+
+
+def normalize_prices(values):
+    """Converts a column of raw price strings to (prices, currencies, locales) lists.
+
+    Prices are floats (None when missing or unparseable), currencies ISO codes
+    detected from symbols or codes, and locales 'en' (1,234.56), 'eu' (1.234,56) or
+    None. Numbers like "1.234" or "1,234" follow the currency's usual format.
+    Uses pyarrow.compute when installed.
+    """
+    if pyarrow is not None:
+        return normalize_prices_arrow(values)
+    return normalize_prices_python(values)
+
+
+def normalize_ratings(values):
+    """Converts a column of raw rating strings ("4", "4.5 out of 5 stars", "3 stars") to floats."""
+    if pyarrow is not None:
+        compute = pyarrow.compute
+        found = compute.extract_regex(pyarrow.array(values, pyarrow.string()), f'(?P<r>{RATING_PATTERN})')
+        text = compute.if_else(compute.is_valid(found), compute.struct_field(found, [0]),
+                               pyarrow.scalar(None, pyarrow.string()))
+        return compute.cast(compute.replace_substring(text, ',', '.'), pyarrow.float64()).to_pylist()
+    ratings = []
+    for value in values:
+        match = RATING_RE.search(value) if value else None
+        ratings.append(float(match.group(0).replace(',', '.')) if match else None)
+    return ratings
+
+
+class Normalizer:
+    """Batch normalization stage for raw Price and Rating columns.
+
+    normalize(rows) converts a whole batch column by column: Price becomes a float
+    with Currency and Locale columns added, Rating becomes a float. Values that
+    were present but could not be parsed become None and are counted, with a few
+    samples kept for the report. Safe to share between threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.rows = 0
+        self.seconds = 0.0
+        self.unparseable = {'Price': 0, 'Rating': 0}
+        self.samples = {'Price': [], 'Rating': []}
+
+    def _note(self, field, raw_values, parsed):
+        bad = [raw for raw, value in zip(raw_values, parsed)
+               if value is None and raw is not None and raw not in MISSING_VALUES]
+        if bad:
+            with self._lock:
+                self.unparseable[field] += len(bad)
+                room = UNPARSEABLE_SAMPLES - len(self.samples[field])
+                if room > 0:
+                    self.samples[field].extend(bad[:room])
+
+    def normalize(self, rows):
+        """Returns new row dicts with typed Price/Rating and detected Currency/Locale."""
+        start = time.perf_counter()
+        rows = [dict(row) for row in rows]
+        priced = [row for row in rows if 'Price' in row]
+        if priced:
+            raw = [row['Price'] for row in priced]
+            prices, currencies, locales = normalize_prices(raw)
+            self._note('Price', raw, prices)
+            for row, price, currency, locale in zip(priced, prices, currencies, locales):
+                row['Price'] = price
+                row['Currency'] = currency
+                row['Locale'] = locale
+        rated = [row for row in rows if 'Rating' in row]
+        if rated:
+            raw = [row['Rating'] for row in rated]
+            ratings = normalize_ratings(raw)
+            self._note('Rating', raw, ratings)
+            for row, rating in zip(rated, ratings):
+                row['Rating'] = rating
+        with self._lock:
+            self.rows += len(rows)
+            self.seconds += time.perf_counter() - start
+        return rows
+
+    def report(self):
+        """Returns row and unparseable-value counts with sample values."""
+        with self._lock:
+            return {'rows': self.rows, 'seconds': self.seconds, 'backend': 'pyarrow' if pyarrow is not None else 'python',
+                    'unparseable': dict(self.unparseable),
+                    'samples': {field: list(values) for field, values in self.samples.items()}}
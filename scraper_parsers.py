@@ -0,0 +1,298 @@
+import importlib
+import re
+
+from bs4 import BeautifulSoup
+
+try:
+    from bs4.filter import ElementFilter
+except ImportError:
+    ElementFilter = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+
+DEFAULT_PARSER = 'html.parser'
+
+SKIPPED_TEXT_PARENTS = frozenset(['script', 'style', 'template'])
+
+# soupsieve's text-containment pseudo-class and lexbor's equivalent (same substring match).
+SOUP_CONTAINS_RE = re.compile(r':-soup-contains\(')
+
+SIMPLE_COMPOUND_RE = re.compile(r'([a-zA-Z][\w-]*|\*)?((?:\.[\w-]+|#[\w-]+|\[[^\]]+\])*)$')
+SIMPLE_PART_RE = re.compile(
+    r"""\.([\w-]+)|#([\w-]+)|\[\s*([\w-]+)\s*(?:([~*^$|]?=)\s*(?:"([^"]*)"|'([^']*)'|([^\]\s]*))\s*)?\]""")
+
+
+_lexbor_selectors = {}
+
+
+def _lexbor_selector(selector):
+    """Returns the selector with soupsieve-only syntax rewritten for lexbor (memoized)."""
+    translated = _lexbor_selectors.get(selector)
+    if translated is None:
+        translated = _lexbor_selectors[selector] = SOUP_CONTAINS_RE.sub(':lexbor-contains(', selector)
+    return translated
+
+
+class LexborNode:
+    """Wraps a selectolax node in the small slice of the bs4 Tag API the extractor uses."""
+
+    __slots__ = ('node',)
+
+    def __init__(self, node):
+        self.node = node
+
+    @property
+    def name(self):
+        return self.node.tag
+
+    def get(self, key, default=None):
+        """Returns an attribute; 'class' is split into a list like bs4 does."""
+        value = self.node.attributes.get(key)
+        if value is None:
+            return default
+        if key == 'class':
+            return value.split()
+        return value
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __hash__(self):
+        return hash(self.node.html)
+
+    def _strings(self, strip):
+        """Yields descendant text nodes like bs4, skipping script/style contents."""
+        for child in self.node.traverse(include_text=True):
+            if child.tag != '-text' or child.parent is None or child.parent.tag in SKIPPED_TEXT_PARENTS:
+                continue
+            text = child.text_content or ''
+            if strip:
+                text = text.strip()
+                if not text:
+                    continue
+            yield text
+
+    @property
+    def stripped_strings(self):
+        return self._strings(True)
+
+    def get_text(self, separator='', strip=False):
+        """Concatenates descendant text like bs4, skipping script/style contents."""
+        return separator.join(self._strings(strip))
+
+    def select_one(self, selector):
+        """Returns the first descendant matching the CSS selector, or None."""
+        found = self.node.css_first(_lexbor_selector(selector))
+        return LexborNode(found) if found is not None else None
+
+    def select(self, selector, limit=None):
+        """Returns descendants matching the CSS selector, in document order."""
+        found = self.node.css(_lexbor_selector(selector))
+        if limit:
+            found = found[:limit]
+        return [LexborNode(node) for node in found]
+
+    def find_all(self, class_):
+        """Returns descendants with a class matching the compiled regex."""
+        matches = []
+        nodes = self.node.traverse(include_text=False)
+        next(nodes, None)
+        for node in nodes:
+            classes = (node.attributes.get('class') or '').split()
+            if any(class_.search(value) for value in classes):
+                matches.append(LexborNode(node))
+        return matches
+
+
+class LexborDocument(LexborNode):
+    """A parsed selectolax document exposing ``body`` like BeautifulSoup."""
+
+    __slots__ = ('tree',)
+
+    def __init__(self, tree):
+        self.tree = tree
+        super().__init__(tree.root)
+
+    @property
+    def body(self):
+        return LexborNode(self.tree.body) if self.tree.body is not None else None
+
+
+def _first_compound(selector):
+    """Returns the leftmost compound of a complex selector (the part before any combinator)."""
+    depth = 0
+    quote = None
+    for index, char in enumerate(selector):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char == '[':
+            depth += 1
+        elif char == ']':
+            depth -= 1
+        elif depth == 0 and (char.isspace() or char in '>+~'):
+            return selector[:index]
+    return selector
+
+
+class SimpleCompound:
+    """Matches a tag name and raw attributes against one simple compound selector."""
+
+    __slots__ = ('tag', 'classes', 'id', 'attributes')
+
+    def __init__(self, tag, classes, id, attributes):
+        self.tag = tag
+        self.classes = classes
+        self.id = id
+        self.attributes = attributes
+
+    @classmethod
+    def parse(cls, selector):
+        """Parses 'tag.class#id[attr op value]'; returns None for anything more complex."""
+        match = SIMPLE_COMPOUND_RE.match(selector.strip())
+        if match is None or not match.group(0):
+            return None
+        tag = match.group(1) if match.group(1) not in (None, '*') else None
+        parts = list(SIMPLE_PART_RE.finditer(match.group(2)))
+        if sum(len(part.group(0)) for part in parts) != len(match.group(2)):
+            return None
+        classes, id, attributes = [], None, []
+        for part in parts:
+            class_name, id_value, attribute, operator, *values = part.groups()
+            if class_name:
+                classes.append(class_name)
+            elif id_value:
+                id = id_value
+            else:
+                value = next((v for v in values if v is not None), None)
+                attributes.append((attribute.lower(), operator, value))
+        return cls(tag.lower() if tag else None, tuple(classes), id, tuple(attributes))
+
+    @staticmethod
+    def _value(attrs, name):
+        value = attrs.get(name)
+        if isinstance(value, (list, tuple)):
+            value = ' '.join(value)
+        return value
+
+    def matches(self, name, attrs):
+        if self.tag is not None and name.lower() != self.tag:
+            return False
+        if self.id is not None and self._value(attrs, 'id') != self.id:
+            return False
+        if self.classes:
+            present = (self._value(attrs, 'class') or '').split()
+            if not all(class_name in present for class_name in self.classes):
+                return False
+        for attribute, operator, expected in self.attributes:
+            value = self._value(attrs, attribute)
+            if value is None:
+                return False
+            if operator == '=' and value != expected:
+                return False
+            if operator == '~=' and expected not in value.split():
+                return False
+            if operator == '*=' and expected not in value:
+                return False
+            if operator == '^=' and not value.startswith(expected):
+                return False
+            if operator == '$=' and not value.endswith(expected):
+                return False
+            if operator == '|=' and value != expected and not value.startswith(expected + '-'):
+                return False
+        return True
+
+
+class ScopeFilter(ElementFilter or object):
+    """Parse-only filter that builds just the subtrees rooted at matching elements.
+
+    Everything outside those subtrees (including loose text) is dropped while
+    parsing, so it never costs tree-building time or memory.
+    """
+
+    def __init__(self, compounds):
+        super().__init__()
+        self.compounds = tuple(compounds)
+
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        attrs = attrs or {}
+        return any(compound.matches(name, attrs) for compound in self.compounds)
+
+    def allow_string_creation(self, string):
+        return False
+
+
+def scope_filter(selectors):
+    """Returns a ScopeFilter keeping the subtrees the selectors can match, or None.
+
+    Only the leftmost compound of each selector is needed: the rest of the selector
+    is matched inside the kept subtree. Selectors with pseudo-classes or other syntax
+    beyond tag/class/id/attribute tests cannot be scoped, so None is returned.
+    """
+    if ElementFilter is None:
+        return None
+    compounds = []
+    for selector_list in selectors:
+        for selector in selector_list.split(','):
+            compound = SimpleCompound.parse(_first_compound(selector.strip()))
+            if compound is None:
+                return None
+            compounds.append(compound)
+    return ScopeFilter(compounds) if compounds else None
+
+
+def _bs4_backend(features, module, scoped=True):
+    """Returns a BeautifulSoup parse function for the given tree builder."""
+    def parse(html, parse_only=None):
+        return BeautifulSoup(html, features, parse_only=parse_only if scoped else None)
+    parse.requires = module
+    parse.scoped = scoped and ElementFilter is not None
+    return parse
+
+
+def _parse_selectolax(html, parse_only=None):
+    """Parses with selectolax's lexbor engine (which always builds the whole tree)."""
+    return LexborDocument(LexborHTMLParser(html))
+
+
+_parse_selectolax.requires = 'selectolax'
+_parse_selectolax.scoped = False
+
+PARSER_BACKENDS = {
+    'html.parser': _bs4_backend('html.parser', None),
+    'lxml': _bs4_backend('lxml', 'lxml'),
+    'html5lib': _bs4_backend('html5lib', 'html5lib', scoped=False),
+    'selectolax': _parse_selectolax,
+}
+
+
+def available_parsers():
+    """Returns the names of backends whose dependencies are installed."""
+    names = []
+    for name, parse in PARSER_BACKENDS.items():
+        try:
+            if parse.requires:
+                importlib.import_module(parse.requires)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def get_parser(name=DEFAULT_PARSER):
+    """Returns the parse function for a backend name."""
+    parse = PARSER_BACKENDS.get(name)
+    if parse is None:
+        raise ValueError(f"Unknown parser backend '{name}'. Choose from: {', '.join(PARSER_BACKENDS)}")
+    if name not in available_parsers():
+        raise RuntimeError(f"Parser backend '{name}' requires the '{parse.requires}' package.")
+    return parse
@@ -0,0 +1,228 @@
+import json
+import os
+
+import soupsieve
+
+from scraper_details import DETAIL_FIELDS, DetailPlan
+from scraper_http import host_of
+from scraper_selectors import RATING_WORDS, SelectorPlan, compile_selectors
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+
+DEFAULT_PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'profiles')
+
+PROFILE_EXTENSIONS = ('.json', '.yaml', '.yml')
+
+PROFILE_KINDS = ('product', 'quote')
+
+SELECTOR_FIELDS = ('container', 'name', 'price', 'rating', 'quote_text', 'quote_author', 'detail_link')
+
+PROFILE_KEYS = frozenset(['name', 'domains', 'kind', 'selectors', 'attributes', 'rating_map', 'pagination',
+                          'rate_limit', 'concurrency', 'generic_fallback', 'detail'])
+
+
+class ProfileError(ValueError):
+    """Raised when a site profile file is malformed."""
+
+
+def _string_list(value, where):
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list) or not all(isinstance(item, str) and item.strip() for item in value):
+        raise ProfileError(f"{where} must be a selector string or a list of them")
+    return [item.strip() for item in value]
+
+
+def _selector_list(value, where):
+    selectors = _string_list(value, where)
+    for selector in selectors:
+        try:
+            soupsieve.compile(selector)
+        except Exception as e:
+            raise ProfileError(f"{where}: invalid selector '{selector}': {e}")
+    return selectors
+
+
+def _positive_number(value, where):
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+        raise ProfileError(f"{where} must be a positive number")
+    return value
+
+
+class SiteProfile:
+    """A validated, precompiled per-site extraction profile.
+
+    ``selectors`` maps fields (see SELECTOR_FIELDS) to CSS selectors tried in order,
+    ``attributes`` maps fields to the attribute read instead of the element text,
+    ``rating_map`` maps rating words to numbers and ``pagination`` lists next-page
+    link selectors. ``detail`` maps detail page fields (see scraper_details.DETAIL_FIELDS)
+    to selectors used when rows are enriched from their detail pages.
+    ``rate_limit`` (requests per second) and ``concurrency`` override the per-host
+    limits. The generic selector cascade is skipped unless ``generic_fallback`` is true.
+    """
+
+    def __init__(self, data, source='<profile>', log=None):
+        if not isinstance(data, dict):
+            raise ProfileError(f"{source}: a profile must be a mapping")
+        unknown = set(data) - PROFILE_KEYS
+        if unknown:
+            raise ProfileError(f"{source}: unknown profile key(s): {', '.join(sorted(unknown))}")
+        self.source = source
+        self.domains = [domain.lower().lstrip('.') for domain in _string_list(data.get('domains'), f"{source}: domains")]
+        if not self.domains:
+            raise ProfileError(f"{source}: domains must list at least one domain")
+        self.name = data.get('name') or self.domains[0]
+        self.kind = data.get('kind', 'product')
+        if self.kind not in PROFILE_KINDS:
+            raise ProfileError(f"{source}: kind must be one of {', '.join(PROFILE_KINDS)}")
+
+        selectors = data.get('selectors') or {}
+        if not isinstance(selectors, dict):
+            raise ProfileError(f"{source}: selectors must be a mapping")
+        for field in selectors:
+            if field not in SELECTOR_FIELDS:
+                raise ProfileError(f"{source}: unknown selector field '{field}'")
+        self.selectors = {field: _selector_list(value, f"{source}: selectors.{field}")
+                          for field, value in selectors.items()}
+        if not self.selectors.get('container'):
+            raise ProfileError(f"{source}: selectors.container is required")
+
+        attributes = data.get('attributes') or {}
+        if not isinstance(attributes, dict) or not all(
+                field in SELECTOR_FIELDS[1:] + DETAIL_FIELDS and isinstance(attribute, str)
+                for field, attribute in attributes.items()):
+            raise ProfileError(f"{source}: attributes must map field names to attribute names")
+        self.attributes = dict(attributes)
+
+        rating_map = data.get('rating_map')
+        if rating_map is not None:
+            if not isinstance(rating_map, dict) or not rating_map:
+                raise ProfileError(f"{source}: rating_map must be a non-empty mapping")
+            rating_map = {str(word).lower(): str(value) for word, value in rating_map.items()}
+        self.rating_map = rating_map or RATING_WORDS
+
+        detail = data.get('detail') or {}
+        if not isinstance(detail, dict):
+            raise ProfileError(f"{source}: detail must be a mapping")
+        for field in detail:
+            if field not in DETAIL_FIELDS:
+                raise ProfileError(f"{source}: unknown detail field '{field}'")
+        self.detail = {field: _selector_list(value, f"{source}: detail.{field}") for field, value in detail.items()}
+
+        pagination = data.get('pagination')
+        self.pagination = _selector_list(pagination, f"{source}: pagination") if pagination is not None else None
+        self.rate_limit = _positive_number(data.get('rate_limit'), f"{source}: rate_limit")
+        concurrency = _positive_number(data.get('concurrency'), f"{source}: concurrency")
+        self.concurrency = int(concurrency) if concurrency else None
+        self.generic_fallback = bool(data.get('generic_fallback', False))
+
+        self.plan = SelectorPlan(self.selectors, self.kind == 'quote', log, self.generic_fallback,
+                                 self.attributes, self.rating_map)
+        self.next_page = compile_selectors(self.pagination, log) if self.pagination else None
+        self.detail_plan = DetailPlan(self.detail, self.attributes, self.generic_fallback, log)
+
+    def __repr__(self):
+        return f"SiteProfile({self.name!r}, domains={self.domains!r})"
+
+
+def _read_profile_file(path):
+    """Returns the list of raw profile mappings stored in a JSON or YAML file."""
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, encoding='utf-8') as handle:
+        if extension == '.json':
+            try:
+                data = json.load(handle)
+            except ValueError as e:
+                raise ProfileError(f"{path}: invalid JSON: {e}")
+        else:
+            if yaml is None:
+                raise RuntimeError(f"Reading {path} requires PyYAML (pip install pyyaml).")
+            try:
+                data = yaml.safe_load(handle)
+            except yaml.YAMLError as e:
+                raise ProfileError(f"{path}: invalid YAML: {e}")
+    if isinstance(data, dict) and 'profiles' in data:
+        data = data['profiles']
+    return data if isinstance(data, list) else [data]
+
+
+def profile_files(paths):
+    """Expands files and directories into the profile files they contain, sorted by name."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                         if name.lower().endswith(PROFILE_EXTENSIONS))
+        else:
+            files.append(path)
+    return files
+
+
+def load_profiles(paths, log=None, skip_invalid=False):
+    """Loads, validates and compiles every profile in the given files or directories.
+
+    With ``skip_invalid`` a malformed file or profile is logged as an error and left
+    out instead of raising ProfileError.
+    """
+    profiles = []
+    for path in profile_files(paths):
+        try:
+            entries = _read_profile_file(path)
+        except ProfileError as e:
+            if not skip_invalid:
+                raise
+            if log is not None:
+                log(f"ERROR: skipping site profile file - {e}", is_error=True)
+            continue
+        for index, data in enumerate(entries):
+            try:
+                profiles.append(SiteProfile(data, f"{path}[{index}]" if index else path, log))
+            except ProfileError as e:
+                if not skip_invalid:
+                    raise
+                if log is not None:
+                    log(f"ERROR: skipping site profile - {e}", is_error=True)
+    return profiles
+
+
+class ProfileRegistry:
+    """Indexes site profiles by domain for constant-time lookup per URL.
+
+    A profile for ``example.com`` also applies to its subdomains; the most specific
+    domain wins. Later profiles override earlier ones for the same domain.
+    """
+
+    def __init__(self, profiles=()):
+        self.profiles = list(profiles)
+        self._by_domain = {}
+        for profile in self.profiles:
+            for domain in profile.domains:
+                self._by_domain[domain] = profile
+
+    @classmethod
+    def from_paths(cls, paths, log=None, skip_invalid=False):
+        """Builds a registry from profile files or directories (see load_profiles)."""
+        return cls(load_profiles(paths, log, skip_invalid))
+
+    def __len__(self):
+        return len(self.profiles)
+
+    def lookup_host(self, host):
+        """Returns the profile for a host name (or a parent domain of it), or None."""
+        host = host.lower()
+        while host:
+            profile = self._by_domain.get(host)
+            if profile is not None:
+                return profile
+            host = host.partition('.')[2]
+        return None
+
+    def lookup(self, url):
+        """Returns the profile for a URL's host, or None."""
+        return self.lookup_host(host_of(url).split(':')[0])
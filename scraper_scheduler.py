@@ -0,0 +1,284 @@
+import heapq
+import itertools
+import math
+import re
+import threading
+import time
+import urllib.robotparser
+from urllib.parse import urlsplit
+
+import requests
+
+from scraper_http import host_of
+
+
+ROBOTS_TTL = 24 * 3600.0
+
+# Robots rules that could not be fetched (5xx, network errors) block the host this long.
+ROBOTS_ERROR_TTL = 300.0
+
+MAX_CRAWL_DELAY = 60.0
+
+# urllib.robotparser only understands whole-second Crawl-delay values.
+FRACTIONAL_DELAY_RE = re.compile(r'^(\s*crawl-delay\s*:\s*)([0-9]*\.[0-9]+)', re.IGNORECASE)
+
+LATENCY_ALPHA = 0.2
+LATENCY_FACTOR = 2.0
+LATENCY_SLACK = 0.1
+MIN_LATENCY_SAMPLES = 5
+BACKOFF_STEP = 0.25
+MAX_BACKOFF_DELAY = 30.0
+RECOVERY_FACTOR = 0.8
+
+
+class RobotsDisallowedError(PermissionError):
+    """Raised when robots.txt forbids fetching a URL."""
+
+
+def _robots_lines(text):
+    """Splits robots.txt into lines, rounding fractional Crawl-delay values up to whole seconds."""
+    return [FRACTIONAL_DELAY_RE.sub(lambda match: f"{match.group(1)}{math.ceil(float(match.group(2)))}", line)
+            for line in text.splitlines()]
+
+
+def robots_url(url):
+    """Returns the robots.txt URL of a page's scheme and host."""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}/robots.txt"
+
+
+class RobotsCache:
+    """Fetches, caches and answers robots.txt rules per scheme and host.
+
+    Follows RFC 9309: a 4xx robots.txt allows everything, while a 5xx or an
+    unreachable host disallows the whole site until ROBOTS_ERROR_TTL has passed.
+    Crawl-delay (or Request-rate) is capped at ``max_delay`` seconds.
+    """
+
+    def __init__(self, http, user_agent=None, ttl=ROBOTS_TTL, max_delay=MAX_CRAWL_DELAY, log=None):
+        self.http = http
+        self.user_agent = user_agent or http.session.headers.get('User-Agent', '*')
+        self.ttl = ttl
+        self.max_delay = max_delay
+        self.log = log
+        self._lock = threading.Lock()
+        self._host_locks = {}
+        self._rules = {}
+
+    def _cached(self, key):
+        entry = self._rules.get(key)
+        if entry is not None and entry[1] > time.monotonic():
+            return entry[0]
+        return None
+
+    def known(self, url):
+        """Returns True if the rules for the URL's host are loaded and fresh (never blocks)."""
+        return self._cached(robots_url(url)) is not None
+
+    def rules(self, url):
+        """Returns the RobotFileParser for the URL's host, fetching robots.txt once per TTL."""
+        key = robots_url(url)
+        parser = self._cached(key)
+        if parser is not None:
+            return parser
+        with self._lock:
+            host_lock = self._host_locks.setdefault(key, threading.Lock())
+        with host_lock:
+            parser = self._cached(key)
+            if parser is None:
+                parser, ttl = self._fetch(key)
+                self._rules[key] = (parser, time.monotonic() + ttl)
+            return parser
+
+    def _fetch(self, key):
+        """Downloads and parses one robots.txt; returns (parser, ttl)."""
+        parser = urllib.robotparser.RobotFileParser(key)
+        try:
+            response = self.http.get(key)
+        except requests.exceptions.RequestException as e:
+            status = None
+            reason = str(e)
+        else:
+            status = response.status_code
+            reason = f"HTTP {status}"
+        if status is not None and status < 400:
+            parser.parse(_robots_lines(response.text))
+            return parser, self.ttl
+        if status is not None and status < 500:
+            parser.allow_all = True
+            return parser, self.ttl
+        if self.log:
+            self.log(f"robots.txt unavailable ({reason}); not crawling {key.rsplit('/', 1)[0]} for now.",
+                     is_error=True)
+        parser.disallow_all = True
+        return parser, ROBOTS_ERROR_TTL
+
+    def allowed(self, url):
+        """Returns True if robots.txt lets our user agent fetch the URL."""
+        return self.rules(url).can_fetch(self.user_agent, url)
+
+    def crawl_delay(self, url):
+        """Returns the host's Crawl-delay (or Request-rate interval) in seconds, if the rules are loaded."""
+        parser = self._cached(robots_url(url))
+        if parser is None:
+            return None
+        delay = parser.crawl_delay(self.user_agent)
+        rate = parser.request_rate(self.user_agent)
+        if rate is not None and rate.requests:
+            delay = max(float(delay or 0), rate.seconds / rate.requests)
+        if delay is None:
+            return None
+        return min(float(delay), self.max_delay)
+
+
+class HostBackoff:
+    """Adaptive per-host delay that grows when a host slows down or fails and decays when it recovers.
+
+    Each response updates a moving average of the host's latency. Errors (connection
+    failures, 429, 5xx) double the delay, to at least the server's Retry-After; an
+    average more than LATENCY_SLACK seconds above LATENCY_FACTOR times the best
+    average seen so far raises it by half; healthy responses shrink it again.
+    """
+
+    def __init__(self, max_delay=MAX_BACKOFF_DELAY):
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def record(self, host, latency, error=False, retry_after=None):
+        """Feeds one request attempt's latency (seconds) and outcome into the host's delay."""
+        with self._lock:
+            entry = self._hosts.get(host)
+            if entry is None:
+                entry = self._hosts[host] = {'average': latency, 'baseline': None, 'samples': 0,
+                                             'delay': 0.0, 'errors': 0, 'slowdowns': 0}
+            entry['samples'] += 1
+            entry['average'] += LATENCY_ALPHA * (latency - entry['average'])
+            if error:
+                entry['errors'] += 1
+                entry['delay'] = min(self.max_delay, max(entry['delay'] * 2, BACKOFF_STEP, retry_after or 0.0))
+                return
+            baseline = entry['baseline']
+            if baseline is not None and entry['average'] > baseline * LATENCY_FACTOR + LATENCY_SLACK:
+                entry['slowdowns'] += 1
+                entry['delay'] = min(self.max_delay, max(entry['delay'] * 1.5, BACKOFF_STEP))
+            else:
+                entry['delay'] *= RECOVERY_FACTOR
+                if entry['delay'] < 0.01:
+                    entry['delay'] = 0.0
+            if entry['samples'] >= MIN_LATENCY_SAMPLES:
+                entry['baseline'] = entry['average'] if baseline is None else min(baseline, entry['average'])
+
+    def delay(self, host):
+        """Returns the extra seconds to leave between requests to the host."""
+        with self._lock:
+            entry = self._hosts.get(host)
+            return entry['delay'] if entry is not None else 0.0
+
+    def snapshot(self):
+        """Returns a copy of the per-host latency averages, delays and error counts."""
+        with self._lock:
+            return {host: dict(entry) for host, entry in self._hosts.items()}
+
+
+class _HostQueue:
+    __slots__ = ('heap', 'in_flight', 'last_time')
+
+    def __init__(self):
+        self.heap = []
+        self.in_flight = 0
+        self.last_time = None
+
+    def due(self, now, interval):
+        """Seconds until the host's interval since its last dispatch has passed (0 if it has)."""
+        return 0.0 if self.last_time is None else max(0.0, self.last_time + interval - now)
+
+
+class CrawlScheduler:
+    """Per-host priority queues dispatched round-robin across hosts.
+
+    ``host_policy(url)`` returns (max_concurrency, min_interval) for the URL's host;
+    it is asked on every dispatch and the interval counts from the host's last
+    dispatch, so robots.txt delays and adaptive backoff take effect immediately.
+    pop() hands out the lowest-priority-number URL of the next host, in turn, that
+    has a free slot and whose interval has passed, so one slow or throttled host
+    never holds up the others. Thread-safe.
+    """
+
+    def __init__(self, host_policy):
+        self.host_policy = host_policy
+        self._lock = threading.Lock()
+        self._hosts = {}
+        self._order = []
+        self._turn = 0
+        self._sequence = itertools.count()
+        self._queued = 0
+
+    def __len__(self):
+        return self._queued
+
+    def push(self, url, page_number=1, priority=None):
+        """Queues a URL; lower priority numbers go first within its host (default: page_number)."""
+        host = host_of(url)
+        with self._lock:
+            queue = self._hosts.get(host)
+            if queue is None:
+                queue = self._hosts[host] = _HostQueue()
+                self._order.append(host)
+            heapq.heappush(queue.heap, (page_number if priority is None else priority,
+                                        next(self._sequence), url, page_number))
+            self._queued += 1
+
+    def pop(self, max_priority=None):
+        """Returns the next dispatchable (url, page_number), or None if no host is ready yet.
+
+        With ``max_priority``, hosts whose next URL has a higher priority number are skipped.
+        """
+        now = time.monotonic()
+        with self._lock:
+            count = len(self._order)
+            for offset in range(count):
+                host = self._order[(self._turn + offset) % count]
+                queue = self._hosts[host]
+                if not queue.heap or (max_priority is not None and queue.heap[0][0] > max_priority):
+                    continue
+                concurrency, interval = self.host_policy(queue.heap[0][2])
+                if queue.in_flight >= concurrency or queue.due(now, interval):
+                    continue
+                _, _, url, page_number = heapq.heappop(queue.heap)
+                queue.in_flight += 1
+                queue.last_time = now
+                self._queued -= 1
+                self._turn = (self._turn + offset + 1) % count
+                return url, page_number
+            return None
+
+    def release(self, url):
+        """Frees the host slot taken by pop() once the URL's download has finished."""
+        with self._lock:
+            queue = self._hosts.get(host_of(url))
+            if queue is not None and queue.in_flight:
+                queue.in_flight -= 1
+
+    def wait_time(self, max_priority=None):
+        """Returns seconds until a queued host with a free slot is due (0 if one is), or None if none is.
+
+        Hosts whose slots are all taken are skipped: release() frees them. ``max_priority``
+        skips hosts as in pop().
+        """
+        now = time.monotonic()
+        with self._lock:
+            waits = []
+            for queue in self._hosts.values():
+                if queue.heap and (max_priority is None or queue.heap[0][0] <= max_priority):
+                    concurrency, interval = self.host_policy(queue.heap[0][2])
+                    if queue.in_flight < concurrency:
+                        waits.append(queue.due(now, interval))
+            return min(waits) if waits else None
+
+    def clear(self):
+        """Drops every queued URL."""
+        with self._lock:
+            for queue in self._hosts.values():
+                queue.heap = []
+            self._queued = 0
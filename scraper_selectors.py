@@ -0,0 +1,519 @@
+import re
+import threading
+import time
+
+import soupsieve
+from bs4.element import Tag
+
+
+GENERIC_CONTAINER_SELECTORS = (
+    'article.product_pod',
+    'div.product-grid-item',
+    'li.product-item',
+    'div.product-card',
+    'article.product',
+    'div[data-component-type="s-search-result"]',
+    '.s-result-item',
+    '.product-layout .product-thumb',
+    '.item-row',
+    '.result-item',
+    '[class*="product"]',
+    '[id*="product"]',
+    '[data-test*="product"]',
+    '.col-md-4.col-sm-6.col-xl-3'
+)
+
+GENERIC_NAME_SELECTORS = (
+    'h3 a',
+    'h2.product-title a',
+    'a.product-name',
+    'span.a-size-medium.a-color-base.a-text-normal',
+    'a.s-link-style span.a-text-normal',
+    '.caption h4 a',
+    'h1[itemprop="name"]',
+    'h2', 'h3', 'h4',
+    'a[title]',
+    '.title', '.name', '.product-name', '.item-name'
+)
+
+GENERIC_PRICE_SELECTORS = (
+    'p.price_color',
+    'span.product-price',
+    'span.a-price-whole',
+    'span.a-offscreen',
+    '.price .price-new',
+    '.price', '.amount', '.current-price', '.display-price', '.sale-price',
+    'strong.price',
+    'span[data-a-color="price"]'
+)
+
+GENERIC_RATING_SELECTORS = (
+    'p.star-rating',
+    'div.star-rating span.rating-value',
+    'span.a-icon-alt',
+    'div.rating span.fa-star.active',
+    '.rating', '.stars', '[class*="rating"]', 'i[class*="star"]'
+)
+
+GENERIC_QUOTE_CONTAINER_SELECTORS = ('div.quote',)
+GENERIC_QUOTE_TEXT_SELECTORS = ('span.text', 'div.quote-content')
+GENERIC_QUOTE_AUTHOR_SELECTORS = ('small.author', '.quote-author')
+
+# Only title links: the first link of a card is as often add-to-cart, brand or category.
+GENERIC_DETAIL_LINK_SELECTORS = (
+    'h3 a[href]', 'h2 a[href]', 'a.product-link[href]', 'a[itemprop="url"][href]',
+    '.product-title a[href]', '.product-name a[href]'
+)
+
+RATING_WORDS = {'one': '1', 'two': '2', 'three': '3', 'four': '4', 'five': '5'}
+
+PRICE_STRIP_RE = re.compile(r'[^\d.,]+')
+RATING_NUMBER_RE = re.compile(r'(\d+\.?\d*)')
+ACTIVE_STAR_RE = re.compile(r'fa-star|active|filled', re.IGNORECASE)
+PRICE_FRACTION_SELECTOR = ('span.a-price-fraction', soupsieve.compile('span.a-price-fraction'))
+
+CONTENT_PREVIEW_LIMIT = 500
+CONTAINER_LIMIT = 100
+
+ROW_KEYS = ('Name', 'Price', 'Rating', 'Quote', 'Author')
+
+
+def compile_selectors(selectors, log=None):
+    """Compiles CSS selectors once, dropping duplicates and invalid ones.
+
+    Returns a tuple of (selector_text, compiled) pairs in priority order.
+    """
+    compiled = []
+    seen = set()
+    for selector in selectors:
+        if selector in seen:
+            continue
+        seen.add(selector)
+        try:
+            compiled.append((selector, soupsieve.compile(selector)))
+        except Exception as e:
+            if log:
+                log(f"Skipping invalid selector '{selector}': {e}", is_error=True)
+    return tuple(compiled)
+
+
+class SelectorPlan:
+    """Immutable, precompiled selector strategy for one site (or the generic fallback).
+
+    Site selectors are tried before the generic cascade; with ``generic_fallback=False``
+    (the default for site profiles) only the site's own selectors are used.
+    ``attributes`` maps a field to an attribute to read instead of the element text,
+    and ``rating_map`` replaces the star-class word map. Detail page links use the
+    generic selectors whenever the site lists none of its own.
+    """
+
+    __slots__ = ('site_container', 'container', 'name', 'price', 'rating',
+                 'quote_container', 'quote_text', 'quote_author', 'detail_link', 'is_quote_site',
+                 'attributes', 'rating_map')
+
+    def __init__(self, site_selectors=None, is_quote_site=False, log=None, generic_fallback=True,
+                 attributes=None, rating_map=None):
+        site = site_selectors or {}
+
+        def merged(field, generic):
+            return compile_selectors(list(site.get(field) or []) + list(generic if generic_fallback else ()), log)
+
+        if site.get('container') and is_quote_site:
+            quote_containers = site['container']
+        else:
+            quote_containers = GENERIC_QUOTE_CONTAINER_SELECTORS if generic_fallback else ()
+        values = {
+            'site_container': compile_selectors(site.get('container') or [], log) if not is_quote_site else (),
+            'container': merged('container', GENERIC_CONTAINER_SELECTORS) if not is_quote_site or generic_fallback else (),
+            'name': merged('name', GENERIC_NAME_SELECTORS),
+            'price': merged('price', GENERIC_PRICE_SELECTORS),
+            'rating': merged('rating', GENERIC_RATING_SELECTORS),
+            'quote_container': compile_selectors(quote_containers, log),
+            'quote_text': compile_selectors(site.get('quote_text') or
+                                            (GENERIC_QUOTE_TEXT_SELECTORS if generic_fallback else ()), log),
+            'quote_author': compile_selectors(site.get('quote_author') or
+                                              (GENERIC_QUOTE_AUTHOR_SELECTORS if generic_fallback else ()), log),
+            'detail_link': (merged('detail_link', GENERIC_DETAIL_LINK_SELECTORS) if site.get('detail_link')
+                            else compile_selectors(GENERIC_DETAIL_LINK_SELECTORS, log)),
+            'is_quote_site': bool(is_quote_site),
+            'attributes': dict(attributes or {}),
+            'rating_map': dict(rating_map) if rating_map else RATING_WORDS,
+        }
+        for key, value in values.items():
+            object.__setattr__(self, key, value)
+
+    def __setattr__(self, key, value):
+        raise AttributeError("SelectorPlan is immutable")
+
+
+class SelectorMemory:
+    """Remembers which selector won per key (plan and host) and field, so later pages try it first."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._winners = {}
+
+    def preferred(self, key):
+        """Returns {field: selector_text} of the winners recorded for the key."""
+        with self._lock:
+            return dict(self._winners.get(key, {}))
+
+    def remember(self, key, winners):
+        """Records the most frequent winner of each field from one page."""
+        if not winners:
+            return
+        best = {field: max(counts, key=counts.get) for field, counts in winners.items() if counts}
+        with self._lock:
+            self._winners.setdefault(key, {}).update(best)
+
+
+class SelectorStats:
+    """Per-page selector attempts, matches, errors and time, keyed by (field, selector).
+
+    Not thread-safe: use one per page and merge it (see RunMetrics.merge_selectors).
+    """
+
+    __slots__ = ('entries', 'stages')
+
+    def __init__(self):
+        self.entries = {}
+        self.stages = {}
+
+    def _run(self, field, selector, func, *args):
+        entry = self.entries.get((field, selector[0]))
+        if entry is None:
+            entry = self.entries[(field, selector[0])] = [0, 0, 0, 0.0]
+        start = time.perf_counter()
+        try:
+            found = func(*args)
+        except Exception:
+            entry[2] += 1
+            raise
+        finally:
+            entry[0] += 1
+            entry[3] += time.perf_counter() - start
+        if found:
+            entry[1] += 1
+        return found
+
+    def select_one(self, field, node, selector):
+        """select_one that records the attempt under the field."""
+        return self._run(field, selector, select_one, node, selector)
+
+    def select(self, field, node, selector, limit=None):
+        """select that records the attempt under the field."""
+        return self._run(field, selector, select, node, selector, limit)
+
+
+def _finder(stats, field):
+    """Returns select_one, or a variant recording attempts for the field when stats are kept."""
+    if stats is None:
+        return select_one
+    return lambda node, selector: stats.select_one(field, node, selector)
+
+
+def select_one(node, selector):
+    """Runs a compiled (text, pattern) selector; non-bs4 backends get the selector text."""
+    if isinstance(node, Tag):
+        return selector[1].select_one(node)
+    return node.select_one(selector[0])
+
+
+def select(node, selector, limit=None):
+    """Like select_one, but returns all matches up to limit."""
+    if isinstance(node, Tag):
+        return selector[1].select(node, limit=limit or 0)
+    return node.select(selector[0], limit=limit)
+
+
+def _select_field(field, node, selector, limit=None):
+    """select() with the SelectorStats.select signature."""
+    return select(node, selector, limit)
+
+
+def _prefer(selectors, preferred_text):
+    """Moves the selector matching preferred_text to the front."""
+    if preferred_text is None:
+        return selectors
+    for index, (text, _) in enumerate(selectors):
+        if text == preferred_text:
+            return (selectors[index],) + selectors[:index] + selectors[index + 1:]
+    return selectors
+
+
+def _win(winners, field, selector_text):
+    """Counts a selector win for the field."""
+    counts = winners.setdefault(field, {})
+    counts[selector_text] = counts.get(selector_text, 0) + 1
+
+
+def _select_capped(soup, selector, limit, log, stats=None):
+    """Returns up to ``limit`` matches (all with a falsy limit), logging when more were dropped."""
+    find = stats.select if stats is not None else _select_field
+    if not limit:
+        return find('container', soup, selector)
+    found = find('container', soup, selector, limit + 1)
+    if len(found) > limit:
+        log(f"More than {limit} containers match '{selector[0]}'; keeping the first {limit}. "
+            f"Raise the container limit to keep more.", is_error=True)
+        del found[limit:]
+    return found
+
+
+def _preview_text(body, limit=CONTENT_PREVIEW_LIMIT):
+    """Joins the body's stripped strings, reading only as many as the preview needs."""
+    parts = []
+    length = -1
+    for text in body.stripped_strings:
+        parts.append(text)
+        length += len(text) + 1
+        if length > limit:
+            return ' '.join(parts)[:limit] + '...'
+    return ' '.join(parts)
+
+
+def _unique(containers):
+    """Drops containers with the same markup as an earlier one while keeping their order.
+
+    Tag.__hash__ serializes the whole subtree, so each container is hashed once.
+    """
+    if len(containers) < 2:
+        return containers
+    seen_containers = set()
+    unique_containers = []
+    for container in containers:
+        key = hash(container)
+        if key not in seen_containers:
+            unique_containers.append(container)
+            seen_containers.add(key)
+    return unique_containers
+
+
+def _clean_price(found_price_text):
+    """Strips currency symbols and resolves thousands/decimal separators."""
+    price = PRICE_STRIP_RE.sub('', found_price_text).strip()
+    if price.count(',') > 1 and '.' in price:
+        price = price.replace(',', '')
+    elif price.count('.') > 1 and ',' in price:
+        price = price.replace('.', '').replace(',', '.')
+    elif price.startswith('.'):
+        price = '0' + price
+    return price
+
+
+def _element_text(element, attribute=None):
+    """Returns the element's stripped text, or the stripped value of ``attribute``."""
+    if attribute is None:
+        return element.get_text(strip=True)
+    value = element.get(attribute)
+    if isinstance(value, list):
+        value = ' '.join(value)
+    return value.strip() if value else ''
+
+
+def _price_text(container, price_element):
+    """Returns the raw price text for a matched price element."""
+    classes = price_element.get('class', [])
+    if 'a-offscreen' in classes:
+        return price_element.get_text(strip=True)
+    if price_element.name == 'span' and ('a-price-whole' in classes or 'price' in classes):
+        whole_part = price_element.get_text(strip=True)
+        fraction_element = select_one(container, PRICE_FRACTION_SELECTOR)
+        fraction_part = fraction_element.get_text(strip=True) if fraction_element else ''
+        return f"{whole_part}{fraction_part}" if fraction_part else whole_part
+    return price_element.get_text(strip=True)
+
+
+def _rating_text(rating_element, rating_map=RATING_WORDS):
+    """Returns the raw rating text for a matched rating element."""
+    classes = rating_element.get('class', [])
+    if 'star-rating' in classes:
+        if len(classes) > 1:
+            return rating_map.get(classes[1].lower(), "N/A")
+        return None
+    if 'a-icon-alt' in classes:
+        return rating_element.get_text(strip=True)
+    if 'rating' in classes and rating_element.name == 'div':
+        active_stars = rating_element.find_all(class_=ACTIVE_STAR_RE)
+        if active_stars:
+            return f"{len(active_stars)} stars"
+    return rating_element.get_text(strip=True)
+
+
+def _mapped_rating(text, rating_map):
+    """Maps the first rating word in an attribute value (e.g. "star-rating Three") to its number."""
+    for word in text.lower().split():
+        if word in rating_map:
+            return rating_map[word]
+    return text
+
+
+def _first_text(container, selectors, field, winners, attribute=None, find=select_one):
+    """Returns the stripped text (or attribute) of the first selector that matches, or None."""
+    for selector in selectors:
+        element = find(container, selector)
+        if element:
+            _win(winners, field, selector[0])
+            return _element_text(element, attribute)
+    return None
+
+
+def find_containers(plan, soup, log, preferred, limit=CONTAINER_LIMIT, stats=None):
+    """Returns the item containers for the page, trying site, generic, then quote selectors."""
+    winners = {}
+    containers = []
+
+    if plan.site_container:
+        log(f"Attempting to find product containers using site-specific selector(s): {[text for text, _ in plan.site_container]}")
+        for selector in _prefer(plan.site_container, preferred.get('container')):
+            found_specific = _select_capped(soup, selector, limit, log, stats)
+            if found_specific:
+                log(f"Successfully found containers with specific selector: '{selector[0]}'")
+                containers.extend(found_specific)
+                _win(winners, 'container', selector[0])
+                break
+
+    if not containers:
+        log("No site-specific product containers found or not applicable. Trying general product selectors.")
+        for selector in _prefer(plan.container, preferred.get('container')):
+            found = _select_capped(soup, selector, limit, log, stats)
+            if found:
+                log(f"Found containers using general selector: '{selector[0]}'")
+                containers.extend(found)
+                _win(winners, 'container', selector[0])
+                break
+
+    containers = _unique(containers)
+
+    if not containers:
+        log("No common product containers found. Attempting to find quote containers.", is_error=False)
+        for selector in plan.quote_container:
+            found = _select_capped(soup, selector, limit, log, stats)
+            if found:
+                log(f"Found quote containers using selector: '{selector[0]}'")
+                containers.extend(found)
+                break
+        containers = _unique(containers)
+
+    return containers, winners
+
+
+def extract_rows(plan, soup, log, preferred=None, container_limit=CONTAINER_LIMIT, stats=None, raw=False,
+                 links=False):
+    """Extracts product-like rows (name, price, rating), quotes, or general content.
+
+    Returns (rows, winners) where winners counts the selector that matched per field.
+    At most ``container_limit`` items are taken per page (no cap if falsy). With a
+    SelectorStats, every selector attempt and the container/field stage times are recorded.
+    With ``raw=True`` price and rating are left as found (currency symbols and all) for
+    a later batch normalization stage (see scraper_normalize.Normalizer). With
+    ``links=True`` product rows also get 'URL', the (unresolved) href of the item's
+    detail page link, which identifies the product (see scraper_state, scraper_sinks
+    and scraper_details).
+    """
+    preferred = preferred or {}
+    extracted_data = []
+    start = time.perf_counter()
+    containers, winners = find_containers(plan, soup, log, preferred, container_limit, stats)
+    if stats is not None:
+        stats.stages['select_containers'] = time.perf_counter() - start
+        start = time.perf_counter()
+
+    if not containers:
+        log("No specific item containers found. Attempting to extract general page content.", is_error=False)
+        body_text = _preview_text(soup.body) if soup.body else ''
+        if body_text:
+            extracted_data.append({'Content': body_text})
+        return extracted_data, winners
+
+    log(f"Processing {len(containers)} detected items.")
+    find_name = _finder(stats, 'name')
+    find_price = _finder(stats, 'price')
+    find_rating = _finder(stats, 'rating')
+    find_quote_text = _finder(stats, 'quote_text')
+    find_quote_author = _finder(stats, 'quote_author')
+    find_detail_link = _finder(stats, 'detail_link')
+
+    name_selectors = _prefer(plan.name, preferred.get('name'))
+    price_selectors = _prefer(plan.price, preferred.get('price'))
+    rating_selectors = _prefer(plan.rating, preferred.get('rating'))
+    quote_text_selectors = _prefer(plan.quote_text, preferred.get('quote_text'))
+    quote_author_selectors = _prefer(plan.quote_author, preferred.get('quote_author'))
+    detail_link_selectors = _prefer(plan.detail_link, preferred.get('detail_link'))
+    attributes = plan.attributes
+
+    for container in containers:
+        item_data = {}
+
+        if plan.is_quote_site or 'quote' in container.get('class', []):
+            quote = _first_text(container, quote_text_selectors, 'quote_text', winners, attributes.get('quote_text'),
+                                find_quote_text)
+            if quote is not None:
+                item_data['Quote'] = quote
+            author = _first_text(container, quote_author_selectors, 'quote_author', winners,
+                                 attributes.get('quote_author'), find_quote_author)
+            if author is not None:
+                item_data['Author'] = author
+            if 'Quote' in item_data:
+                extracted_data.append(item_data)
+                continue
+
+        name = "N/A"
+        for selector in name_selectors:
+            name_element = find_name(container, selector)
+            if name_element:
+                name = _element_text(name_element, attributes.get('name'))
+                if name:
+                    _win(winners, 'name', selector[0])
+                    break
+        item_data['Name'] = name
+
+        price = "N/A"
+        found_price_text = None
+        for selector in price_selectors:
+            price_element = find_price(container, selector)
+            if price_element:
+                if 'price' in attributes:
+                    found_price_text = _element_text(price_element, attributes['price'])
+                else:
+                    found_price_text = _price_text(container, price_element)
+                if found_price_text:
+                    _win(winners, 'price', selector[0])
+                    break
+        if found_price_text and found_price_text != "N/A":
+            price = found_price_text if raw else _clean_price(found_price_text)
+        item_data['Price'] = price
+
+        rating = "N/A"
+        found_rating_text = None
+        for selector in rating_selectors:
+            rating_element = find_rating(container, selector)
+            if rating_element:
+                if 'rating' in attributes:
+                    found_rating_text = _mapped_rating(_element_text(rating_element, attributes['rating']),
+                                                       plan.rating_map)
+                else:
+                    found_rating_text = _rating_text(rating_element, plan.rating_map)
+                if found_rating_text:
+                    _win(winners, 'rating', selector[0])
+                    break
+        if found_rating_text and found_rating_text != "N/A" and raw:
+            rating = found_rating_text
+        elif found_rating_text and found_rating_text != "N/A":
+            match = RATING_NUMBER_RE.search(found_rating_text)
+            rating = match.group(1) if match else found_rating_text
+        item_data['Rating'] = rating
+
+        if links:
+            href = _first_text(container, detail_link_selectors, 'detail_link', winners,
+                               attributes.get('detail_link', 'href'), find_detail_link)
+            if href:
+                item_data['URL'] = href
+
+        if any(val != "N/A" for key, val in item_data.items() if key in ROW_KEYS):
+            extracted_data.append(item_data)
+            log(f"Extracted: {item_data}")
+
+    if stats is not None:
+        stats.stages['select_fields'] = time.perf_counter() - start
+    return extracted_data, winners
@@ -0,0 +1,409 @@
+import csv
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+PREFERRED_HEADERS = ['Name', 'Price', 'Rating']
+
+# Row keys the extractor can emit, and the typed column each maps to.
+TYPED_FIELDS = [
+    ('Name', 'name', 'text'),
+    ('Price', 'price', 'number'),
+    ('Rating', 'rating', 'number'),
+    ('Quote', 'quote', 'text'),
+    ('Author', 'author', 'text'),
+    ('Content', 'content', 'text'),
+]
+TYPED_KEYS = frozenset(key for key, _, _ in TYPED_FIELDS)
+
+# The product (detail page) link comes first: listing titles are often truncated and shared.
+DEFAULT_KEY_FIELDS = ('URL', 'Name', 'Quote', 'Author', 'Content')
+
+DECIMAL_COMMA_RE = re.compile(r'^\d+,\d{1,2}$')
+
+
+def order_headers(rows):
+    """Returns CSV headers for the rows, with Name, Price, Rating first and the rest sorted."""
+    all_extracted_keys = set()
+    for row in rows:
+        all_extracted_keys.update(row.keys())
+
+    headers = []
+    for header in PREFERRED_HEADERS:
+        if header in all_extracted_keys:
+            headers.append(header)
+            all_extracted_keys.remove(header)
+
+    headers.extend(sorted(all_extracted_keys))
+    return headers
+
+
+def to_number(value):
+    """Converts an extracted price/rating string to float; "N/A", blanks and junk become None."""
+    if value is None or value == "N/A" or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    value = value.strip()
+    if ',' in value and '.' not in value and DECIMAL_COMMA_RE.match(value):
+        value = value.replace(',', '.')
+    try:
+        return float(value.replace(',', ''))
+    except ValueError:
+        return None
+
+
+def typed_record(row):
+    """Returns (typed column values, extra keys) for a row, with numeric price and rating."""
+    values = {}
+    for key, column, kind in TYPED_FIELDS:
+        value = row.get(key)
+        if kind == 'number':
+            values[column] = to_number(value)
+        else:
+            values[column] = None if value is None or value == "N/A" else value
+    extra = {key: value for key, value in row.items() if key not in TYPED_KEYS}
+    return values, extra
+
+
+def row_key(row, key_fields=DEFAULT_KEY_FIELDS):
+    """Returns a stable product key built from the identifying fields of a row."""
+    parts = [str(row.get(field, '')) for field in key_fields]
+    return hashlib.sha1('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+
+class BatchSink:
+    """Base class for sinks that buffer rows and write them in batches.
+
+    Subclasses implement ``_write_batch(rows, final)``, which may return the number of
+    rows actually stored (default: all of them), and ``_close()``. A ``normalizer`` (see
+    scraper_normalize.Normalizer) converts each batch before it is written.
+    """
+
+    def __init__(self, batch_size=500, normalizer=None):
+        self.batch_size = max(1, int(batch_size))
+        self.normalizer = normalizer
+        self.rows_written = 0
+        self.late_columns = set()
+        self._buffer = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write(self, rows):
+        """Queues rows and writes a batch once ``batch_size`` rows are buffered."""
+        self._buffer.extend(rows)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self, final=False):
+        """Writes buffered rows out."""
+        if not self._buffer:
+            return
+        rows, self._buffer = self._buffer, []
+        if self.normalizer is not None:
+            rows = self.normalizer.normalize(rows)
+        stored = self._write_batch(rows, final)
+        self.rows_written += len(rows) if stored is None else stored
+
+    def offset(self):
+        """Returns the byte offset written so far, for sinks that can be truncated back to it (else None)."""
+        return None
+
+    def close(self):
+        """Flushes remaining rows and releases the underlying file or connection."""
+        try:
+            self.flush(final=True)
+        finally:
+            self._close()
+
+    def _write_batch(self, rows, final):
+        raise NotImplementedError
+
+    def _close(self):
+        pass
+
+
+class FileSink(BatchSink):
+    """BatchSink writing to a path (opened lazily on the first batch) or an open file object.
+
+    With ``resume_offset``, an existing file at the path is truncated to that many bytes
+    and appended to instead of being overwritten (see scraper_checkpoint). With
+    ``create_empty=True`` a run without rows still creates (or truncates) the file.
+    """
+
+    def __init__(self, path_or_file, batch_size=500, durable=False, normalizer=None, resume_offset=None,
+                 create_empty=False):
+        super().__init__(batch_size, normalizer)
+        self.create_empty = create_empty
+        self.path = None if hasattr(path_or_file, 'write') else path_or_file
+        self.file = path_or_file if self.path is None else None
+        self.durable = durable
+        self._owns_file = self.path is not None
+        resumable = self._owns_file and resume_offset and os.path.exists(path_or_file)
+        self.resume_offset = resume_offset if resumable else None
+
+    def _ensure_open(self):
+        if self.file is None:
+            if self.resume_offset is None:
+                self.file = open(self.path, mode='w', newline='', encoding='utf-8')
+            else:
+                self.file = open(self.path, mode='r+', newline='', encoding='utf-8')
+                self.file.truncate(self.resume_offset)
+                self.file.seek(self.resume_offset)
+
+    def offset(self):
+        if self.file is None:
+            return self.resume_offset or 0
+        return self.file.tell()
+
+    def _sync(self):
+        """Flushes the file (and fsyncs it with ``durable=True``)."""
+        self.file.flush()
+        if self.durable and self._owns_file:
+            os.fsync(self.file.fileno())
+
+    def _write_empty(self):
+        """Creates the file when no batch was written; subclasses add their header."""
+        self._ensure_open()
+
+    def _close(self):
+        if self.create_empty and self.rows_written == 0:
+            self._write_empty()
+        if self._owns_file and self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class CsvSink(FileSink):
+    """Streams rows to a CSV file in batches instead of buffering the whole crawl.
+
+    The header is the declared ``fieldnames`` or, if none are given, inferred from the
+    first batch. Keys that show up after the header is written are stored as JSON in
+    the ``extra_column`` so no second pass over the file is needed; that column is
+    added unless the whole run fits in one batch whose keys are all in the header.
+    Keys that cannot be stored (no extra column, or a resumed file whose header has
+    none) are listed in ``dropped_columns``. Each batch is
+    flushed (and fsynced with ``durable=True``), so rows already written survive a
+    crash later in the run. The file is only created once the first row arrives,
+    unless ``create_empty`` is set: then a run without rows writes just the header
+    (``fieldnames``, else ``empty_header``, else Name, Price, Rating).
+    """
+
+    def __init__(self, path_or_file, fieldnames=None, batch_size=500, extra_column='Extra', durable=False,
+                 normalizer=None, resume_offset=None, create_empty=False, empty_header=None):
+        super().__init__(path_or_file, batch_size, durable, normalizer, resume_offset, create_empty)
+        self.fieldnames = list(fieldnames) if fieldnames else None
+        self.empty_header = list(empty_header) if empty_header else None
+        self.extra_column = extra_column
+        self.dropped_columns = set()
+        self._writer = None
+
+    def _open(self, rows, final):
+        """Opens the file and writes the header (or, when resuming, reads it back)."""
+        if self.resume_offset is not None:
+            with open(self.path, newline='', encoding='utf-8') as existing:
+                header = next(csv.reader(existing), None)
+            if header:
+                self.fieldnames = [name for name in header if name != self.extra_column]
+                self._ensure_open()
+                self._writer = csv.DictWriter(self.file, fieldnames=header, extrasaction='ignore')
+                self._known = set(self.fieldnames)
+                return
+            self.resume_offset = None
+        if self.fieldnames is None:
+            self.fieldnames = order_headers(rows)
+        header = list(self.fieldnames)
+        known = set(header)
+        if (self.extra_column and self.extra_column not in known
+                and (not final or any(key not in known for row in rows for key in row))):
+            header.append(self.extra_column)
+        self._ensure_open()
+        self._writer = csv.DictWriter(self.file, fieldnames=header, extrasaction='ignore')
+        self._writer.writeheader()
+        self._known = set(self.fieldnames)
+
+    def _write_empty(self):
+        if self._writer is None:
+            self._ensure_open()
+            csv.writer(self.file).writerow(self.fieldnames or self.empty_header or PREFERRED_HEADERS)
+            self._sync()
+
+    def _pack(self, row):
+        """Moves keys outside the header into the extra column."""
+        extra = {key: value for key, value in row.items() if key not in self._known}
+        if not extra:
+            return row
+        self.late_columns.update(extra)
+        if self.extra_column not in self._writer.fieldnames:
+            self.dropped_columns.update(extra)
+            return row
+        packed = {key: value for key, value in row.items() if key in self._known}
+        packed[self.extra_column] = json.dumps(extra, ensure_ascii=False, sort_keys=True)
+        return packed
+
+    def _write_batch(self, rows, final):
+        if self._writer is None:
+            self._open(rows, final)
+        self._writer.writerows(self._pack(row) for row in rows)
+        self._sync()
+
+
+class JsonLinesSink(FileSink):
+    """Writes one JSON object per row (with a Normalizer, price and rating are numbers)."""
+
+    def _write_batch(self, rows, final):
+        self._ensure_open()
+        self.file.write('\n'.join(json.dumps(row, ensure_ascii=False) for row in rows) + '\n')
+        self._sync()
+
+
+class ParquetSink(BatchSink):
+    """Writes columnar Parquet row groups with float64 price and rating columns.
+
+    Requires pyarrow. Columns are fixed (see TYPED_FIELDS); any other keys are kept as a
+    JSON ``extra`` string column. With ``create_empty=True`` a run without rows still
+    writes a file with the schema and no row groups.
+    """
+
+    def __init__(self, path, batch_size=5000, compression='snappy', normalizer=None, create_empty=False):
+        if pyarrow is None:
+            raise RuntimeError("Parquet output requires pyarrow (pip install pyarrow).")
+        super().__init__(batch_size, normalizer)
+        self.path = path
+        self.compression = compression
+        self.create_empty = create_empty
+        fields = [pyarrow.field(column, pyarrow.float64() if kind == 'number' else pyarrow.string())
+                  for _, column, kind in TYPED_FIELDS]
+        fields.append(pyarrow.field('extra', pyarrow.string()))
+        self.schema = pyarrow.schema(fields)
+        self._writer = None
+
+    def _write_batch(self, rows, final):
+        columns = {field.name: [] for field in self.schema}
+        for row in rows:
+            values, extra = typed_record(row)
+            for column, value in values.items():
+                columns[column].append(value)
+            if extra:
+                self.late_columns.update(extra)
+            columns['extra'].append(json.dumps(extra, ensure_ascii=False, sort_keys=True) if extra else None)
+        table = pyarrow.table(columns, schema=self.schema)
+        if self._writer is None:
+            self._writer = pyarrow.parquet.ParquetWriter(self.path, self.schema, compression=self.compression)
+        self._writer.write_table(table)
+
+    def _close(self):
+        if self._writer is None and self.create_empty:
+            self._writer = pyarrow.parquet.ParquetWriter(self.path, self.schema, compression=self.compression)
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+class SqliteSink(BatchSink):
+    """Bulk-inserts rows into SQLite, one transaction per batch, upserting on a product key.
+
+    The key is a hash of ``key_fields`` (see row_key); re-scraping the same product
+    updates its price and rating in place instead of adding a duplicate row. Rows of
+    the same run that share a key replace each other; they are counted in
+    ``duplicate_keys`` and not in ``rows_written``.
+    """
+
+    def __init__(self, path, table='products', batch_size=1000, key_fields=DEFAULT_KEY_FIELDS, source=None,
+                 normalizer=None):
+        super().__init__(batch_size, normalizer)
+        if not table.isidentifier():
+            raise ValueError(f"Invalid SQLite table name: {table}")
+        self.path = path
+        self.table = table
+        self.key_fields = tuple(key_fields)
+        self.source = source
+        self.duplicate_keys = 0
+        self._run_keys = set()
+        self.connection = sqlite3.connect(path)
+        columns = ', '.join(f"{column} {'REAL' if kind == 'number' else 'TEXT'}" for _, column, kind in TYPED_FIELDS)
+        self.connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (product_key TEXT PRIMARY KEY, {columns}, "
+            f"extra TEXT, source TEXT, updated_at REAL)")
+        names = ['product_key'] + [column for _, column, _ in TYPED_FIELDS] + ['extra', 'source', 'updated_at']
+        updates = ', '.join(f"{name} = excluded.{name}" for name in names[1:])
+        self._insert = (f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))}) "
+                        f"ON CONFLICT(product_key) DO UPDATE SET {updates}")
+
+    def _write_batch(self, rows, final):
+        now = time.time()
+        params = []
+        duplicates = 0
+        for row in rows:
+            values, extra = typed_record(row)
+            if extra:
+                self.late_columns.update(extra)
+            key = row_key(row, self.key_fields)
+            if key in self._run_keys:
+                duplicates += 1
+            else:
+                self._run_keys.add(key)
+            params.append([key] + list(values.values()) +
+                          [json.dumps(extra, ensure_ascii=False, sort_keys=True) if extra else None,
+                           self.source, now])
+        with self.connection:
+            self.connection.executemany(self._insert, params)
+        self.duplicate_keys += duplicates
+        return len(rows) - duplicates
+
+    def _close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+SINK_FORMATS = {
+    'csv': ('.csv',),
+    'jsonl': ('.jsonl', '.ndjson'),
+    'parquet': ('.parquet',),
+    'sqlite': ('.db', '.sqlite', '.sqlite3'),
+}
+
+
+def guess_format(path):
+    """Returns the sink format for a file name's extension, defaulting to CSV."""
+    extension = os.path.splitext(path)[1].lower()
+    for name, extensions in SINK_FORMATS.items():
+        if extension in extensions:
+            return name
+    return 'csv'
+
+
+def open_sink(path, format=None, batch_size=None, **options):
+    """Creates the sink for ``format`` (guessed from the extension if None). '-' means stdout."""
+    format = format or guess_format(path)
+    if format not in SINK_FORMATS:
+        raise ValueError(f"Unknown output format '{format}'. Choose from: {', '.join(SINK_FORMATS)}")
+    if batch_size is not None:
+        options['batch_size'] = batch_size
+    if path == '-':
+        if format not in ('csv', 'jsonl'):
+            raise ValueError(f"Format '{format}' cannot be written to stdout.")
+        path = sys.stdout
+    if format == 'csv':
+        return CsvSink(path, **options)
+    if format == 'jsonl':
+        return JsonLinesSink(path, **options)
+    if format == 'parquet':
+        return ParquetSink(path, **options)
+    return SqliteSink(path, **options)
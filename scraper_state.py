@@ -0,0 +1,141 @@
+import hashlib
+import json
+import sqlite3
+import threading
+
+
+DEFAULT_RECORD_KEY_FIELDS = ('Name', 'Quote', 'Author')
+
+CHANGE_COLUMN = 'Change'
+
+
+def content_hash(text):
+    """Returns a hex digest of a page body."""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class PageState:
+    """What the change tracker knows about a fetched page before extraction."""
+
+    __slots__ = ('url', 'content_hash', 'unchanged', 'next_url')
+
+    def __init__(self, url, content_hash, unchanged, next_url):
+        self.url = url
+        self.content_hash = content_hash
+        self.unchanged = unchanged
+        self.next_url = next_url
+
+
+class ChangeTracker:
+    """Local SQLite state store for incremental crawls.
+
+    Each record is fingerprinted and keyed on its product link (the row's 'URL'), so a
+    product keeps its identity when it moves between listing pages or others are
+    inserted before it. Rows without a link are keyed on their name fields, the page
+    they were found on and their occurrence among equal names there. A run emits only
+    inserts and updates, tagged in the ``Change`` column, and finish_run() returns the
+    deletions: records of pages crawled this run that were not seen again. Pages whose
+    body hash is unchanged skip extraction entirely; their records count as seen and
+    their stored pagination link is reused.
+    """
+
+    def __init__(self, path, key_fields=DEFAULT_RECORD_KEY_FIELDS):
+        self.path = path
+        self.key_fields = tuple(key_fields)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS pages (url TEXT PRIMARY KEY, content_hash TEXT, next_url TEXT, "
+                "last_seen_run INTEGER)")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS records (record_key TEXT PRIMARY KEY, page_url TEXT, "
+                "fingerprint TEXT, row_json TEXT, last_seen_run INTEGER)")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS records_page ON records (page_url)")
+        row = self._connection.execute("SELECT value FROM meta WHERE name = 'last_run'").fetchone()
+        self.run_id = (int(row[0]) if row else 0) + 1
+        self.counts = {'insert': 0, 'update': 0, 'delete': 0, 'unchanged': 0, 'skipped_pages': 0}
+
+    def check_page(self, url, html):
+        """Hashes the body and reports whether it matches the last crawl."""
+        digest = content_hash(html)
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT content_hash, next_url FROM pages WHERE url = ?", (url,)).fetchone()
+        if row is not None and row[0] == digest:
+            return PageState(url, digest, True, row[1])
+        return PageState(url, digest, False, None)
+
+    def _identity(self, row, page_url):
+        """Returns what identifies the row's record, before occurrences on the page are counted."""
+        if row.get('URL'):
+            return (row['URL'],)
+        return tuple(str(row.get(field, '')) for field in self.key_fields) + (page_url,)
+
+    def _record_key(self, identity, occurrence):
+        parts = list(identity)
+        if occurrence > 1 or len(identity) > 1:
+            parts.append(str(occurrence))
+        return hashlib.sha1('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+    def record_page(self, state, rows, next_url=None):
+        """Stores the page's hash and records; returns only the changed rows, tagged with Change.
+
+        For unchanged pages pass ``rows=None``: the page's records are marked as seen.
+        """
+        changes = []
+        with self._lock, self._connection:
+            if rows is None:
+                self.counts['skipped_pages'] += 1
+                self._connection.execute("UPDATE records SET last_seen_run = ? WHERE page_url = ?",
+                                         (self.run_id, state.url))
+                self._connection.execute("UPDATE pages SET last_seen_run = ? WHERE url = ?",
+                                         (self.run_id, state.url))
+                return changes
+
+            self._connection.execute(
+                "INSERT OR REPLACE INTO pages (url, content_hash, next_url, last_seen_run) VALUES (?, ?, ?, ?)",
+                (state.url, state.content_hash, next_url, self.run_id))
+            occurrences = {}
+            for row in rows:
+                identity = self._identity(row, state.url)
+                occurrences[identity] = occurrences.get(identity, 0) + 1
+                key = self._record_key(identity, occurrences[identity])
+                row_json = json.dumps(row, ensure_ascii=False, sort_keys=True)
+                fingerprint = hashlib.sha1(row_json.encode('utf-8')).hexdigest()
+                existing = self._connection.execute(
+                    "SELECT fingerprint FROM records WHERE record_key = ?", (key,)).fetchone()
+                if existing is None:
+                    change = 'insert'
+                elif existing[0] != fingerprint:
+                    change = 'update'
+                else:
+                    change = None
+                    self.counts['unchanged'] += 1
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO records (record_key, page_url, fingerprint, row_json, last_seen_run) "
+                    "VALUES (?, ?, ?, ?, ?)", (key, state.url, fingerprint, row_json, self.run_id))
+                if change:
+                    self.counts[change] += 1
+                    changes.append(dict(row, **{CHANGE_COLUMN: change}))
+        return changes
+
+    def finish_run(self):
+        """Returns deletion rows for records not seen on pages crawled this run and closes the run."""
+        with self._lock, self._connection:
+            stale = self._connection.execute(
+                "SELECT r.record_key, r.row_json FROM records r JOIN pages p ON p.url = r.page_url "
+                "WHERE p.last_seen_run = ? AND r.last_seen_run < ?", (self.run_id, self.run_id)).fetchall()
+            deletions = [dict(json.loads(row_json), **{CHANGE_COLUMN: 'delete'}) for _, row_json in stale]
+            self._connection.executemany("DELETE FROM records WHERE record_key = ?", [(key,) for key, _ in stale])
+            self._connection.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('last_run', ?)",
+                                     (str(self.run_id),))
+            self.counts['delete'] += len(deletions)
+        self.run_id += 1
+        return deletions
+
+    def close(self):
+        """Closes the SQLite connection."""
+        with self._lock:
+            self._connection.close()
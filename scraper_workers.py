@@ -0,0 +1,96 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from scraper_extract import PageExtractor
+from scraper_parsers import DEFAULT_PARSER
+from scraper_profiles import ProfileRegistry
+
+
+_worker_pages = None
+
+# Log messages of the task running in this worker process, sent back with its result.
+_worker_messages = []
+
+
+def _worker_log(message, is_error=False):
+    """Worker log callback: keeps the message for the parent process to replay."""
+    _worker_messages.append((message, is_error))
+
+
+def _init_worker(profile_paths, skip_invalid_profiles, options):
+    """Process-pool initializer: loads the site profiles and builds the worker's PageExtractor.
+
+    Workers only parse and extract, so no HTTP session, robots.txt cache or engine is built.
+    """
+    global _worker_pages
+    profiles = ProfileRegistry.from_paths(profile_paths, _worker_log, skip_invalid_profiles)
+    _worker_pages = PageExtractor(profiles, log=_worker_log, **options)
+    # The parent process has already logged the same profile and selector warnings.
+    del _worker_messages[:]
+
+
+def _extract_page(url, html):
+    """Parses and extracts one page in a worker process; returns (rows, next_url)."""
+    soup = _worker_pages.parse_html(html, url)
+    return _worker_pages.extract_from_soup(url, soup), _worker_pages.find_next_page(url, soup)
+
+
+def _extract_chunk(pages):
+    """Extracts (url, html) pages in a worker process.
+
+    Returns ([(rows, next_url, error)] in order, [(message, is_error)] logged meanwhile).
+    """
+    results = []
+    for url, html in pages:
+        try:
+            rows, next_url = _extract_page(url, html)
+        except Exception as e:
+            results.append((None, None, e))
+        else:
+            results.append((rows, next_url, None))
+    messages = _worker_messages[:]
+    del _worker_messages[:]
+    return results, messages
+
+
+class ProcessExtractor:
+    """Runs parsing and extraction on a process pool so CPU-bound work uses every core.
+
+    Only the HTML body goes to the worker and only the compact row dicts, the
+    next-page link and the worker's log messages come back; parse trees never
+    cross the process boundary. ``options`` are passed on to each worker's
+    PageExtractor, and worker log messages are replayed through ``log``.
+    """
+
+    def __init__(self, processes=None, parser=DEFAULT_PARSER, chunksize=4, log=None, profiles=(),
+                 skip_invalid_profiles=False, **options):
+        self.processes = processes or os.cpu_count() or 1
+        self.parser = parser
+        self.chunksize = max(1, int(chunksize))
+        self.log = log
+        self._pool = ProcessPoolExecutor(max_workers=self.processes, initializer=_init_worker,
+                                         initargs=(list(profiles), skip_invalid_profiles,
+                                                   dict(options, parser=parser)))
+
+    def submit_chunk(self, pages):
+        """Queues (url, html) pages as one task; returns a future for chunk_results."""
+        return self._pool.submit(_extract_chunk, pages)
+
+    def chunk_results(self, future):
+        """Replays the finished chunk's worker log messages; returns its [(rows, next_url, error)]."""
+        results, messages = future.result()
+        if self.log is not None:
+            for message, is_error in messages:
+                self.log(message, is_error)
+        return results
+
+    def extract(self, url, html):
+        """Extracts one page in a worker process and waits for (rows, next_url)."""
+        rows, next_url, error = self.chunk_results(self.submit_chunk([(url, html)]))[0]
+        if error is not None:
+            raise error
+        return rows, next_url
+
+    def close(self):
+        """Shuts the worker processes down."""
+        self._pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,110 @@
+"""The asyncio fetch backend against the local mock shop: same rows as the synchronous engine, redirects and 304s.
+
+Run from the repository root:
+
+    python -m pytest tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(TESTS_DIR)
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'benchmarks'))
+
+from mock_server import MockShop
+from scraper_cache import ResponseCache
+from scraper_engine import ScraperEngine
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+class RedirectingShop(MockShop):
+    """MockShop that answers /moved/PATH with a 301 to /PATH."""
+
+    def respond(self, path):
+        if path.startswith('/moved/'):
+            self._count('requests')
+            return 301, {'Location': self.base_url + path[len('/moved'):]}, b''
+        return super().respond(path)
+
+
+def crawl_sync(urls, **options):
+    engine = ScraperEngine(respect_robots=False, **options)
+    try:
+        return {url: rows for url, rows, _ in engine.scrape(urls)}, engine
+    finally:
+        engine.close()
+
+
+def crawl_async(urls, **options):
+    from scraper_async import AsyncScraper
+    engine = ScraperEngine(respect_robots=False, **options)
+    try:
+        results = AsyncScraper(engine, concurrency=50, per_host_limit=8).run(urls)
+    finally:
+        engine.close()
+    errors = [error for _, _, error in results if error is not None]
+    if errors:
+        raise errors[0]
+    return {url: rows for url, rows, _ in results}, engine
+
+
+@unittest.skipIf(aiohttp is None, "the asyncio backend needs aiohttp")
+class AsyncParityTest(unittest.TestCase):
+    def test_same_rows_as_sync_for_every_page_kind(self):
+        with MockShop(pages=3) as shop:
+            urls = shop.start_urls('books', 2) + shop.start_urls('quotes', 2) + shop.start_urls('shop', 2)
+            expected, _ = crawl_sync(urls, max_pages=3)
+            actual, _ = crawl_async(urls, max_pages=3)
+        self.assertEqual(len(expected), 18)
+        self.assertEqual(actual, expected)
+
+    def test_parse_processes(self):
+        with MockShop(pages=2) as shop:
+            urls = shop.start_urls('books', 2) + shop.start_urls('shop', 2)
+            expected, _ = crawl_sync(urls, max_pages=2)
+            actual, _ = crawl_async(urls, max_pages=2, parse_processes=2)
+        self.assertEqual(actual, expected)
+
+
+@unittest.skipIf(aiohttp is None, "the asyncio backend needs aiohttp")
+class AsyncRedirectTest(unittest.TestCase):
+    def test_redirects_are_followed_like_sync(self):
+        with RedirectingShop(pages=2) as shop:
+            urls = [url.replace(shop.base_url, shop.base_url + '/moved') for url in shop.start_urls('shop', 2)]
+            expected, _ = crawl_sync(urls, max_pages=2)
+            actual, _ = crawl_async(urls, max_pages=2)
+            direct, _ = crawl_sync(shop.start_urls('shop', 2), max_pages=2)
+        self.assertEqual(len(actual), 4)
+        self.assertEqual(actual, expected)
+        self.assertEqual(sorted(map(str, actual.values())), sorted(map(str, direct.values())))
+
+
+@unittest.skipIf(aiohttp is None, "the asyncio backend needs aiohttp")
+class AsyncRevalidationTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.directory, 'cache.sqlite')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_304_reuses_the_cached_body(self):
+        with MockShop(pages=2, etags=True) as shop:
+            urls = shop.start_urls('books', 2)
+            first, _ = crawl_async(urls, max_pages=2, cache=ResponseCache(self.cache_path))
+            second, engine = crawl_async(urls, max_pages=2, cache=ResponseCache(self.cache_path))
+            self.assertEqual(shop.counts['not_modified'], 4)
+        self.assertEqual(second, first)
+        self.assertEqual(engine.cache.revalidated, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+"""Response cache: LRU storage, ETag revalidation with 304s, and offline replay.
+
+Run from the repository root:
+
+    python -m pytest tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(TESTS_DIR)
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'benchmarks'))
+
+from mock_server import MockShop
+from scraper_cache import CacheMissError, ResponseCache
+from scraper_engine import ScraperEngine
+
+
+class CacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cache.sqlite')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def crawl(self, urls, **options):
+        engine = ScraperEngine(cache=ResponseCache(self.path), respect_robots=False, max_pages=2, **options)
+        try:
+            results = sorted(engine.scrape(urls), key=lambda result: result[0])
+        finally:
+            engine.close()
+        return engine, results
+
+
+class ResponseCacheTest(CacheTestCase):
+    def test_round_trip_and_validators(self):
+        cache = ResponseCache(self.path)
+        cache.put('http://shop/a#top', 'café', etag='"v1"', last_modified='Mon, 01 Jan 2024 00:00:00 GMT')
+        cache.close()
+        cache = ResponseCache(self.path)
+        try:
+            page = cache.get('http://shop/a')
+            self.assertEqual(page.text, 'café')
+            self.assertEqual(page.conditional_headers(), {'If-None-Match': '"v1"',
+                                                          'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'})
+            self.assertIsNone(cache.get('http://shop/b'))
+            self.assertEqual(cache.stats()['hits'], 1)
+            self.assertEqual(cache.stats()['misses'], 1)
+        finally:
+            cache.close()
+
+    def test_least_recently_used_are_evicted(self):
+        cache = ResponseCache(self.path, max_bytes=200)
+        try:
+            body = os.urandom(60).hex()
+            cache.put('http://shop/1', body)
+            cache.put('http://shop/2', body + '2')
+            cache.get('http://shop/1')
+            cache.put('http://shop/3', body + '3')
+            self.assertIsNotNone(cache.get('http://shop/1'))
+            self.assertIsNone(cache.get('http://shop/2'))
+            self.assertIsNotNone(cache.get('http://shop/3'))
+            self.assertLessEqual(cache.stats()['bytes'], 200)
+        finally:
+            cache.close()
+
+
+class RevalidationTest(CacheTestCase):
+    def test_unchanged_pages_are_answered_with_304(self):
+        with MockShop(pages=2, etags=True) as shop:
+            urls = shop.start_urls('books', 2)
+            _, first = self.crawl(urls)
+            engine, second = self.crawl(urls)
+            self.assertEqual(shop.counts['not_modified'], 4)
+        self.assertEqual(second, first)
+        self.assertEqual(engine.metrics.counters.get('not_modified'), 4)
+        self.assertEqual(engine.cache.revalidated, 4)
+
+    def test_no_validators_means_full_downloads(self):
+        with MockShop(pages=1) as shop:
+            urls = shop.start_urls('shop')
+            self.crawl(urls)
+            self.crawl(urls)
+            self.assertEqual(shop.counts['not_modified'], 0)
+            self.assertEqual(shop.counts['pages'], 2)
+
+
+class OfflineTest(CacheTestCase):
+    def test_replay_without_the_server(self):
+        with MockShop(pages=2) as shop:
+            urls = shop.start_urls('shop', 2)
+            _, online = self.crawl(urls)
+        engine, offline = self.crawl(urls, offline=True)
+        self.assertEqual(offline, online)
+        self.assertEqual(engine.metrics.counters.get('cache_replays'), 4)
+
+    def test_missing_pages_fail_with_cache_miss(self):
+        with MockShop(pages=1) as shop:
+            urls = shop.start_urls('shop', 2)
+            self.crawl(urls[:1])
+        _, results = self.crawl(urls, offline=True)
+        errors = {url: error for url, _, error in results if error is not None}
+        self.assertEqual(list(errors), urls[1:])
+        self.assertIsInstance(errors[urls[1]], CacheMissError)
+
+    def test_offline_needs_a_cache(self):
+        with self.assertRaises(ValueError):
+            ScraperEngine(offline=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
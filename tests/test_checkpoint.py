@@ -0,0 +1,111 @@
+"""Crawl checkpoints: an interrupted crawl resumed through the CLI writes every row exactly once.
+
+Run from the repository root:
+
+    python -m pytest tests
+"""
+import contextlib
+import csv
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(TESTS_DIR)
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'benchmarks'))
+
+from mock_server import MockShop
+from scraper_checkpoint import CrawlCheckpoint
+from scraper_engine import ScraperEngine, main
+from scraper_sinks import CsvSink
+
+PAGES = 3
+LISTINGS = 4
+
+
+def read_rows(path):
+    """Returns the CSV's (Name, Price, Rating) rows, header excluded, in file order."""
+    with open(path, newline='', encoding='utf-8') as file:
+        return [tuple(row[:3]) for row in csv.reader(file)][1:]
+
+
+class CheckpointResumeTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.output = os.path.join(self.directory, 'out.csv')
+        self.checkpoint_path = os.path.join(self.directory, 'crawl.checkpoint')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def cli(self, shop, *args):
+        argv = shop.start_urls('shop', LISTINGS) + ['-o', self.output, '--max-pages', str(PAGES),
+                                                    '--ignore-robots', '-w', '2'] + list(args)
+        self.stderr = io.StringIO()
+        with contextlib.redirect_stderr(self.stderr):
+            return main(argv)
+
+    def interrupted_crawl(self, shop, saved_pages, unsaved_pages):
+        """Crawls like the CLI, checkpointing after ``saved_pages`` pages, then stops without saving again.
+
+        A page is marked done when the engine resumes after it was handled, so the save
+        happens at the top of the next iteration, as the checkpoint's own interval does.
+        """
+        checkpoint = CrawlCheckpoint(self.checkpoint_path, interval=3600)
+        engine = ScraperEngine(checkpoint=checkpoint, respect_robots=False, max_pages=PAGES, max_workers=2)
+        sink = CsvSink(self.output, batch_size=1)
+        checkpoint.bind(sink, self.output, 'csv')
+        results = engine.scrape(shop.start_urls('shop', LISTINGS))
+        try:
+            for handled, (_, rows, error) in enumerate(results):
+                if handled == saved_pages:
+                    checkpoint.save()
+                if handled == saved_pages + unsaved_pages:
+                    break
+                self.assertIsNone(error)
+                sink.write(rows)
+        finally:
+            # Rows written after the last save reach the file, but the checkpoint does not know them.
+            results.close()
+            sink.file.close()
+            checkpoint.close()
+            engine.close()
+
+    def test_resume_writes_each_row_once(self):
+        with MockShop(pages=PAGES, items=3) as shop:
+            self.assertEqual(self.cli(shop), 0)
+            expected = read_rows(self.output)
+            os.remove(self.output)
+
+            self.interrupted_crawl(shop, saved_pages=4, unsaved_pages=3)
+            self.assertEqual(len(read_rows(self.output)), 3 * 7)
+            before = shop.counts['pages']
+            self.assertEqual(self.cli(shop, '--checkpoint', self.checkpoint_path), 0)
+            refetched = shop.counts['pages'] - before
+        self.assertEqual(sorted(read_rows(self.output)), sorted(expected))
+        # The four checkpointed pages are not fetched again; the three unsaved ones are.
+        self.assertEqual(refetched, PAGES * LISTINGS - 4)
+
+    def test_finished_checkpoint_starts_fresh(self):
+        with MockShop(pages=PAGES, items=2) as shop:
+            self.assertEqual(self.cli(shop, '--checkpoint', self.checkpoint_path), 0)
+            first = read_rows(self.output)
+            self.assertEqual(self.cli(shop, '--checkpoint', self.checkpoint_path), 0)
+            self.assertEqual(shop.counts['pages'], 2 * PAGES * LISTINGS)
+        self.assertEqual(sorted(read_rows(self.output)), sorted(first))
+
+    def test_checkpoint_of_another_output_is_rejected(self):
+        with MockShop(pages=PAGES, items=2) as shop:
+            self.interrupted_crawl(shop, saved_pages=1, unsaved_pages=0)
+            self.output = os.path.join(self.directory, 'other.csv')
+            with self.assertRaises(SystemExit):
+                self.cli(shop, '--checkpoint', self.checkpoint_path)
+        self.assertIn('belongs to a crawl writing', self.stderr.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
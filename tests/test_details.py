@@ -0,0 +1,141 @@
+"""Detail page enrichment (--details) against the local mock shop, for every crawl backend.
+
+Run from the repository root:
+
+    python -m pytest tests
+"""
+import os
+import sys
+import unittest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(TESTS_DIR)
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'benchmarks'))
+
+from mock_server import MockShop
+from scraper_engine import ScraperEngine
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+DETAIL_COLUMNS = ('SKU', 'Stock', 'Description')
+
+
+class ShopWithoutDetails(MockShop):
+    """MockShop whose product detail pages are all missing (404)."""
+
+    def _page(self, path):
+        if '/item-' in path:
+            return None
+        return super()._page(path)
+
+
+def run_sync(engine, urls):
+    return list(engine.scrape(urls))
+
+
+def run_async(engine, urls):
+    from scraper_async import AsyncScraper
+    return AsyncScraper(engine, concurrency=20, per_host_limit=4).run(urls)
+
+
+class DetailEnrichmentMixin:
+    """Crawls two book listings whose items link to the same detail pages, one after the other."""
+
+    backend = staticmethod(run_sync)
+    engine_options = {}
+
+    def crawl(self, engine, urls):
+        results = self.backend(engine, urls)
+        self.assertFalse([error for _, _, error in results if error is not None])
+        return [row for _, rows, _ in results for row in rows]
+
+    def test_detail_fields_are_merged_and_cached(self):
+        with MockShop(items=5, pages=2) as shop:
+            first, second = shop.start_urls('books', 2)
+            engine = ScraperEngine(max_pages=2, enrich_details=True, respect_robots=False, **self.engine_options)
+            try:
+                rows = self.crawl(engine, [first])
+                requests_after_first = shop.counts['requests']
+                again = self.crawl(engine, [second])
+                requests_after_second = shop.counts['requests']
+            finally:
+                engine.close()
+        self.assertEqual(len(rows), 10)
+        for row in rows + again:
+            self.assertTrue(row['URL'].endswith('/index.html'), row)
+            for column in DETAIL_COLUMNS:
+                self.assertTrue(row.get(column), (column, row))
+        self.assertTrue(all(row['Stock'].startswith('In stock') for row in rows))
+        self.assertEqual(engine.metrics.counters.get('detail_pages'), 10)
+        self.assertNotIn('detail_errors', engine.metrics.counters)
+        # Both listings link to the same books: the second crawl only fetches its two listing pages.
+        self.assertEqual(requests_after_second - requests_after_first, 2)
+        self.assertEqual(engine.detail_cache.stats()['hits'], 10)
+        self.assertEqual(sorted(row['SKU'] for row in rows), sorted(row['SKU'] for row in again))
+
+    def test_generic_shop_details(self):
+        with MockShop(items=4, pages=1) as shop:
+            engine = ScraperEngine(enrich_details=True, respect_robots=False, **self.engine_options)
+            try:
+                rows = self.crawl(engine, shop.start_urls('shop'))
+            finally:
+                engine.close()
+        self.assertEqual(len(rows), 4)
+        for row in rows:
+            item = row['URL'].rsplit('/item-', 1)[1][:-len('.html')]
+            self.assertEqual(row['SKU'], f"S{item}")
+            self.assertIn(row['Stock'], ('In stock', 'Out of stock'))
+            self.assertTrue(row['Description'].endswith('.'))
+
+    def test_failed_detail_pages_are_counted(self):
+        with ShopWithoutDetails(items=3, pages=1) as shop:
+            engine = ScraperEngine(enrich_details=True, respect_robots=False, max_retries=0, **self.engine_options)
+            try:
+                rows = self.crawl(engine, shop.start_urls('shop'))
+            finally:
+                engine.close()
+        self.assertEqual(len(rows), 3)
+        self.assertFalse([row for row in rows if set(DETAIL_COLUMNS) & set(row)])
+        self.assertEqual(engine.metrics.counters.get('detail_errors'), 3)
+        self.assertNotIn('detail_pages', engine.metrics.counters)
+
+
+class SyncDetailsTest(DetailEnrichmentMixin, unittest.TestCase):
+    pass
+
+
+class ProcessDetailsTest(DetailEnrichmentMixin, unittest.TestCase):
+    engine_options = {'parse_processes': 2, 'parse_chunksize': 1}
+
+
+@unittest.skipIf(aiohttp is None, "the asyncio backend needs aiohttp")
+class AsyncDetailsTest(DetailEnrichmentMixin, unittest.TestCase):
+    backend = staticmethod(run_async)
+
+
+class BackendParityTest(unittest.TestCase):
+    def test_backends_write_the_same_rows(self):
+        outputs = {}
+        with MockShop(items=4, pages=2) as shop:
+            urls = shop.start_urls('books', 2) + shop.start_urls('shop', 1)
+            backends = [('sync', run_sync, {}), ('processes', run_sync, {'parse_processes': 2})]
+            if aiohttp is not None:
+                backends.append(('async', run_async, {}))
+            for name, run, options in backends:
+                engine = ScraperEngine(max_pages=2, enrich_details=True, respect_robots=False, **options)
+                try:
+                    results = run(engine, urls)
+                finally:
+                    engine.close()
+                outputs[name] = sorted(sorted(row.items()) for _, rows, _ in results for row in rows)
+        self.assertEqual(len(outputs['sync']), 24)
+        for name, rows in outputs.items():
+            self.assertEqual(rows, outputs['sync'], name)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+"""Price and rating normalization: expected values, and identical results from the pyarrow and pure-Python backends.
+
+Run from the repository root:
+
+    python -m pytest tests
+"""
+import os
+import random
+import sys
+import unittest
+from unittest import mock
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(TESTS_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+import scraper_normalize
+from scraper_normalize import Normalizer, normalize_prices_python, normalize_ratings
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+# raw price: (price, currency, locale)
+PRICES = {
+    '£51.77': (51.77, 'GBP', 'en'),
+    '$1,234.50': (1234.5, 'USD', 'en'),
+    '1.234,50 €': (1234.5, 'EUR', 'eu'),
+    'EUR 1.234': (1234.0, 'EUR', 'eu'),
+    '$1,234': (1234.0, 'USD', 'en'),
+    '1,5': (1.5, None, 'eu'),
+    '12': (12.0, None, None),
+    'US$ 9.99': (9.99, 'USD', 'en'),
+    'R$ 1.299,90': (1299.9, 'BRL', 'eu'),
+    "CHF 1'250.00": (1250.0, 'CHF', 'en'),
+    '1 234,56 €': (1234.56, 'EUR', 'eu'),
+    '.99': (0.99, None, 'en'),
+    '¥1,000': (1000.0, 'JPY', 'en'),
+    'N/A': (None, None, None),
+    '': (None, None, None),
+    None: (None, None, None),
+    'Call for price': (None, None, None),
+    '1.2.3,4,5': (None, None, None),
+}
+
+RATINGS = {'4': 4.0, '4.5 out of 5 stars': 4.5, '3,5 Sterne': 3.5, 'Five': None, 'N/A': None, None: None}
+
+
+def random_prices(count, seed=0):
+    """Price strings in many formats, with repeats, for backend parity checks."""
+    rng = random.Random(seed)
+    formats = ['£{:.2f}', '${:,.2f}', '{:,.2f} USD', '€ {:.2f}', '{:.0f}', 'from £{:.2f}', '{:,.3f}']
+    values = []
+    for _ in range(count):
+        value = rng.choice([rng.uniform(0, 100), rng.uniform(100, 99999)])
+        text = rng.choice(formats).format(value)
+        if rng.random() < 0.3:
+            text = text.replace(',', 'X').replace('.', ',').replace('X', '.')
+        values.append(rng.choice([text, text, 'N/A', '', 'Sold out']) if rng.random() < 0.1 else text)
+    return values
+
+
+class PriceTest(unittest.TestCase):
+    def test_python_backend(self):
+        raw = list(PRICES)
+        self.assertEqual(list(zip(*normalize_prices_python(raw))), list(PRICES.values()))
+
+    @unittest.skipIf(pyarrow is None, "the vectorized backend needs pyarrow")
+    def test_arrow_backend(self):
+        raw = list(PRICES)
+        self.assertEqual(list(zip(*scraper_normalize.normalize_prices_arrow(raw))), list(PRICES.values()))
+
+    @unittest.skipIf(pyarrow is None, "the vectorized backend needs pyarrow")
+    def test_backends_agree(self):
+        raw = random_prices(5000)
+        self.assertEqual(scraper_normalize.normalize_prices_arrow(raw), normalize_prices_python(raw))
+
+
+class RatingTest(unittest.TestCase):
+    def test_python_backend(self):
+        with mock.patch.object(scraper_normalize, 'pyarrow', None):
+            self.assertEqual(normalize_ratings(list(RATINGS)), list(RATINGS.values()))
+
+    @unittest.skipIf(pyarrow is None, "the vectorized backend needs pyarrow")
+    def test_arrow_backend(self):
+        self.assertEqual(normalize_ratings(list(RATINGS)), list(RATINGS.values()))
+
+
+class NormalizerTest(unittest.TestCase):
+    ROWS = [{'Name': 'A', 'Price': '£5.00', 'Rating': '4'},
+            {'Name': 'B', 'Price': 'Call for price', 'Rating': 'N/A'},
+            {'Name': 'Quote', 'Quote': 'Hello'}]
+
+    def normalize(self):
+        normalizer = Normalizer()
+        return normalizer.normalize(self.ROWS), normalizer.report()
+
+    def check(self, rows, report):
+        self.assertEqual(rows[0], {'Name': 'A', 'Price': 5.0, 'Currency': 'GBP', 'Locale': 'en', 'Rating': 4.0})
+        self.assertEqual(rows[1]['Price'], None)
+        self.assertEqual(rows[2], {'Name': 'Quote', 'Quote': 'Hello'})
+        self.assertEqual(report['unparseable'], {'Price': 1, 'Rating': 0})
+        self.assertEqual(report['samples']['Price'], ['Call for price'])
+        self.assertEqual(self.ROWS[0]['Price'], '£5.00')
+
+    def test_python_backend(self):
+        with mock.patch.object(scraper_normalize, 'pyarrow', None):
+            rows, report = self.normalize()
+        self.assertEqual(report['backend'], 'python')
+        self.check(rows, report)
+
+    @unittest.skipIf(pyarrow is None, "the vectorized backend needs pyarrow")
+    def test_arrow_backend(self):
+        rows, report = self.normalize()
+        self.assertEqual(report['backend'], 'pyarrow')
+        self.check(rows, report)
+
+
+if __name__ == '__main__':
+    unittest.main()
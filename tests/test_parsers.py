@@ -0,0 +1,96 @@
+"""Parser backends: every installed backend extracts the same rows, next-page links and detail fields as html.parser.
+
+Run from the repository root:
+
+    python -m pytest tests
+"""
+import os
+import sys
+import unittest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(TESTS_DIR)
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'benchmarks'))
+
+from bench_parsers import load_fixtures
+from scraper_engine import ScraperEngine
+from scraper_parsers import DEFAULT_PARSER, PARSER_BACKENDS, available_parsers, get_parser
+from synthetic import DETAIL_BUILDERS, synthetic_fixtures
+
+OTHER_PARSERS = [name for name in available_parsers() if name != DEFAULT_PARSER]
+
+# Synthetic pages are served from the mock shop's paths, so listing links resolve like a crawl's.
+SYNTHETIC_URLS = {'books': 'http://127.0.0.1/books/page-1.html', 'quotes': 'http://127.0.0.1/quotes/page/1/',
+                  'shop': 'http://127.0.0.1/shop/page-1.html'}
+
+
+def pages():
+    """Returns [(name, url, html)]: the captured fixtures plus synthetic pages of every kind."""
+    synthetic = [(name, SYNTHETIC_URLS[name.split('_')[1]], html)
+                 for name, html in synthetic_fixtures(items=(5, 60), padding=(0, 20000))]
+    return load_fixtures() + synthetic
+
+
+def extract(engine, url, html):
+    soup = engine.parse_html(html, url)
+    return engine.extract_from_soup(url, soup), engine.find_next_page(url, soup)
+
+
+@unittest.skipUnless(OTHER_PARSERS, "no parser backend besides html.parser is installed")
+class ParserParityTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.pages = pages()
+        baseline = ScraperEngine(parser=DEFAULT_PARSER, product_links=True)
+        cls.expected = {name: extract(baseline, url, html) for name, url, html in cls.pages}
+
+    def check(self, parser, **options):
+        engine = ScraperEngine(parser=parser, product_links=True, **options)
+        for name, url, html in self.pages:
+            with self.subTest(parser=parser, page=name):
+                self.assertEqual(extract(engine, url, html), self.expected[name])
+
+    def test_listing_rows_and_next_page(self):
+        for parser in OTHER_PARSERS:
+            self.check(parser)
+
+    def test_scoped_parse(self):
+        for parser in [DEFAULT_PARSER] + OTHER_PARSERS:
+            self.check(parser, scoped_parse=True)
+
+    def test_detail_pages(self):
+        baseline = ScraperEngine(parser=DEFAULT_PARSER)
+        urls = {'books': 'http://books.toscrape.com/catalogue/book-1-{}/index.html',
+                'shop': 'http://127.0.0.1/shop/item-1-{}.html'}
+        for parser in OTHER_PARSERS:
+            engine = ScraperEngine(parser=parser)
+            for kind, builder in DETAIL_BUILDERS.items():
+                for index in range(5):
+                    url, html = urls[kind].format(index), builder(page=1, index=index)
+                    with self.subTest(parser=parser, kind=kind, index=index):
+                        expected = baseline.extract_details_from_html(url, html)
+                        self.assertEqual(set(expected), {'SKU', 'Stock', 'Description'})
+                        self.assertEqual(engine.extract_details_from_html(url, html), expected)
+
+
+class BaselineTest(unittest.TestCase):
+    def test_fixture_row_counts(self):
+        engine = ScraperEngine(parser=DEFAULT_PARSER)
+        counts = {name: len(extract(engine, url, html)[0]) for name, url, html in load_fixtures()}
+        self.assertEqual(counts, {'books_listing.html': 20, 'marketplace_grid.html': 100,
+                                  'quotes_listing.html': 10, 'search_results.html': 48})
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            get_parser('regex')
+        with self.assertRaises(ValueError):
+            ScraperEngine(parser='regex')
+
+    def test_available_backends(self):
+        self.assertIn(DEFAULT_PARSER, available_parsers())
+        self.assertTrue(set(available_parsers()) <= set(PARSER_BACKENDS))
+
+
+if __name__ == '__main__':
+    unittest.main()
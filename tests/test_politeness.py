@@ -0,0 +1,169 @@
+"""Crawl politeness against the local mock shop: robots.txt, Crawl-delay, --rate and 429 backoff.
+
+Run from the repository root:
+
+    python -m pytest tests
+"""
+import os
+import sys
+import threading
+import time
+import unittest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(TESTS_DIR)
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'benchmarks'))
+
+from mock_server import MockShop
+from scraper_engine import ScraperEngine
+from scraper_scheduler import RobotsDisallowedError
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+# Slack for timer and scheduling jitter when checking request spacing.
+TOLERANCE = 0.05
+
+
+class RecordingShop(MockShop):
+    """MockShop that records when each path was requested and can disallow path prefixes in robots.txt."""
+
+    def __init__(self, disallow=(), **options):
+        super().__init__(**options)
+        self.disallow = disallow
+        self.requests = []
+        self._requests_lock = threading.Lock()
+
+    def respond(self, path):
+        with self._requests_lock:
+            self.requests.append((time.monotonic(), path))
+        if path == '/robots.txt' and self.disallow:
+            rules = "User-agent: *\n" + ''.join(f"Disallow: {prefix}\n" for prefix in self.disallow)
+            return 200, {'Content-Type': 'text/plain'}, rules.encode('utf-8')
+        return super().respond(path)
+
+    def page_times(self):
+        """Request times of everything except robots.txt, in order."""
+        with self._requests_lock:
+            return [at for at, path in self.requests if path != '/robots.txt']
+
+    def paths(self):
+        with self._requests_lock:
+            return [path for _, path in self.requests]
+
+
+def min_gap(times):
+    return min(later - earlier for earlier, later in zip(times, times[1:]))
+
+
+def crawl(shop, urls, **options):
+    engine = ScraperEngine(**options)
+    try:
+        results = list(engine.scrape(urls))
+    finally:
+        engine.close()
+    return engine, results
+
+
+def crawl_async(shop, urls, per_host_limit=None, **options):
+    from scraper_async import AsyncScraper
+    engine = ScraperEngine(**options)
+    try:
+        results = AsyncScraper(engine, concurrency=20, per_host_limit=per_host_limit).run(urls)
+    finally:
+        engine.close()
+    return engine, results
+
+
+class RobotsTest(unittest.TestCase):
+    def test_disallowed_listing_is_never_requested(self):
+        with RecordingShop(disallow=('/shop/list-1/',), pages=2) as shop:
+            engine, results = crawl(shop, shop.start_urls('shop', 2), max_pages=2)
+            paths = shop.paths()
+        errors = {url: error for url, _, error in results if error is not None}
+        self.assertEqual(list(errors), [shop.start_urls('shop', 2)[1]])
+        self.assertIsInstance(next(iter(errors.values())), RobotsDisallowedError)
+        self.assertFalse([path for path in paths if path.startswith('/shop/list-1/')])
+        self.assertEqual(shop.counts['pages'], 2)
+        self.assertEqual(engine.metrics.counters.get('robots_disallowed'), 1)
+
+    def test_crawl_delay_spaces_requests(self):
+        with RecordingShop(crawl_delay=1, pages=3) as shop:
+            _, results = crawl(shop, shop.start_urls('shop', 2), max_pages=3, per_host_limit=4)
+            times = shop.page_times()
+        self.assertEqual(len(results), 6)
+        self.assertFalse([error for _, _, error in results if error is not None])
+        self.assertGreaterEqual(min_gap(times), 1.0 - TOLERANCE)
+
+
+class RateTest(unittest.TestCase):
+    def test_per_host_rate_spaces_requests(self):
+        with RecordingShop(pages=4) as shop:
+            _, results = crawl(shop, shop.start_urls('shop', 2), max_pages=4, per_host_limit=4, per_host_rate=5,
+                               respect_robots=False)
+            times = shop.page_times()
+        self.assertEqual(len(results), 8)
+        self.assertGreaterEqual(min_gap(times), 0.2 - TOLERANCE)
+
+    def test_429_reaches_backoff(self):
+        with RecordingShop(rate=4, burst=2, pages=4) as shop:
+            engine, results = crawl(shop, shop.start_urls('shop', 3), max_pages=4, per_host_limit=6,
+                                    respect_robots=False)
+            throttled = shop.counts['throttled']
+        self.assertFalse([error for _, _, error in results if error is not None])
+        self.assertGreater(throttled, 0)
+        backoff = next(iter(engine.backoff.snapshot().values()))
+        self.assertEqual(backoff['errors'], throttled)
+        self.assertEqual(engine.host_stats()[next(iter(engine.host_stats()))]['statuses'].get(429), throttled)
+
+
+@unittest.skipIf(aiohttp is None, "the asyncio backend needs aiohttp")
+class AsyncLimitsTest(unittest.TestCase):
+    def test_per_host_limit(self):
+        with RecordingShop(pages=3, latency=0.1) as shop:
+            engine, results = crawl_async(shop, shop.start_urls('shop', 6), per_host_limit=2, max_pages=3,
+                                          respect_robots=False)
+            times = shop.page_times()
+        self.assertEqual(len(results), 18)
+        # With two requests in flight and 0.1 s per response, 18 pages take at least 0.8 s.
+        self.assertGreaterEqual(times[-1] - times[0], 0.8)
+
+    def test_rate(self):
+        with RecordingShop(pages=4) as shop:
+            _, results = crawl_async(shop, shop.start_urls('shop', 2), per_host_limit=4, max_pages=4,
+                                     per_host_rate=5, respect_robots=False)
+            times = shop.page_times()
+        self.assertEqual(len(results), 8)
+        self.assertGreaterEqual(min_gap(times), 0.2 - TOLERANCE)
+
+    def test_crawl_delay(self):
+        with RecordingShop(crawl_delay=1, pages=2) as shop:
+            _, results = crawl_async(shop, shop.start_urls('shop', 2), per_host_limit=4, max_pages=2)
+            times = shop.page_times()
+        self.assertEqual(len(results), 4)
+        self.assertGreaterEqual(min_gap(times), 1.0 - TOLERANCE)
+
+    def test_robots_disallow(self):
+        with RecordingShop(disallow=('/shop/list-1/',), pages=1) as shop:
+            _, results = crawl_async(shop, shop.start_urls('shop', 2))
+            paths = shop.paths()
+        errors = [error for _, _, error in results if error is not None]
+        self.assertEqual(len(errors), 1)
+        self.assertIsInstance(errors[0], RobotsDisallowedError)
+        self.assertFalse([path for path in paths if path.startswith('/shop/list-1/')])
+
+    def test_429_reaches_backoff(self):
+        with RecordingShop(rate=4, burst=2, pages=4) as shop:
+            engine, results = crawl_async(shop, shop.start_urls('shop', 3), per_host_limit=6, max_pages=4,
+                                          respect_robots=False)
+            throttled = shop.counts['throttled']
+        self.assertFalse([error for _, _, error in results if error is not None])
+        self.assertGreater(throttled, 0)
+        self.assertEqual(next(iter(engine.backoff.snapshot().values()))['errors'], throttled)
+
+
+if __name__ == '__main__':
+    unittest.main()
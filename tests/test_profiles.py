@@ -0,0 +1,120 @@
+"""Site profiles: loading JSON/YAML files, validation errors, skipping bad profiles, and domain lookup.
+
+Run from the repository root:
+
+    python -m pytest tests
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(TESTS_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from scraper_engine import ScraperEngine
+from scraper_profiles import DEFAULT_PROFILE_DIR, ProfileError, ProfileRegistry, SiteProfile, load_profiles
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+SHOP = {'name': 'shop', 'domains': ['shop.example'], 'selectors': {'container': 'div.item', 'name': 'h2'}}
+
+
+class ProfileFilesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content if isinstance(content, str) else json.dumps(content))
+        return path
+
+
+class LoadProfilesTest(ProfileFilesTestCase):
+    def test_bundled_profiles_load(self):
+        registry = ProfileRegistry.from_paths([DEFAULT_PROFILE_DIR])
+        self.assertEqual(registry.lookup('https://books.toscrape.com/catalogue/page-2.html').name,
+                         'books.toscrape.com')
+        self.assertIsNone(registry.lookup('https://example.org/'))
+
+    def test_directory_list_file_and_subdomains(self):
+        self.write('a.json', {'profiles': [SHOP, dict(SHOP, name='eu', domains=['eu.shop.example'])]})
+        self.write('notes.txt', 'ignored')
+        registry = ProfileRegistry.from_paths([self.directory])
+        self.assertEqual(len(registry), 2)
+        self.assertEqual(registry.lookup('http://www.shop.example/x').name, 'shop')
+        self.assertEqual(registry.lookup('http://eu.shop.example:8080/x').name, 'eu')
+        self.assertIsNone(registry.lookup('http://othershop.example/'))
+
+    @unittest.skipIf(yaml is None, "YAML profiles need PyYAML")
+    def test_yaml(self):
+        path = self.write('shop.yaml', "name: shop\ndomains: shop.example\nselectors:\n  container: div.item\n")
+        self.assertEqual([profile.domains for profile in load_profiles([path])], [['shop.example']])
+
+
+class ProfileErrorsTest(ProfileFilesTestCase):
+    def assertInvalid(self, data, message):
+        with self.assertRaises(ProfileError) as raised:
+            SiteProfile(data, 'test')
+        self.assertIn(message, str(raised.exception))
+
+    def test_validation(self):
+        self.assertInvalid(['not', 'a', 'mapping'], "must be a mapping")
+        self.assertInvalid(dict(SHOP, colour='red'), "unknown profile key(s): colour")
+        self.assertInvalid(dict(SHOP, domains=[]), "domains must")
+        self.assertInvalid(dict(SHOP, kind='recipe'), "kind must be one of")
+        self.assertInvalid(dict(SHOP, selectors={'name': 'h2'}), "selectors.container is required")
+        self.assertInvalid(dict(SHOP, selectors={'container': 'div', 'colour': 'p'}), "unknown selector field")
+        self.assertInvalid(dict(SHOP, selectors={'container': 'div[['}), "invalid selector 'div[['")
+        self.assertInvalid(dict(SHOP, detail={'weight': '.w'}), "unknown detail field 'weight'")
+        self.assertInvalid(dict(SHOP, rate_limit=0), "rate_limit must be a positive number")
+        self.assertInvalid(dict(SHOP, concurrency=True), "concurrency must be a positive number")
+        self.assertInvalid(dict(SHOP, rating_map={}), "rating_map must be a non-empty mapping")
+        self.assertInvalid(dict(SHOP, attributes={'name': 3}), "attributes must map")
+
+    def test_invalid_json_names_the_file(self):
+        path = self.write('broken.json', '{"name": ')
+        with self.assertRaises(ProfileError) as raised:
+            load_profiles([path])
+        self.assertIn('broken.json: invalid JSON', str(raised.exception))
+
+    def test_second_profile_in_a_file_names_its_index(self):
+        path = self.write('two.json', [SHOP, {'domains': 'x.example'}])
+        with self.assertRaises(ProfileError) as raised:
+            load_profiles([path])
+        self.assertIn('two.json[1]: selectors.container is required', str(raised.exception))
+
+    def test_skip_invalid_logs_and_keeps_the_rest(self):
+        self.write('a-broken.json', '{')
+        self.write('b-bad.json', dict(SHOP, colour='red'))
+        self.write('c-good.json', SHOP)
+        messages = []
+        registry = ProfileRegistry.from_paths([self.directory], lambda message, is_error=False:
+                                              messages.append((message, is_error)), skip_invalid=True)
+        self.assertEqual([profile.name for profile in registry.profiles], ['shop'])
+        self.assertEqual(len(messages), 2)
+        self.assertTrue(all(is_error for _, is_error in messages))
+        self.assertIn('a-broken.json', messages[0][0])
+        self.assertIn('b-bad.json', messages[1][0])
+
+    def test_engine_raises_unless_told_to_skip(self):
+        self.write('bad.json', dict(SHOP, colour='red'))
+        with self.assertRaises(ProfileError):
+            ScraperEngine(profiles=[self.directory])
+        engine = ScraperEngine(profiles=[self.directory], skip_invalid_profiles=True)
+        engine.close()
+        self.assertEqual(len(engine.profiles), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,207 @@
+"""Output sinks: streamed CSV batches with late columns, and SQLite upserts.
+
+Run from the repository root:
+
+    python -m pytest tests
+"""
+import csv
+import io
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(TESTS_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from scraper_sinks import CsvSink, JsonLinesSink, SqliteSink, open_sink
+
+try:
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+BOOKS = [{'Name': f"Book {index}", 'Price': f"{index}.50", 'Rating': str(index % 5 + 1)} for index in range(6)]
+
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8') as file:
+        reader = csv.reader(file)
+        return next(reader), list(reader)
+
+
+class CsvSinkTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'out.csv')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_batches_reach_disk_before_close(self):
+        sink = CsvSink(self.path, batch_size=2)
+        try:
+            sink.write(BOOKS[:3])
+            header, rows = read_csv(self.path)
+            self.assertEqual(header, ['Name', 'Price', 'Rating', 'Extra'])
+            self.assertEqual(len(rows), 3)
+        finally:
+            sink.close()
+        self.assertEqual(len(read_csv(self.path)[1]), 3)
+        self.assertEqual(sink.rows_written, 3)
+
+    def test_late_columns_go_to_extra(self):
+        with CsvSink(self.path, batch_size=2) as sink:
+            sink.write(BOOKS[:2])
+            sink.write([dict(BOOKS[2], URL='http://shop/b2', Stock='In stock')])
+        header, rows = read_csv(self.path)
+        self.assertEqual(header, ['Name', 'Price', 'Rating', 'Extra'])
+        self.assertEqual(rows[0][3], '')
+        self.assertEqual(json.loads(rows[2][3]), {'Stock': 'In stock', 'URL': 'http://shop/b2'})
+        self.assertEqual(sink.late_columns, {'URL', 'Stock'})
+        self.assertFalse(sink.dropped_columns)
+
+    def test_single_batch_has_no_extra_column(self):
+        with CsvSink(self.path) as sink:
+            sink.write(BOOKS)
+        header, rows = read_csv(self.path)
+        self.assertEqual(header, ['Name', 'Price', 'Rating'])
+        self.assertEqual(rows[5], ['Book 5', '5.50', '1'])
+
+    def test_single_batch_with_unknown_keys_keeps_extra(self):
+        with CsvSink(self.path, fieldnames=['Name', 'Price']) as sink:
+            sink.write(BOOKS[:2])
+        header, rows = read_csv(self.path)
+        self.assertEqual(header, ['Name', 'Price', 'Extra'])
+        self.assertEqual(json.loads(rows[1][2]), {'Rating': '2'})
+
+    def test_dropped_columns_without_extra_column(self):
+        with CsvSink(self.path, fieldnames=['Name'], extra_column=None) as sink:
+            sink.write(BOOKS[:2])
+        header, rows = read_csv(self.path)
+        self.assertEqual(header, ['Name'])
+        self.assertEqual(rows, [['Book 0'], ['Book 1']])
+        self.assertEqual(sink.dropped_columns, {'Price', 'Rating'})
+
+    def test_resumed_file_without_extra_column_drops_new_keys(self):
+        with CsvSink(self.path) as sink:
+            sink.write(BOOKS[:2])
+        with open(self.path, 'rb') as file:
+            offset = len(file.read())
+        with CsvSink(self.path, resume_offset=offset) as sink:
+            sink.write([dict(BOOKS[2], Stock='In stock')])
+        header, rows = read_csv(self.path)
+        self.assertEqual(header, ['Name', 'Price', 'Rating'])
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(sink.dropped_columns, {'Stock'})
+
+    def test_empty_run(self):
+        with CsvSink(self.path) as sink:
+            sink.write([])
+        self.assertFalse(os.path.exists(self.path))
+        with CsvSink(self.path, create_empty=True, empty_header=['Name', 'Price', 'Rating', 'Change']):
+            pass
+        self.assertEqual(read_csv(self.path), (['Name', 'Price', 'Rating', 'Change'], []))
+
+    def test_stdout_like_file_object(self):
+        buffer = io.StringIO()
+        with CsvSink(buffer, batch_size=1) as sink:
+            sink.write(BOOKS[:2])
+        self.assertEqual(buffer.getvalue().splitlines()[0], 'Name,Price,Rating,Extra')
+        self.assertFalse(buffer.closed)
+
+
+class SqliteSinkTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'out.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def rows(self):
+        connection = sqlite3.connect(self.path)
+        try:
+            return connection.execute("SELECT name, price, rating, extra, source FROM products ORDER BY name").fetchall()
+        finally:
+            connection.close()
+
+    def test_typed_columns_and_extra(self):
+        with SqliteSink(self.path, source='run-1') as sink:
+            sink.write([{'Name': 'Book', 'Price': '1,234.50', 'Rating': 'N/A', 'Stock': 'In stock'}])
+        self.assertEqual(self.rows(), [('Book', 1234.5, None, '{"Stock": "In stock"}', 'run-1')])
+
+    def test_rescrape_updates_in_place(self):
+        with SqliteSink(self.path) as sink:
+            sink.write(BOOKS)
+        with SqliteSink(self.path) as sink:
+            sink.write([dict(BOOKS[0], Price='9.99')])
+        rows = self.rows()
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[0][:2], ('Book 0', 9.99))
+        self.assertEqual(sink.rows_written, 1)
+        self.assertEqual(sink.duplicate_keys, 0)
+
+    def test_product_url_keys_rows_with_the_same_name(self):
+        rows = [{'Name': 'Mug', 'Price': '5', 'URL': 'http://shop/mug-red'},
+                {'Name': 'Mug', 'Price': '6', 'URL': 'http://shop/mug-blue'}]
+        with SqliteSink(self.path) as sink:
+            sink.write(rows)
+        self.assertEqual(len(self.rows()), 2)
+        self.assertEqual(sink.duplicate_keys, 0)
+
+    def test_duplicate_keys_in_one_run(self):
+        with SqliteSink(self.path, batch_size=2) as sink:
+            sink.write(BOOKS[:3] + [dict(BOOKS[0], Price='0.10'), dict(BOOKS[1])])
+        self.assertEqual(sink.duplicate_keys, 2)
+        self.assertEqual(sink.rows_written, 3)
+        rows = self.rows()
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0][:2], ('Book 0', 0.1))
+
+    def test_custom_key_fields(self):
+        with SqliteSink(self.path, key_fields=('Price',)) as sink:
+            sink.write([{'Name': 'A', 'Price': '1'}, {'Name': 'B', 'Price': '1'}])
+        self.assertEqual(sink.duplicate_keys, 1)
+        self.assertEqual([row[0] for row in self.rows()], ['B'])
+
+
+class OpenSinkTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_format_from_extension(self):
+        for name, sink_class in (('a.csv', CsvSink), ('a.jsonl', JsonLinesSink), ('a.sqlite', SqliteSink)):
+            sink = open_sink(os.path.join(self.directory, name))
+            sink.close()
+            self.assertIsInstance(sink, sink_class)
+        with self.assertRaises(ValueError):
+            open_sink('-', 'sqlite')
+
+    def test_jsonl(self):
+        path = os.path.join(self.directory, 'a.jsonl')
+        with open_sink(path, batch_size=2) as sink:
+            sink.write(BOOKS[:3])
+        with open(path, encoding='utf-8') as file:
+            self.assertEqual([json.loads(line) for line in file], BOOKS[:3])
+
+    @unittest.skipIf(pyarrow is None, "Parquet output needs pyarrow")
+    def test_parquet_numeric_columns(self):
+        path = os.path.join(self.directory, 'a.parquet')
+        with open_sink(path, batch_size=4) as sink:
+            sink.write(BOOKS + [{'Name': 'Odd', 'Price': 'N/A', 'Rating': 'N/A', 'Stock': 'none'}])
+        table = pyarrow.parquet.read_table(path)
+        self.assertEqual(str(table.schema.field('price').type), 'double')
+        self.assertEqual(table.column('price').to_pylist(), [0.5, 1.5, 2.5, 3.5, 4.5, 5.5, None])
+        self.assertEqual(table.column('extra').to_pylist()[-1], '{"Stock": "none"}')
+
+
+if __name__ == '__main__':
+    unittest.main()
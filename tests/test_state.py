@@ -0,0 +1,158 @@
+"""Incremental crawls: ChangeTracker inserts, updates, deletions, page moves and skipped unchanged pages.
+
+Run from the repository root:
+
+    python -m pytest tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(TESTS_DIR)
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'benchmarks'))
+
+from mock_server import MockShop
+from scraper_engine import ScraperEngine
+from scraper_state import CHANGE_COLUMN, ChangeTracker
+
+PAGE_1 = 'http://shop/page-1.html'
+PAGE_2 = 'http://shop/page-2.html'
+
+
+def product(name, price, link=True):
+    row = {'Name': name, 'Price': price, 'Rating': '4'}
+    if link:
+        row['URL'] = f"http://shop/{name.lower()}.html"
+    return row
+
+
+def changes(rows):
+    return sorted((row['Name'], row[CHANGE_COLUMN]) for row in rows)
+
+
+class ChangeTrackerTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'state.sqlite')
+        self.tracker = ChangeTracker(self.path)
+
+    def tearDown(self):
+        self.tracker.close()
+        shutil.rmtree(self.directory)
+
+    def crawl(self, pages):
+        """Runs one crawl over {url: (html, rows, next_url)}; returns (changed rows, deletions)."""
+        emitted = []
+        for url, (html, rows, next_url) in pages.items():
+            state = self.tracker.check_page(url, html)
+            emitted.extend(self.tracker.record_page(state, None if state.unchanged else rows, next_url))
+        return emitted, self.tracker.finish_run()
+
+    def test_first_run_inserts_everything(self):
+        emitted, deleted = self.crawl({PAGE_1: ('v1', [product('A', '1'), product('B', '2')], PAGE_2)})
+        self.assertEqual(changes(emitted), [('A', 'insert'), ('B', 'insert')])
+        self.assertEqual(deleted, [])
+
+    def test_unchanged_page_is_skipped(self):
+        self.crawl({PAGE_1: ('v1', [product('A', '1')], PAGE_2)})
+        state = self.tracker.check_page(PAGE_1, 'v1')
+        self.assertTrue(state.unchanged)
+        self.assertEqual(state.next_url, PAGE_2)
+        emitted, deleted = self.crawl({PAGE_1: ('v1', None, None)})
+        self.assertEqual((emitted, deleted), ([], []))
+        self.assertEqual(self.tracker.counts['skipped_pages'], 1)
+
+    def test_update_insert_and_delete(self):
+        self.crawl({PAGE_1: ('v1', [product('A', '1'), product('B', '2'), product('C', '3')], None)})
+        emitted, deleted = self.crawl({PAGE_1: ('v2', [product('A', '1'), product('B', '5'), product('D', '4')],
+                                                None)})
+        self.assertEqual(changes(emitted), [('B', 'update'), ('D', 'insert')])
+        self.assertEqual(changes(deleted), [('C', 'delete')])
+        self.assertEqual(deleted[0]['Price'], '3')
+        self.assertEqual(self.tracker.counts['unchanged'], 1)
+
+    def test_records_of_pages_not_crawled_are_kept(self):
+        self.crawl({PAGE_1: ('v1', [product('A', '1')], None), PAGE_2: ('v1', [product('B', '2')], None)})
+        _, deleted = self.crawl({PAGE_1: ('v2', [product('A', '2')], None)})
+        self.assertEqual(deleted, [])
+
+    def test_linked_product_moving_pages_keeps_its_identity(self):
+        self.crawl({PAGE_1: ('v1', [product('A', '1'), product('B', '2')], PAGE_2),
+                    PAGE_2: ('v1', [product('C', '3')], None)})
+        # A new product on page 1 pushes B onto page 2.
+        emitted, deleted = self.crawl({PAGE_1: ('v2', [product('N', '9'), product('A', '1')], PAGE_2),
+                                       PAGE_2: ('v2', [product('B', '2'), product('C', '3')], None)})
+        self.assertEqual(changes(emitted), [('N', 'insert')])
+        self.assertEqual(deleted, [])
+
+    def test_unlinked_rows_are_keyed_per_page(self):
+        self.crawl({PAGE_1: ('v1', [product('A', '1', link=False), product('A', '1', link=False)], PAGE_2),
+                    PAGE_2: ('v1', [product('B', '2', link=False)], None)})
+        emitted, deleted = self.crawl({PAGE_1: ('v2', [product('A', '1', link=False)], PAGE_2),
+                                       PAGE_2: ('v2', [product('B', '2', link=False),
+                                                       product('A', '1', link=False)], None)})
+        # The second "A" has no link to follow it from page 1 to page 2.
+        self.assertEqual(changes(emitted), [('A', 'insert')])
+        self.assertEqual(changes(deleted), [('A', 'delete')])
+
+    def test_runs_are_numbered_across_reopens(self):
+        self.crawl({PAGE_1: ('v1', [product('A', '1')], None)})
+        self.tracker.close()
+        self.tracker = ChangeTracker(self.path)
+        self.assertEqual(self.tracker.run_id, 2)
+        emitted, _ = self.crawl({PAGE_1: ('v1', None, None)})
+        self.assertEqual(emitted, [])
+
+
+class IncrementalCrawlTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'state.sqlite')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def crawl(self, urls, **options):
+        tracker = ChangeTracker(self.path)
+        engine = ScraperEngine(change_tracker=tracker, respect_robots=False, max_pages=3, **options)
+        try:
+            rows = [row for _, rows, _ in engine.scrape(urls) for row in rows]
+            return rows, tracker.finish_run(), dict(tracker.counts)
+        finally:
+            engine.close()
+            tracker.close()
+
+    def check_second_run_skips_extraction(self, **options):
+        with MockShop(pages=3, items=4) as shop:
+            urls = shop.start_urls('shop', 2)
+            first, _, _ = self.crawl(urls, **options)
+            second, deleted, counts = self.crawl(urls, **options)
+            requests = shop.counts['pages']
+        self.assertEqual(len(first), 24)
+        self.assertEqual({row[CHANGE_COLUMN] for row in first}, {'insert'})
+        self.assertEqual((second, deleted), ([], []))
+        # Stored pagination links are followed, so every page is still fetched once per run.
+        self.assertEqual(counts['skipped_pages'], 6)
+        self.assertEqual(requests, 12)
+
+    def test_second_run_skips_extraction(self):
+        self.check_second_run_skips_extraction()
+
+    def test_second_run_skips_extraction_with_processes(self):
+        self.check_second_run_skips_extraction(parse_processes=2)
+
+    def test_cannot_combine_with_details(self):
+        tracker = ChangeTracker(self.path)
+        try:
+            with self.assertRaises(ValueError):
+                ScraperEngine(change_tracker=tracker, enrich_details=True)
+        finally:
+            tracker.close()
+
+
+if __name__ == '__main__':
+    unittest.main()